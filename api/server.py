@@ -35,7 +35,7 @@ from core.memory_engine import MemoryEngine
 from core.session_manager import get_session_manager
 
 # Server state tracking
-SERVER_START_TIME = time.time()
+SERVER_START_TIME = time.monotonic()  # Monotonic: uptime is immune to wall-clock adjustments
 _last_request_lock = Lock()
 _LAST_REQUEST_TIME: Optional[float] = None
 
@@ -337,7 +337,7 @@ def get_system_metrics():
     """Get system-level metrics."""
     try:
         # Calculate uptime
-        uptime_seconds = int(time.time() - SERVER_START_TIME)
+        uptime_seconds = int(time.monotonic() - SERVER_START_TIME)
 
         # Get data directory size
         data_path = Path("data/CONVERSATIONS")
@@ -1,6 +1,7 @@
 """Configuration and settings management."""
 
 import os
+import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -24,6 +25,21 @@ if ENV_FILE.exists():
 
 
 # Provider management
+# Env vars read per provider (module constants: is_provider_enabled runs on every LLM attempt)
+_PROVIDER_DISABLE_FLAGS = {
+    "openai": "DISABLE_OPENAI",
+    "anthropic": "DISABLE_ANTHROPIC",
+    "google": "DISABLE_GOOGLE",
+    "openrouter": "DISABLE_OPENROUTER",
+}
+_PROVIDER_KEY_VARS = {
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "google": "GOOGLE_API_KEY",
+    "openrouter": "OPENROUTER_API_KEY",
+}
+
+
 def _is_truthy(value: Optional[str]) -> bool:
     """Check if environment variable value is truthy."""
     if not value:
@@ -45,26 +61,12 @@ def is_provider_enabled(provider: str) -> bool:
     provider = provider.lower()
 
     # Check for explicit disable flag
-    disable_flags = {
-        "openai": "DISABLE_OPENAI",
-        "anthropic": "DISABLE_ANTHROPIC",
-        "google": "DISABLE_GOOGLE",
-        "openrouter": "DISABLE_OPENROUTER",
-    }
-
-    disable_flag = disable_flags.get(provider)
+    disable_flag = _PROVIDER_DISABLE_FLAGS.get(provider)
     if disable_flag and _is_truthy(os.getenv(disable_flag)):
         return False
 
     # Check if API key exists
-    key_map = {
-        "openai": "OPENAI_API_KEY",
-        "anthropic": "ANTHROPIC_API_KEY",
-        "google": "GOOGLE_API_KEY",
-        "openrouter": "OPENROUTER_API_KEY",
-    }
-
-    env_var = key_map.get(provider)
+    env_var = _PROVIDER_KEY_VARS.get(provider)
     if not env_var:
         return False
 
@@ -189,7 +191,7 @@ def validate_agents_config(config: Dict[str, Any]) -> None:
 
     required_agent_fields = {"model": str, "system": str, "temperature": float, "max_tokens": int}
     known_top_level_keys = {
-        "compression", "refinement", "multi_critic", "defaults",
+        "compression", "refinement", "multi_critic", "defaults", "cache",
         "builder", "critic", "closer", "router",
         "security_critic", "performance_critic", "code_quality_critic",
     }
@@ -321,7 +323,27 @@ def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> flo
 
 
 # Token counting utility (standardized across codebase)
+# Counting uses encode_ordinary: special tokens such as <|endoftext|> are counted as
+# plain text, which skips the special-token scan and cannot raise on stored content
+# that happens to contain one
 _tiktoken_encoding = None
+_tiktoken_lock = threading.Lock()  # One load (and BPE file download) across threads
+
+
+def _get_tiktoken_encoding():
+    """Load the shared cl100k_base encoding once (None if tiktoken is not installed)."""
+    global _tiktoken_encoding
+
+    if _tiktoken_encoding is None:
+        with _tiktoken_lock:
+            if _tiktoken_encoding is None:
+                try:
+                    import tiktoken
+                    _tiktoken_encoding = tiktoken.get_encoding("cl100k_base")
+                except ImportError:
+                    return None
+
+    return _tiktoken_encoding
 
 
 def count_tokens(text: str) -> int:
@@ -337,14 +359,79 @@ def count_tokens(text: str) -> int:
     Returns:
         Token count
     """
-    global _tiktoken_encoding
+    encoding = _get_tiktoken_encoding()
+    if encoding is None:
+        # Fallback to old heuristic if tiktoken not installed
+        return len(text) // 4
 
-    if _tiktoken_encoding is None:
-        try:
-            import tiktoken
-            _tiktoken_encoding = tiktoken.get_encoding("cl100k_base")
-        except ImportError:
-            # Fallback to old heuristic if tiktoken not installed
-            return len(text) // 4
-
-    return len(_tiktoken_encoding.encode(text))
+    return len(encoding.encode_ordinary(text))
+
+
+# encode_ordinary_batch spins up a new thread pool per call: only worth it for many texts on several cores
+_BATCH_ENCODE_MIN_TEXTS = 8
+
+
+def count_tokens_batch(texts: List[str]) -> List[int]:
+    """
+    Count tokens for several texts with one encoder lookup.
+
+    Small batches are encoded one by one; tiktoken's encode_ordinary_batch (Rust
+    threads, GIL released) is only used from _BATCH_ENCODE_MIN_TEXTS texts
+    up and when more than one CPU is available, since it creates a thread
+    pool on every call.
+
+    Args:
+        texts: Texts to count tokens for
+
+    Returns:
+        Token counts, same order as texts
+    """
+    if not texts:
+        return []
+    encoding = _get_tiktoken_encoding()
+    if encoding is None:
+        return [len(text) // 4 for text in texts]
+
+    cpu_count = os.cpu_count() or 1
+    if len(texts) < _BATCH_ENCODE_MIN_TEXTS or cpu_count < 2:
+        return [len(encoding.encode_ordinary(text)) for text in texts]
+
+    return [
+        len(tokens) for tokens in encoding.encode_ordinary_batch(texts, num_threads=min(len(texts), cpu_count))
+    ]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Return the longest prefix of text that fits in max_tokens.
+
+    Encodes once and slices the token list (instead of re-counting candidate
+    prefixes), then backs off to a word boundary so no word is cut in half.
+    Whitespace and line breaks inside the kept prefix are preserved.
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+
+    Returns:
+        text unchanged if it fits, otherwise the truncated prefix
+    """
+    encoding = _get_tiktoken_encoding()
+    if encoding is None:
+        if len(text) // 4 <= max_tokens:
+            return text
+        prefix = text[: max_tokens * 4]
+    else:
+        tokens = encoding.encode_ordinary(text)
+        if len(tokens) <= max_tokens:
+            return text
+        # A token slice can end inside a multi-byte character: drop the replacement char
+        prefix = encoding.decode(tokens[:max_tokens]).rstrip("\ufffd")
+
+    if text[len(prefix) : len(prefix) + 1].strip():
+        # Cut landed inside a word: back off to the previous whitespace
+        cut = max(prefix.rfind(" "), prefix.rfind("\n"), prefix.rfind("\t"))
+        if cut > 0:
+            prefix = prefix[:cut]
+
+    return prefix.rstrip()
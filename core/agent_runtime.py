@@ -1,20 +1,217 @@
 """Agent runtime orchestration."""
 
+import asyncio
+import atexit
+import concurrent.futures
+import functools
+import hashlib
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+from collections import Counter
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
 
 from config.settings import load_agents_config, load_memory_config, validate_agents_config, get_defaults
-
-# Hard cap on refinement loop: prevents infinite loop if Builder keeps failing and Critic keeps finding issues
-MAX_REFINEMENT_ITERATIONS = 3
+from core import caveman
+from core.bm25_compress import bm25_compress
+from core.llm_cache import create_llm_cache, create_semantic_llm_cache
 from core.llm_connector import LLMConnector, LLMResponse
-from core.logging_utils import write_json
+from core.logging_utils import get_status_logger, make_log_filename, write_json
 from core.memory_engine import MemoryEngine
 from core.context_aggregator import ContextAggregator
 
+logger = logging.getLogger(__name__)
+status_log = get_status_logger(__name__)
+
+# Hard cap on refinement loop: prevents infinite loop if Builder keeps failing and Critic keeps finding issues
+MAX_REFINEMENT_ITERATIONS = 3
+
+# Default cap on text sent to the semantic summarizer (compression.max_input_chars); longer input keeps head + tail
+MAX_COMPRESS_INPUT = 8000
+# Compressed stage outputs kept per runtime (oldest evicted first)
+_COMPRESSED_CACHE_SIZE = 64
+_TRUNCATION_MARKER = "\n...[truncated]...\n"
+
+# Static parts of the semantic compression prompt (joined around max_tokens and the text to compress)
+_COMPRESSION_PREFIX = "Summarize this output into structured JSON (max "
+_COMPRESSION_MID = """ tokens):
+
+REQUIRED JSON STRUCTURE:
+{
+  "key_decisions": ["decision1", "decision2", ...],
+  "rationale": {"decision1": "why chosen", "decision2": "why chosen"},
+  "trade_offs": ["trade-off 1", "trade-off 2", ...],
+  "open_questions": ["question 1", "question 2", ...],
+  "technical_specs": {"component": "choice", "framework": "name"}
+}
+
+RULES:
+- Extract ONLY the most important decisions and their reasoning
+- Include ALL technical specifications mentioned
+- Preserve trade-offs and concerns
+- List unresolved questions or dependencies
+- NO code snippets in summary (only decision: "use pattern X")
+- Keep total output under """
+_COMPRESSION_SUFFIX = """ tokens
+
+ORIGINAL OUTPUT TO SUMMARIZE:
+"""
+
+# Batch variant: same structure/rules, one summary object per numbered output
+_BATCH_COMPRESSION_HEADER = """Summarize EACH of the {count} numbered outputs below SEPARATELY into structured JSON (max {max_tokens} tokens per output).
 
-@dataclass
+Return ONLY a JSON array with one object per output, in order:
+[{{"id": 0, "summary": {{...}}}}, {{"id": 1, "summary": {{...}}}}, ...]
+
+Each "summary" uses this structure:
+{{
+  "key_decisions": ["decision1", "decision2", ...],
+  "rationale": {{"decision1": "why chosen", "decision2": "why chosen"}},
+  "trade_offs": ["trade-off 1", "trade-off 2", ...],
+  "open_questions": ["question 1", "question 2", ...],
+  "technical_specs": {{"component": "choice", "framework": "name"}}
+}}
+
+RULES:
+- Extract ONLY the most important decisions and their reasoning
+- Include ALL technical specifications mentioned
+- Preserve trade-offs and concerns
+- List unresolved questions or dependencies
+- NO code snippets in summary (only decision: "use pattern X")
+- Never merge outputs: one summary per id
+
+OUTPUTS TO SUMMARIZE:
+"""
+
+# Stage-context building blocks: contexts are assembled with one "".join instead of chained f-strings
+_ORIG_HDR = "Original request: "
+_TASK_HDR = "\n\nYour task as "
+_CLOSER_TASK = ": Synthesize all outputs below into a coherent final plan.\n\n"
+
+_REFINE_TEMPLATE = """Original request: {prompt}
+
+Your previous solution had CRITICAL ISSUES identified by the critic (listed at the end).
+
+Please provide an IMPROVED version of your solution that addresses these critical issues.
+Focus on:
+1. Fixing technical errors
+2. Addressing security concerns
+3. Resolving missing components
+4. Correcting incorrect implementations
+
+Provide a complete, refined solution.
+
+CRITICAL ISSUES (iteration {iteration}):
+
+{issues}"""
+
+_DEFAULT_CRITICAL_KEYWORDS = (
+    "CRITICAL", "ERROR", "BUG", "SECURITY", "VULNERABILITY",
+    "INCORRECT", "WRONG", "MISSING", "BROKEN", "FAILED",
+)
+_ISSUE_PATTERN = re.compile(r'^\s*(?:Issue|Problem)\s+\d+:', re.IGNORECASE)
+_ISSUE_LINE_PREFIX = re.compile(r'^\s*(?:\d+[.)]|[-*•])\s*')
+
+
+@functools.lru_cache(maxsize=8)
+def _keyword_pattern(keywords: tuple) -> "re.Pattern[str]":
+    """One compiled alternation for a keyword tuple (substring match, same as `kw in text`)."""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_critical_issues(critique_text: str, critical_keywords: tuple) -> Optional[str]:
+    """
+    Parse critical issue blocks out of a critic response.
+
+    Pure function of (text, keywords), memoized so the same critic output is
+    only parsed once across refinement iterations and retries.
+    """
+    # Empty keyword list: only "Issue N:" patterns count (an empty alternation would match every line)
+    keyword_re = _keyword_pattern(critical_keywords) if critical_keywords else None
+
+    # Split into lines for analysis
+    lines = critique_text.split('\n')
+    critical_lines = []
+    issue_blocks = []
+    current_block = []
+    in_critical_section = False
+
+    for line in lines:
+        line_upper = line.upper()
+
+        # Check if line contains critical keywords (single scan of the line)
+        has_critical = keyword_re is not None and keyword_re.search(line_upper) is not None
+
+        # Check for issue patterns with severity
+        issue_pattern = _ISSUE_PATTERN.match(line)
+
+        if has_critical or issue_pattern:
+            in_critical_section = True
+            current_block = [line]
+        elif in_critical_section:
+            # Continue collecting lines for this issue block
+            if line.strip() and not line.startswith('**'):
+                current_block.append(line)
+            else:
+                # End of current block
+                if current_block:
+                    issue_blocks.append('\n'.join(current_block))
+                    current_block = []
+                in_critical_section = False
+
+    # Add last block if exists
+    if current_block:
+        issue_blocks.append('\n'.join(current_block))
+
+    # If no structured blocks found, fall back to line-by-line extraction
+    if not issue_blocks:
+        for line in lines:
+            if keyword_re is not None and keyword_re.search(line.upper()):
+                critical_lines.append(line.strip())
+
+        if critical_lines:
+            return '\n'.join(critical_lines)
+        return None
+
+    # Format the extracted issues
+    formatted = "CRITICAL ISSUES REQUIRING FIXES:\n\n"
+    for i, block in enumerate(issue_blocks, 1):
+        formatted += f"{i}. {block}\n\n"
+    return formatted.strip()
+
+
+def _head_tail(text: str, max_chars: int) -> str:
+    """Keep the first and last max_chars // 2 chars of text (LLM output front-loads and concludes)."""
+    if len(text) <= max_chars:
+        return text
+    half = max_chars // 2
+    return f"{text[:half]}{_TRUNCATION_MARKER}{text[-half:]}"
+
+
+@functools.lru_cache(maxsize=128)
+def _canonical_issue_set(issues: str) -> frozenset:
+    """Issue lines normalized for comparison (case, numbering, bullets and whitespace ignored)."""
+    canonical = set()
+    for line in issues.split('\n'):
+        line = _ISSUE_LINE_PREFIX.sub("", line).strip().lower()
+        if line and line != "critical issues requiring fixes:":
+            canonical.add(" ".join(line.split()))
+    return frozenset(canonical)
+
+
+@functools.lru_cache(maxsize=128)
+def _count_issue_lines(issues: str) -> int:
+    """Non-empty line count of an extracted issues string (memoized for convergence checks)."""
+    return sum(1 for line in issues.split('\n') if line.strip())
+
+
+@dataclass(slots=True)
 class RunResult:
     """Result from agent execution."""
 
@@ -56,6 +253,19 @@ class RunResult:
         }
 
 
+class _AgentSettings(NamedTuple):
+    """Per-agent settings resolved once from agents.yaml."""
+
+    model: str
+    system: str
+    temperature: float
+    max_tokens: int
+    fallback_order: tuple
+    memory_enabled: bool
+    memory: Dict[str, Any]
+    compression_threshold: int  # Previous-output chars before it is compressed for this agent
+
+
 class AgentRuntime:
     """Orchestrates agent execution."""
 
@@ -64,9 +274,103 @@ class AgentRuntime:
         validate_agents_config(self.config)
         self.defaults = get_defaults()
         self.memory_config = load_memory_config()
-        self.connector = LLMConnector(retry_count=1)
+        self._memory_write_behind = self.memory_config.get("memory", {}).get("write_behind", False)
+        self.connector = LLMConnector(
+            retry_count=1,
+            cache=create_llm_cache(self.config.get("cache")),
+            semantic_cache=create_semantic_llm_cache(self.config.get("semantic_cache")),
+            race_fallbacks=self.config.get("fallback", {}).get("race_after_primary_failure", False),
+            hedge_ms=self.config.get("fallback", {}).get("hedge_after_ms"),
+        )
+        # Agent settings are static for the runtime's lifetime: resolve once instead of per stage/iteration
+        threshold_chars = self.config.get("compression", {}).get("threshold_chars", {})
+        self._standard_compression_threshold = threshold_chars.get("standard", 1200)
+        memory_threshold = threshold_chars.get("memory_enabled", 800)
+        self._closer_compression_threshold = threshold_chars.get("closer", 1500)
+        self._agent_settings = {
+            name: _AgentSettings(
+                model=raw.get("model"),
+                system=raw.get("system", ""),
+                temperature=raw.get("temperature", 0.2),
+                max_tokens=raw.get("max_tokens", 1500),
+                fallback_order=tuple(raw.get("fallback_order", [])),
+                memory_enabled=raw.get("memory_enabled", False),
+                memory=raw.get("memory", {}),
+                compression_threshold=(
+                    memory_threshold if raw.get("memory_enabled", False) else self._standard_compression_threshold
+                ),
+            )
+            for name, raw in self.config["agents"].items()
+        }
+        # Critic keywords are config-static: lowercase once instead of per selection call
+        keywords_config = self.config.get("dynamic_selection", {}).get("keywords", {})
+        self._critic_keywords = {
+            critic_name: tuple(keyword.lower() for keyword in keywords)
+            for critic_name, keywords in keywords_config.items()
+        }
+        # Router keyword heuristic: one precompiled alternation per agent
+        router_heuristic = self.config["agents"].get("router", {}).get("heuristic", {})
+        self._route_patterns = {}
+        if router_heuristic.get("enabled", False):
+            self._route_patterns = {
+                agent_name: re.compile(
+                    r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b",
+                    re.IGNORECASE,
+                )
+                for agent_name, keywords in router_heuristic.get("keywords", {}).items()
+                if keywords
+            }
+        self._route_min_matches = router_heuristic.get("min_matches", 2)
+        self._route_heuristic_hits = 0
+        self._route_llm_calls = 0
+        self._critic_fast_path_hits = 0  # _select_relevant_critics calls that skipped scoring
+        # Compressed previous-stage outputs, keyed by content digest (see _compress_previous_output)
+        self._compressed_cache: Dict[tuple, str] = {}
+        self._compressed_cache_lock = threading.Lock()
         self._memory = None  # Lazy initialization
         self._context_aggregator = None  # Lazy initialization
+        # Conversation logs are written by a background thread (started on first run)
+        self._log_queue: "queue.Queue[tuple]" = queue.Queue()
+        self._log_worker_thread: Optional[threading.Thread] = None
+        self._log_worker_lock = threading.Lock()
+
+    def _enqueue_log(self, log_record: Dict[str, Any]) -> str:
+        """
+        Queue a conversation log for the background writer.
+
+        The filename is generated up front so the RunResult can reference it
+        before the file is on disk.
+
+        Returns:
+            Log filename
+        """
+        filename = make_log_filename(log_record.get("agent", "unknown"))
+        if self._log_worker_thread is None:
+            with self._log_worker_lock:
+                if self._log_worker_thread is None:
+                    self._log_worker_thread = threading.Thread(
+                        target=self._log_worker, name="run-log-writer", daemon=True
+                    )
+                    self._log_worker_thread.start()
+                    atexit.register(self.flush_logs)
+        # Bind the writer now so the worker uses the write_json in effect at enqueue time
+        self._log_queue.put((write_json, log_record, filename))
+        return filename
+
+    def _log_worker(self) -> None:
+        """Drain the log queue, writing one JSON file per run."""
+        while True:
+            writer, log_record, filename = self._log_queue.get()
+            try:
+                writer(log_record, filename=filename)
+            except Exception as e:
+                logger.warning(f"Failed to write conversation log {filename}: {e}")
+            finally:
+                self._log_queue.task_done()
+
+    def flush_logs(self) -> None:
+        """Block until all queued conversation logs are written."""
+        self._log_queue.join()
 
     @property
     def memory(self) -> MemoryEngine:
@@ -99,27 +403,9 @@ class AgentRuntime:
         Returns:
             Structured JSON summary as string
         """
-        compression_prompt = f"""Summarize this output into structured JSON (max {max_tokens} tokens):
-
-REQUIRED JSON STRUCTURE:
-{{
-  "key_decisions": ["decision1", "decision2", ...],
-  "rationale": {{"decision1": "why chosen", "decision2": "why chosen"}},
-  "trade_offs": ["trade-off 1", "trade-off 2", ...],
-  "open_questions": ["question 1", "question 2", ...],
-  "technical_specs": {{"component": "choice", "framework": "name"}}
-}}
-
-RULES:
-- Extract ONLY the most important decisions and their reasoning
-- Include ALL technical specifications mentioned
-- Preserve trade-offs and concerns
-- List unresolved questions or dependencies
-- NO code snippets in summary (only decision: "use pattern X")
-- Keep total output under {max_tokens} tokens
-
-ORIGINAL OUTPUT TO SUMMARIZE:
-{text}"""
+        compression_prompt = "".join(
+            (_COMPRESSION_PREFIX, str(max_tokens), _COMPRESSION_MID, str(max_tokens), _COMPRESSION_SUFFIX, text)
+        )
 
         try:
             # Use compression model from config (default: gemini-2.5-flash)
@@ -143,6 +429,181 @@ ORIGINAL OUTPUT TO SUMMARIZE:
             logger.warning(f"Semantic compression failed, falling back to truncation: {e}")
             return self._intelligent_truncate(text, max_tokens * 4)
 
+    def _compress_for_context(
+        self, texts: List[str], query: str, max_tokens: int = 500, max_chars: Optional[int] = None
+    ) -> List[str]:
+        """
+        Compress stage outputs using the configured compression strategy.
+
+        "bm25": extractive, keeps the passages most relevant to query (no LLM call)
+        "semantic": structured JSON summary from the compression model (one batched call);
+            input over compression.max_input_chars keeps only its head and tail
+
+        Args:
+            texts: Outputs to compress
+            query: Relevance query (the original user request)
+            max_tokens: Target token count per text
+            max_chars: Compression threshold the result must get under (bm25 budget is
+                capped at max_chars // 4, otherwise text between the threshold and
+                max_tokens * 4 chars would come back unchanged)
+
+        Returns:
+            List of compressed texts, same order as texts
+        """
+        if self._compression_strategy() == "bm25":
+            token_budget = min(max_tokens, max_chars // 4) if max_chars else max_tokens  # 4 chars ≈ 1 token
+            return [bm25_compress(text, query=query, token_budget=token_budget) for text in texts]
+        # Bound the summarizer prompt: a 50x-threshold output should not cost 50x to compress
+        max_input = self.config.get("compression", {}).get("max_input_chars", MAX_COMPRESS_INPUT)
+        return self._compress_semantic_batch([_head_tail(text, max_input) for text in texts], max_tokens=max_tokens)
+
+    def _compress_previous_output(self, text: str, threshold: int, query: str) -> str:
+        """
+        Fit a previous stage's output under threshold for the next stage's context.
+
+        Rule-based pre-compression first, then the configured compressor (with a
+        [Note: ...] marker). Results are cached by content digest, so the same
+        builder output reviewed by several critics or refinement passes is only
+        compressed once.
+        """
+        if len(text) <= threshold:
+            return text
+
+        key = (
+            hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(),
+            hashlib.blake2b(query.encode("utf-8"), digest_size=16).digest(),
+            threshold,
+            self._compression_strategy(),
+        )
+        cached = self._compressed_cache.get(key)
+        if cached is not None:
+            return cached
+
+        response_text = self._precompress(text, threshold)
+        if len(response_text) > threshold:
+            compressed = self._compress_for_context([response_text], query=query, max_tokens=500, max_chars=threshold)[0]
+            response_text = f"{compressed}\n\n[Note: Above is {self._compression_note()}]"
+
+        with self._compressed_cache_lock:
+            if len(self._compressed_cache) >= _COMPRESSED_CACHE_SIZE:
+                self._compressed_cache.pop(next(iter(self._compressed_cache)))  # Oldest first
+            self._compressed_cache[key] = response_text
+        return response_text
+
+    def _build_agent_context(
+        self,
+        *,
+        agent: str,
+        original_prompt: str,
+        previous_label: str,
+        previous_response: str,
+        threshold: int,
+    ) -> str:
+        """
+        Build a stage prompt from the original request and one previous output.
+
+        Immutable prefix (request + task header) first, volatile previous
+        output last, so the shared prefix stays cacheable by the provider.
+        """
+        response_text = self._compress_previous_output(previous_response, threshold, original_prompt)
+        return "".join(
+            (_ORIG_HDR, original_prompt, _TASK_HDR, agent, ":\n\nPrevious ", previous_label, ":\n", response_text)
+        )
+
+    def _compression_strategy(self) -> str:
+        return self.config.get("compression", {}).get("strategy", "semantic")
+
+    def _compression_note(self) -> str:
+        """Describe compressed output for the [Note: ...] appended to stage context."""
+        if self._compression_strategy() == "bm25":
+            return "extract of the passages most relevant to the original request"
+        return "structured summary preserving all key decisions and specs"
+
+    def _precompress(self, text: str, threshold: int) -> str:
+        """
+        Rule-based pre-compression for text over the threshold.
+
+        Cheap (no LLM call); if the result fits under the threshold the caller
+        can skip the semantic summarizer entirely. Short text is returned as-is.
+        """
+        if len(text) <= threshold or not self.config.get("compression", {}).get("rule_based", True):
+            return text
+        return caveman.compress(text)
+
+    def _compress_semantic_batch(self, texts: List[str], max_tokens: int = 500) -> List[str]:
+        """
+        Compress several outputs with a single LLM call.
+
+        Same structured summary as _compress_semantic, but all texts go into one
+        numbered prompt and come back as a JSON array, so N long outputs cost one
+        round-trip instead of N. Any text the model fails to summarize falls back
+        to intelligent truncation.
+
+        Args:
+            texts: Outputs to compress
+            max_tokens: Target token count per text (default: 500)
+
+        Returns:
+            List of summaries, same order and length as texts
+        """
+        if len(texts) <= 1:
+            return [self._compress_semantic(text, max_tokens=max_tokens) for text in texts]
+
+        parts = [_BATCH_COMPRESSION_HEADER.format(count=len(texts), max_tokens=max_tokens)]
+        for idx, text in enumerate(texts):
+            parts.append(f"\n[{idx}]:\n{text}\n")
+        compression_prompt = "".join(parts)
+
+        summaries: Dict[int, str] = {}
+        try:
+            compression_config = self.config.get('compression', {})
+            compression_model = compression_config.get('model', 'gemini/gemini-2.5-flash')
+
+            response = self.connector.call(
+                model=compression_model,
+                system="You are a semantic compression agent. Extract structured summaries from technical outputs.",
+                user=compression_prompt,
+                temperature=0.1,
+                max_tokens=max_tokens * len(texts),
+            )
+
+            if not response.error and response.text:
+                summaries = self._parse_batch_summaries(response.text, len(texts))
+        except Exception as e:
+            logger.warning(f"Batch semantic compression failed, falling back to truncation: {e}")
+
+        return [
+            summaries.get(idx) or self._intelligent_truncate(text, max_tokens * 4)  # 4 chars ≈ 1 token
+            for idx, text in enumerate(texts)
+        ]
+
+    @staticmethod
+    def _parse_batch_summaries(response_text: str, count: int) -> Dict[int, str]:
+        """
+        Parse the JSON array returned by a batch compression call.
+
+        Returns:
+            Dict of id -> summary JSON string (ids outside 0..count-1 are ignored)
+        """
+        start = response_text.find("[")
+        end = response_text.rfind("]")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            items = json.loads(response_text[start : end + 1])
+        except json.JSONDecodeError:
+            return {}
+
+        summaries: Dict[int, str] = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            idx = item.get("id")
+            summary = item.get("summary")
+            if isinstance(idx, int) and 0 <= idx < count and summary:
+                summaries[idx] = summary if isinstance(summary, str) else json.dumps(summary, indent=2)
+        return summaries
+
     def _intelligent_truncate(self, text: str, max_chars: int) -> str:
         """
         Fallback truncation that tries to end at sentence boundaries.
@@ -181,84 +642,57 @@ ORIGINAL OUTPUT TO SUMMARIZE:
         Returns:
             Formatted string of critical issues, or None if no critical issues found
         """
-        import re
-
         if not critique_text:
             return None
 
         # Load keywords from config
         refinement_config = self.config.get("refinement", {})
-        critical_keywords = refinement_config.get("critical_keywords", [
-            "CRITICAL", "ERROR", "BUG", "SECURITY", "VULNERABILITY",
-            "INCORRECT", "WRONG", "MISSING", "BROKEN", "FAILED"
-        ])
-
-        # Split into lines for analysis
-        lines = critique_text.split('\n')
-        critical_lines = []
-        issue_blocks = []
-        current_block = []
-        in_critical_section = False
-
-        for i, line in enumerate(lines):
-            line_upper = line.upper()
-
-            # Check if line contains critical keywords
-            has_critical = any(keyword in line_upper for keyword in critical_keywords)
-
-            # Check for issue patterns with severity
-            issue_pattern = re.match(r'^\s*(?:Issue|Problem)\s+\d+:', line, re.IGNORECASE)
-
-            if has_critical or issue_pattern:
-                in_critical_section = True
-                current_block = [line]
-            elif in_critical_section:
-                # Continue collecting lines for this issue block
-                if line.strip() and not line.startswith('**'):
-                    current_block.append(line)
-                else:
-                    # End of current block
-                    if current_block:
-                        issue_blocks.append('\n'.join(current_block))
-                        current_block = []
-                    in_critical_section = False
-
-        # Add last block if exists
-        if current_block:
-            issue_blocks.append('\n'.join(current_block))
-
-        # If no structured blocks found, fall back to line-by-line extraction
-        if not issue_blocks:
-            for line in lines:
-                line_upper = line.upper()
-                if any(keyword in line_upper for keyword in critical_keywords):
-                    critical_lines.append(line.strip())
-
-            if critical_lines:
-                return '\n'.join(critical_lines)
-            return None
+        critical_keywords = tuple(refinement_config.get("critical_keywords", _DEFAULT_CRITICAL_KEYWORDS))
 
-        # Format the extracted issues
-        if issue_blocks:
-            formatted = "CRITICAL ISSUES REQUIRING FIXES:\n\n"
-            for i, block in enumerate(issue_blocks, 1):
-                formatted += f"{i}. {block}\n\n"
-            return formatted.strip()
+        return _parse_critical_issues(critique_text, critical_keywords)
 
-        return None
+    def _critical_issue_limit(self, max_issues: int) -> Callable[[str], bool]:
+        """
+        Build a stop_when predicate for a streamed critic response.
 
-    def _check_convergence(self, current_issues: Optional[str], previous_issues: Optional[str]) -> tuple[bool, str]:
+        Counts lines that would start a critical issue block (keyword or
+        "Issue N:" header), scanning only lines completed since the last check,
+        and returns True once max_issues have arrived.
+        """
+        refinement_config = self.config.get("refinement", {})
+        critical_keywords = tuple(refinement_config.get("critical_keywords", _DEFAULT_CRITICAL_KEYWORDS))
+        keyword_re = _keyword_pattern(critical_keywords) if critical_keywords else None
+        state = {"offset": 0, "count": 0}
+
+        def reached_limit(text: str) -> bool:
+            end = text.rfind("\n")
+            for line in text[state["offset"]:end].split("\n"):
+                if _ISSUE_PATTERN.match(line) or (keyword_re is not None and keyword_re.search(line.upper())):
+                    state["count"] += 1
+            state["offset"] = end + 1
+            return state["count"] >= max_issues
+
+        return reached_limit
+
+    def _check_convergence(
+        self,
+        current_issues: Optional[str],
+        previous_issues: Optional[str],
+        allow_no_progress: bool = False,
+    ) -> tuple[bool, str]:
         """
         Check if refinement has converged (no more critical issues or no progress).
 
         Convergence criteria:
         1. No critical issues in current response (SUCCESS)
-        2. Same or more issues than previous iteration (NO PROGRESS)
-        3. Issue count decreased (PROGRESS - continue)
+        2. Identical issues to previous iteration (STUCK - always stop)
+        3. Same or more issues than previous iteration (NO PROGRESS, unless allow_no_progress)
+        4. Issue count decreased (PROGRESS - continue)
 
         Args:
             current_issues: Critical issues from current critic response
             previous_issues: Critical issues from previous critic response
+            allow_no_progress: Continue despite no progress (grace iteration)
 
         Returns:
             Tuple of (converged: bool, reason: str)
@@ -267,19 +701,23 @@ ORIGINAL OUTPUT TO SUMMARIZE:
         if current_issues is None:
             return (True, "No critical issues found - refinement successful")
 
-        # Case 2: First iteration - always continue
+        # First iteration - always continue
         if previous_issues is None:
             return (False, "First iteration - continuing refinement")
 
+        # Case 2: Critic repeated the same issues - another builder pass will not help
+        if _canonical_issue_set(current_issues) == _canonical_issue_set(previous_issues):
+            return (True, "Same issues as previous iteration - stopping")
+
         # Count issues in both responses (simple line count heuristic)
-        current_issue_count = len([line for line in current_issues.split('\n') if line.strip()])
-        previous_issue_count = len([line for line in previous_issues.split('\n') if line.strip()])
+        current_issue_count = _count_issue_lines(current_issues)
+        previous_issue_count = _count_issue_lines(previous_issues)
 
         # Case 3: More issues than before - CONVERGED (regression)
-        if current_issue_count >= previous_issue_count:
+        if current_issue_count >= previous_issue_count and not allow_no_progress:
             return (True, f"No progress detected ({previous_issue_count} → {current_issue_count} issues) - stopping")
 
-        # Case 4: Fewer issues - PROGRESS (continue)
+        # Case 4: Fewer issues (or grace iteration) - continue
         return (False, f"Progress detected ({previous_issue_count} → {current_issue_count} issues) - continuing")
 
     def _merge_critic_consensus(self, critic_results: List[tuple[str, str]]) -> str:
@@ -332,7 +770,9 @@ ORIGINAL OUTPUT TO SUMMARIZE:
 
         return '\n'.join(consensus_parts)
 
-    def _select_relevant_critics(self, prompt: str, builder_response: str) -> List[str]:
+    def _select_relevant_critics(
+        self, prompt: str, builder_response: str, _combined_lower: Optional[str] = None
+    ) -> List[str]:
         """
         Dynamically select relevant critics based on prompt content (v0.10.0).
 
@@ -343,6 +783,7 @@ ORIGINAL OUTPUT TO SUMMARIZE:
         Args:
             prompt: Original user prompt
             builder_response: Builder's output (for additional context)
+            _combined_lower: Pre-lowercased "prompt\nbuilder_response" (computed by caller to avoid a rescan)
 
         Returns:
             List of selected critic names (e.g., ["security-critic", "code-quality-critic"])
@@ -354,20 +795,26 @@ ORIGINAL OUTPUT TO SUMMARIZE:
             multi_critic_config = self.config.get("multi_critic", {})
             return multi_critic_config.get("critics", [])
 
+        # Short-circuit: a short prompt has too few keywords to discriminate, run the default critic set.
+        # Measured on the prompt alone: builder output is almost never short, so prompt + output would never trigger
+        min_text_len = dynamic_config.get("min_text_len", 0)
+        if len(prompt) < min_text_len:
+            self._critic_fast_path_hits += 1
+            logger.debug(
+                "Critic selection fast path (prompt %d chars < %d)", len(prompt), min_text_len,
+                extra={"event": "critic_fast_path", "fast_path_hits": self._critic_fast_path_hits},
+            )
+            return list(self.config.get("multi_critic", {}).get("critics", []))
+
         # Combine prompt and builder response for analysis
-        combined_text = f"{prompt}\n{builder_response}".lower()
+        combined_text = _combined_lower if _combined_lower is not None else f"{prompt}\n{builder_response}".lower()
 
-        # Score each critic based on keyword matches
-        keywords_config = dynamic_config.get("keywords", {})
+        # Score each critic based on keyword matches (keywords pre-lowercased in __init__)
         critic_scores = {}
 
-        for critic_name, keywords in keywords_config.items():
-            score = 0
-            for keyword in keywords:
-                keyword_lower = keyword.lower()
-                # Count occurrences (more mentions = higher relevance)
-                score += combined_text.count(keyword_lower)
-            critic_scores[critic_name] = score
+        for critic_name, keywords in self._critic_keywords.items():
+            # Count occurrences (more mentions = higher relevance)
+            critic_scores[critic_name] = sum(combined_text.count(keyword) for keyword in keywords)
 
         # Select critics with score > 0
         selected_critics = [critic for critic, score in critic_scores.items() if score > 0]
@@ -380,7 +827,10 @@ ORIGINAL OUTPUT TO SUMMARIZE:
         if len(selected_critics) == 0:
             fallback = dynamic_config.get("fallback_critics", ["code-quality-critic"])
             selected_critics = fallback
-            print(f"⚠️  No keywords matched - using fallback critics: {', '.join(fallback)}")
+            status_log.warning(
+                "No keywords matched - using fallback critics: %s", ", ".join(fallback),
+                extra={"event": "critic_fallback", "critics": fallback},
+            )
 
         # Enforce min_critics
         if len(selected_critics) < min_critics:
@@ -400,30 +850,44 @@ ORIGINAL OUTPUT TO SUMMARIZE:
             selected_critics = [c for c, _ in selected_with_scores[:max_critics]]
 
         # Log selection with scores
-        print(f"🎯 Dynamic critic selection (keyword-based):")
+        status_log.info("Dynamic critic selection (keyword-based):", extra={"event": "critic_selection"})
         for critic in selected_critics:
             score = critic_scores.get(critic, 0)
-            print(f"   ✓ {critic} (relevance score: {score})")
+            status_log.info(
+                "   + %s (relevance score: %s)", critic, score,
+                extra={"event": "critic_selected", "critic": critic, "score": score},
+            )
 
         skipped = [c for c in critic_scores.keys() if c not in selected_critics]
         if skipped:
-            print(f"   ✗ Skipped: {', '.join(skipped)} (not relevant)")
+            status_log.info(
+                "   - Skipped: %s (not relevant)", ", ".join(skipped),
+                extra={"event": "critic_skipped", "critics": skipped},
+            )
 
         return selected_critics
 
-    def _run_multi_critic(self, builder_response: str, original_prompt: str, session_id: Optional[str] = None) -> tuple[str, List[RunResult]]:
+    def _run_multi_critic(
+        self,
+        builder_response: str,
+        original_prompt: str,
+        session_id: Optional[str] = None,
+        mock_mode: Optional[bool] = None,
+        override_model: Optional[str] = None,
+    ) -> tuple[str, List[RunResult]]:
         """
         Run multiple specialized critics in parallel and merge consensus.
 
         Args:
             builder_response: The builder's output to critique
             original_prompt: Original user prompt for context
+            session_id: Optional session ID for conversation tracking
+            mock_mode: Optional mock mode override (passed to every critic)
+            override_model: Optional model override (passed to every critic)
 
         Returns:
             Tuple of (consensus_feedback, list of critic RunResults)
         """
-        import concurrent.futures
-
         # Load multi-critic config
         multi_critic_config = self.config.get("multi_critic", {})
         if not multi_critic_config.get("enabled", False):
@@ -432,55 +896,165 @@ ORIGINAL OUTPUT TO SUMMARIZE:
 
         # DYNAMIC CRITIC SELECTION (v0.10.0)
         # Select relevant critics based on prompt content
-        critic_names = self._select_relevant_critics(original_prompt, builder_response)
+        # Lowercase the builder output once for selection
+        combined_lower = f"{original_prompt}\n{builder_response}".lower()
+        critic_names = self._select_relevant_critics(
+            original_prompt, builder_response, _combined_lower=combined_lower
+        )
         parallel = multi_critic_config.get("parallel_execution", True)
 
-        print(f"🔍 Running {len(critic_names)} specialized critics in parallel...\n")
+        status_log.info(
+            "Running %d specialized critics in parallel...", len(critic_names),
+            extra={"event": "critics_start", "critics": critic_names},
+        )
 
-        # Prepare critic context
-        compression_threshold = 1200
-        response_text = builder_response
-        if len(response_text) > compression_threshold:
-            compressed = self._compress_semantic(response_text, max_tokens=500)
-            response_text = f"{compressed}\n\n[Note: Above is structured summary preserving all key decisions and specs]"
+        # Prepare critic context (specialized critics have no memory: standard threshold)
+        response_text = self._compress_previous_output(
+            builder_response, self._standard_compression_threshold, original_prompt
+        )
 
-        critic_context = f"Original request: {original_prompt}\n\nBuilder output:\n{response_text}\n\nYour task as critic:"
+        # Stable header first, builder output last: keeps the shared prefix cacheable by the provider
+        critic_context = "".join(
+            (_ORIG_HDR, original_prompt, _TASK_HDR, "critic:\n\nBuilder output:\n", response_text)
+        )
 
         # Run critics
         critic_results = []
         run_results = []
 
+        # Optional majority early-exit: once more than half of the critics report the same
+        # issue set (typically "no critical issues"), the remaining critics are never started
+        early_exit = multi_critic_config.get("early_exit", False) and len(critic_names) > 2
+        majority = len(critic_names) // 2 + 1
+        issue_set_counts: Counter = Counter()
+
+        def reached_majority(result: RunResult) -> bool:
+            if not early_exit:
+                return False
+            issues = self._extract_critical_issues(result.response)
+            issue_key = _canonical_issue_set(issues) if issues else frozenset()
+            issue_set_counts[issue_key] += 1
+            return issue_set_counts[issue_key] >= majority
+
+        completed: Dict[str, RunResult] = {}
+        not_started = list(critic_names)  # Popped as critics are submitted/run
+        stopped_early = False
+
+        def record(critic_name: str, result: RunResult) -> None:
+            completed[critic_name] = result
+            status_log.info(
+                "%s complete (%d tokens)", critic_name, result.total_tokens,
+                extra={"event": "critic_done", "critic": critic_name, "tokens": result.total_tokens},
+            )
+
         if parallel:
             # Parallel execution using ThreadPoolExecutor
-            with concurrent.futures.ThreadPoolExecutor(max_workers=len(critic_names)) as executor:
-                future_to_critic = {
-                    executor.submit(self.run, critic_name, critic_context): critic_name
-                    for critic_name in critic_names
-                }
-
-                for future in concurrent.futures.as_completed(future_to_critic):
-                    critic_name = future_to_critic[future]
-                    try:
-                        result = future.result()
-                        critic_results.append((critic_name, result.response))
-                        run_results.append(result)
-                        print(f"✅ {critic_name} complete ({result.total_tokens} tokens)")
-                    except Exception as e:
-                        print(f"❌ {critic_name} failed: {e}")
+            # Wall time is the slowest critic, not the sum of all of them. With early_exit only
+            # `majority` critics start up front and more start only when agreement fails, so
+            # skipped critics are never called (costs latency when critics disagree)
+            max_workers = majority if early_exit else len(critic_names)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                in_flight: Dict[concurrent.futures.Future, str] = {}
+
+                def submit_next() -> None:
+                    critic_name = not_started.pop(0)
+                    future = executor.submit(
+                        self.run,
+                        critic_name,
+                        critic_context,
+                        override_model=override_model,
+                        mock_mode=mock_mode,
+                        session_id=session_id,
+                    )
+                    in_flight[future] = critic_name
+
+                for _ in range(max_workers):
+                    submit_next()
+
+                while in_flight:
+                    done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        critic_name = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            status_log.error(
+                                "%s failed: %s", critic_name, e,
+                                extra={"event": "critic_failed", "critic": critic_name},
+                            )
+                        else:
+                            record(critic_name, result)
+                            if reached_majority(result) and not_started:
+                                stopped_early = True
+                    # Start another critic only if the running ones can no longer form a majority
+                    # on their own; critics already running are waited for (billed either way)
+                    while (
+                        not stopped_early
+                        and not_started
+                        and max(issue_set_counts.values(), default=0) + len(in_flight) < majority
+                    ):
+                        submit_next()
         else:
             # Sequential execution
-            for critic_name in critic_names:
-                print(f"🔍 Running {critic_name}...")
-                result = self.run(critic_name, critic_context, session_id=session_id)
+            while not_started and not stopped_early:
+                critic_name = not_started.pop(0)
+                status_log.info("Running %s...", critic_name, extra={"event": "critic_start", "critic": critic_name})
+                result = self.run(
+                    critic_name,
+                    critic_context,
+                    override_model=override_model,
+                    mock_mode=mock_mode,
+                    session_id=session_id,
+                )
+                record(critic_name, result)
+                if reached_majority(result) and not_started:
+                    stopped_early = True
+
+        if stopped_early:
+            status_log.info(
+                "   - Majority of critics agree; skipped: %s", ", ".join(not_started),
+                extra={
+                    "event": "critic_early_exit",
+                    "critics_skipped": list(not_started),
+                    "critic_call_rate": (len(critic_names) - len(not_started)) / len(critic_names),
+                },
+            )
+
+        # Keep selection order so consensus output does not depend on completion order
+        for critic_name in critic_names:
+            if critic_name in completed:
+                result = completed[critic_name]
                 critic_results.append((critic_name, result.response))
                 run_results.append(result)
-                print(f"✅ {critic_name} complete ({result.total_tokens} tokens)")
 
         # Merge consensus
         consensus = self._merge_critic_consensus(critic_results)
 
         return (consensus, run_results)
 
+    def _route_heuristic(self, prompt: str) -> Optional[str]:
+        """
+        Route by keyword match, without an LLM call.
+
+        Returns:
+            Agent name if one agent has at least min_matches distinct keyword
+            hits and strictly more than any other agent, else None (ambiguous)
+        """
+        if not self._route_patterns:
+            return None
+
+        match_counts = {
+            agent_name: len({match.lower() for match in pattern.findall(prompt)})
+            for agent_name, pattern in self._route_patterns.items()
+        }
+        ranked = sorted(match_counts.items(), key=lambda item: item[1], reverse=True)
+        best_agent, best_count = ranked[0]
+        runner_up_count = ranked[1][1] if len(ranked) > 1 else 0
+
+        if best_count >= self._route_min_matches and best_count > runner_up_count:
+            return best_agent
+        return None
+
     def route(self, prompt: str) -> str:
         """
         Route prompt to appropriate agent with fallback support.
@@ -495,6 +1069,24 @@ ORIGINAL OUTPUT TO SUMMARIZE:
         if not router_config:
             return "builder"  # Default fallback
 
+        # Fast path: unambiguous keyword match skips the routing round-trip
+        heuristic_agent = self._route_heuristic(prompt)
+        if heuristic_agent:
+            self._route_heuristic_hits += 1
+        else:
+            self._route_llm_calls += 1
+        total_routes = self._route_heuristic_hits + self._route_llm_calls
+        logger.info(
+            "Route via %s", "heuristic" if heuristic_agent else "LLM",
+            extra={
+                "event": "route",
+                "heuristic_hit": heuristic_agent is not None,
+                "heuristic_hit_rate": self._route_heuristic_hits / total_routes,
+            },
+        )
+        if heuristic_agent:
+            return heuristic_agent
+
         # Get fallback order for router
         fallback_order = router_config.get("fallback_order", [])
 
@@ -521,46 +1113,42 @@ ORIGINAL OUTPUT TO SUMMARIZE:
 
         return agent
 
-    def run(
+    def _prepare_run(
         self,
         agent: str,
         prompt: str,
-        override_model: Optional[str] = None,
-        mock_mode: Optional[bool] = None,
-        session_id: Optional[str] = None,
-    ) -> RunResult:
+        override_model: Optional[str],
+        mock_mode: Optional[bool],
+        session_id: Optional[str],
+    ) -> tuple[str, Dict[str, Any], Dict[str, Any], int, Dict[str, Any]]:
         """
-        Run agent with prompt and fallback support.
+        Resolve agent/model and build the system prompt (anchor + memory context).
 
-        Args:
-            agent: Agent name (auto, builder, critic, closer)
-            prompt: User prompt
-            override_model: Optional model override
-            mock_mode: Optional mock mode override (defaults to LLM_MOCK env var)
-            session_id: Optional session ID for conversation tracking (v0.11.0+)
+        Shared by run() and arun(); everything here is local or SQLite work.
 
         Returns:
-            RunResult with response and metadata
+            Tuple of (agent, agent settings, call_kwargs for connector.call/acall,
+            injected_context_tokens, context_metadata)
         """
         # Handle auto-routing
         if agent == "auto":
             agent = self.route(prompt)
 
         # Get agent config
-        agent_config = self.config["agents"].get(agent)
+        agent_config = self._agent_settings.get(agent)
         if not agent_config:
             raise ValueError(f"Unknown agent: {agent}")
 
         # Determine model to use
-        model = override_model if override_model else agent_config["model"]
+        model = override_model if override_model else agent_config.model
 
         # Get fallback order (only if not using override)
         fallback_order = None
         if not override_model:
-            fallback_order = agent_config.get("fallback_order", [])
+            fallback_order = list(agent_config.fallback_order)
 
         # Memory context injection (v0.11.0: Dual-context model)
-        system_prompt = agent_config["system"]
+        system_prompt = agent_config.system
         injected_context_tokens = 0
         context_metadata = {}
 
@@ -577,10 +1165,10 @@ ORIGINAL OUTPUT TO SUMMARIZE:
                     + system_prompt
                 )
 
-        if agent_config.get("memory_enabled", False):
+        if agent_config.memory_enabled:
             try:
                 # Get agent-specific memory config
-                agent_memory_config = agent_config.get("memory", {})
+                agent_memory_config = agent_config.memory
 
                 # Use ContextAggregator for dual-context retrieval
                 context_text, context_metadata = self.context_aggregator.get_full_context(
@@ -592,27 +1180,41 @@ ORIGINAL OUTPUT TO SUMMARIZE:
                 # Inject context if available
                 if context_text:
                     # Inject into system prompt
-                    system_prompt = f"{agent_config['system']}\n\n{context_text}"
+                    system_prompt = f"{agent_config.system}\n\n{context_text}"
 
                     # Total tokens from metadata
                     injected_context_tokens = context_metadata.get('total_context_tokens', 0)
             except Exception as e:
                 # If context aggregation fails, continue without context
                 # This ensures graceful degradation in test/development environments
-                import sys
                 print(f"⚠️  Context aggregation failed: {e}", file=sys.stderr)
 
-        # Call LLM with fallback support
-        llm_response: LLMResponse = self.connector.call(
-            model=model,
-            system=system_prompt,
-            user=prompt,
-            temperature=agent_config.get("temperature", 0.2),
-            max_tokens=agent_config.get("max_tokens", 1500),
-            fallback_order=fallback_order,
-            mock_mode=mock_mode,
-        )
+        call_kwargs = {
+            "model": model,
+            "system": system_prompt,
+            "user": prompt,
+            "temperature": agent_config.temperature,
+            "max_tokens": agent_config.max_tokens,
+            "fallback_order": fallback_order,
+            "mock_mode": mock_mode,
+        }
+        return agent, agent_config, call_kwargs, injected_context_tokens, context_metadata
+
+    def _finalize_run(
+        self,
+        agent: str,
+        agent_config: _AgentSettings,
+        prompt: str,
+        llm_response: LLMResponse,
+        session_id: Optional[str],
+        injected_context_tokens: int,
+        context_metadata: Dict[str, Any],
+    ) -> RunResult:
+        """
+        Write the conversation log, store to memory and build the RunResult.
 
+        Shared by run() and arun().
+        """
         # Create log record
         timestamp = datetime.now(timezone.utc).isoformat()
         log_record = {
@@ -630,6 +1232,9 @@ ORIGINAL OUTPUT TO SUMMARIZE:
             "injected_context_tokens": injected_context_tokens,
         }
 
+        if llm_response.time_to_first_token_ms is not None:
+            log_record["time_to_first_token_ms"] = llm_response.time_to_first_token_ms
+
         # Add fallback metadata if applicable
         if llm_response.original_model:
             log_record["original_model"] = llm_response.original_model
@@ -638,11 +1243,11 @@ ORIGINAL OUTPUT TO SUMMARIZE:
         else:
             log_record["fallback_used"] = False
 
-        # Write log
-        log_file = write_json(log_record)
+        # Write log in the background (disk I/O stays off the request path)
+        log_file = self._enqueue_log(log_record)
 
         # Auto-store conversation to memory (if agent has memory enabled)
-        if agent_config.get("memory_enabled", False) and not llm_response.error:
+        if agent_config.memory_enabled and not llm_response.error:
             try:
                 self.memory.store_conversation(
                     prompt=prompt,
@@ -651,6 +1256,7 @@ ORIGINAL OUTPUT TO SUMMARIZE:
                     model=llm_response.model,
                     provider=llm_response.provider,
                     session_id=session_id,  # v0.11.0: Pass session_id as parameter
+                    background=self._memory_write_behind,
                     metadata={
                         "duration_ms": llm_response.duration_ms,
                         "prompt_tokens": llm_response.prompt_tokens,
@@ -671,14 +1277,15 @@ ORIGINAL OUTPUT TO SUMMARIZE:
             except Exception as e:
                 # If memory storage fails, continue (graceful degradation)
                 # Log the error for debugging
-                import sys
                 print(f"⚠️  Memory storage failed: {e}", file=sys.stderr)
 
         # Create result
+        # Intern the small repeated identifiers: provider is re-split from the model name on every
+        # call, so without this each RunResult (and its log record) carries its own copy
         result = RunResult(
-            agent=agent,
-            model=llm_response.model,
-            provider=llm_response.provider,
+            agent=sys.intern(agent),
+            model=sys.intern(llm_response.model),
+            provider=sys.intern(llm_response.provider),
             prompt=prompt,
             response=llm_response.text,
             duration_ms=llm_response.duration_ms,
@@ -686,7 +1293,7 @@ ORIGINAL OUTPUT TO SUMMARIZE:
             completion_tokens=llm_response.completion_tokens,
             total_tokens=llm_response.total_tokens,
             timestamp=timestamp,
-            log_file=str(log_file.name),
+            log_file=log_file,
             error=llm_response.error,
             original_model=llm_response.original_model,
             fallback_reason=llm_response.fallback_reason,
@@ -696,6 +1303,138 @@ ORIGINAL OUTPUT TO SUMMARIZE:
 
         return result
 
+    def run(
+        self,
+        agent: str,
+        prompt: str,
+        override_model: Optional[str] = None,
+        mock_mode: Optional[bool] = None,
+        session_id: Optional[str] = None,
+    ) -> RunResult:
+        """
+        Run agent with prompt and fallback support.
+
+        Args:
+            agent: Agent name (auto, builder, critic, closer)
+            prompt: User prompt
+            override_model: Optional model override
+            mock_mode: Optional mock mode override (defaults to LLM_MOCK env var)
+            session_id: Optional session ID for conversation tracking (v0.11.0+)
+
+        Returns:
+            RunResult with response and metadata
+        """
+        agent, agent_config, call_kwargs, injected_context_tokens, context_metadata = self._prepare_run(
+            agent, prompt, override_model, mock_mode, session_id
+        )
+
+        # Call LLM with fallback support
+        llm_response: LLMResponse = self.connector.call(**call_kwargs)
+
+        return self._finalize_run(
+            agent, agent_config, prompt, llm_response, session_id, injected_context_tokens, context_metadata
+        )
+
+    def run_stream(
+        self,
+        agent: str,
+        prompt: str,
+        override_model: Optional[str] = None,
+        mock_mode: Optional[bool] = None,
+        session_id: Optional[str] = None,
+        stop_when: Optional[Callable[[str], bool]] = None,
+    ) -> Iterator[tuple[str, Optional[RunResult]]]:
+        """
+        Streaming variant of run(): yield output while the model generates it.
+
+        Args:
+            Same as run(), plus:
+            stop_when: Optional predicate on the text so far (see LLMConnector.stream);
+                returning True stops generation early
+
+        Yields:
+            Tuples of (text delta, None), then ("", RunResult) once the response
+            is complete (logged and stored exactly like run())
+        """
+        agent, agent_config, call_kwargs, injected_context_tokens, context_metadata = self._prepare_run(
+            agent, prompt, override_model, mock_mode, session_id
+        )
+
+        llm_response: Optional[LLMResponse] = None
+        for delta, final in self.connector.stream(**call_kwargs, stop_when=stop_when):
+            if final is None:
+                yield delta, None
+            else:
+                llm_response = final
+
+        yield "", self._finalize_run(
+            agent, agent_config, prompt, llm_response, session_id, injected_context_tokens, context_metadata
+        )
+
+    def _run_critic(
+        self,
+        prompt: str,
+        mock_mode: Optional[bool] = None,
+        session_id: Optional[str] = None,
+        override_model: Optional[str] = None,
+    ) -> RunResult:
+        """
+        Run the single critic for chain().
+
+        With refinement.critic_stop_after_issues > 0 the critic is streamed and
+        stopped once that many critical issues have arrived: refinement only
+        needs the issues, so the rest of the critique is not generated.
+        """
+        max_issues = self.config.get("refinement", {}).get("critic_stop_after_issues", 0)
+        if max_issues <= 0:
+            return self.run(
+                agent="critic", prompt=prompt, mock_mode=mock_mode, session_id=session_id, override_model=override_model
+            )
+
+        result = None
+        for _, result in self.run_stream(
+            agent="critic",
+            prompt=prompt,
+            override_model=override_model,
+            mock_mode=mock_mode,
+            session_id=session_id,
+            stop_when=self._critical_issue_limit(max_issues),
+        ):
+            pass
+        return result
+
+    async def arun(
+        self,
+        agent: str,
+        prompt: str,
+        override_model: Optional[str] = None,
+        mock_mode: Optional[bool] = None,
+        session_id: Optional[str] = None,
+    ) -> RunResult:
+        """
+        Async variant of run(): awaits the LLM round-trip instead of blocking.
+
+        Context retrieval and log/memory writes are local I/O and run in a
+        worker thread; the provider call itself uses LLMConnector.acall so
+        several arun() calls can overlap their network latency.
+
+        Args:
+            Same as run()
+
+        Returns:
+            RunResult with response and metadata
+        """
+        agent, agent_config, call_kwargs, injected_context_tokens, context_metadata = await asyncio.to_thread(
+            self._prepare_run, agent, prompt, override_model, mock_mode, session_id
+        )
+
+        llm_response: LLMResponse = await self.connector.acall(**call_kwargs)
+
+        return await asyncio.to_thread(
+            self._finalize_run,
+            agent, agent_config, prompt, llm_response, session_id, injected_context_tokens, context_metadata,
+        )
+
     def chain(
         self,
         prompt: str,
@@ -740,47 +1479,61 @@ ORIGINAL OUTPUT TO SUMMARIZE:
 
             # For stages after the first, add context from previous
             if i > 0:
-                agent_cfg = self.config["agents"].get(agent, {})
-                has_memory = agent_cfg.get("memory_enabled", False)
+                agent_settings = self._agent_settings.get(agent)
 
                 # Special handling for closer: needs ALL previous stages
                 if agent == "closer":
-                    # Closer sees full conversation history for synthesis
-                    context = f"Original request: {prompt}\n\n"
+                    # Closer sees full conversation history for synthesis.
+                    # Request + task header go first so the prefix is identical across runs of this prompt.
+                    context_parts = [_ORIG_HDR, prompt, _TASK_HDR, agent, _CLOSER_TASK]
+
+                    # Use semantic compression for long outputs, batched into one call
+                    compression_threshold = self._closer_compression_threshold
+                    response_texts = [self._precompress(prev.response, compression_threshold) for prev in results]
+                    long_indices = [
+                        idx for idx, text in enumerate(response_texts) if len(text) > compression_threshold
+                    ]
+                    compressed_by_index = dict(
+                        zip(
+                            long_indices,
+                            self._compress_for_context(
+                                [response_texts[idx] for idx in long_indices],
+                                query=prompt,
+                                max_tokens=500,
+                                max_chars=compression_threshold,
+                            ),
+                        )
+                    )
 
-                    for prev in results:
-                        # Use semantic compression for long outputs
-                        compression_threshold = 1500
-                        response_text = prev.response
+                    for idx, prev in enumerate(results):
+                        response_text = response_texts[idx]
 
-                        if len(response_text) > compression_threshold:
+                        if idx in compressed_by_index:
                             # Semantic compression preserves meaning while reducing tokens
-                            compressed = self._compress_semantic(response_text, max_tokens=500)
-                            response_text = f"{compressed}\n\n[Note: Above is structured summary. Full output: {len(response_text)} chars]"
+                            compressed = compressed_by_index[idx]
+                            response_text = f"{compressed}\n\n[Note: Above is {self._compression_note()}. Full output: {len(prev.response)} chars]"
 
-                        context += f"=== {prev.agent.upper()} OUTPUT ===\n{response_text}\n\n"
+                        context_parts.extend(("=== ", prev.agent.upper(), " OUTPUT ===\n", response_text, "\n\n"))
 
-                    context += f"Your task as {agent}: Synthesize all above outputs into a coherent final plan."
+                    context = "".join(context_parts)
 
                 else:
                     # Standard sequential: critic sees builder, etc.
                     prev_result = results[-1]
 
-                    # Semantic compression threshold
+                    # Semantic compression threshold (compression.threshold_chars)
                     # Memory-enabled agents: 800 chars (they have historical context)
                     # Non-memory agents: 1200 chars (need more immediate context)
-                    compression_threshold = 1200 if not has_memory else 800
-
-                    response_text = prev_result.response
-
-                    if len(response_text) > compression_threshold:
-                        # Use semantic compression to preserve all key information
-                        compressed = self._compress_semantic(response_text, max_tokens=500)
-                        response_text = f"{compressed}\n\n[Note: Above is structured summary preserving all key decisions and specs]"
+                    compression_threshold = (
+                        agent_settings.compression_threshold if agent_settings else self._standard_compression_threshold
+                    )
 
-                    summary = f"Previous {prev_result.agent} output:\n{response_text}"
-                    context = (
-                        f"Original request: {prompt}\n\n{summary}\n\nYour task as {agent}:"
+                    context = self._build_agent_context(
+                        agent=agent,
+                        original_prompt=prompt,
+                        previous_label=f"{prev_result.agent} output",
+                        previous_response=prev_result.response,
+                        threshold=compression_threshold,
                     )
 
             # MULTI-CRITIC EXECUTION: Replace single critic with parallel multi-critic consensus
@@ -792,7 +1545,13 @@ ORIGINAL OUTPUT TO SUMMARIZE:
                     builder_result = results[-1] if results else None
                     if builder_result and builder_result.agent == "builder":
                         # Run multi-critic consensus
-                        consensus, critic_run_results = self._run_multi_critic(builder_result.response, prompt, session_id=session_id)
+                        consensus, critic_run_results = self._run_multi_critic(
+                            builder_result.response,
+                            prompt,
+                            session_id=session_id,
+                            mock_mode=mock_mode,
+                            override_model=override_model,
+                        )
 
                         # Create synthetic result for consensus (for compatibility with existing flow)
                         # Use the first critic's metadata but with consensus response
@@ -804,7 +1563,8 @@ ORIGINAL OUTPUT TO SUMMARIZE:
                                 provider="multi",
                                 prompt=context,
                                 response=consensus,
-                                duration_ms=sum(r.duration_ms for r in critic_run_results),
+                                # Critics run concurrently: wall-clock is the slowest one
+                                duration_ms=max(r.duration_ms for r in critic_run_results),
                                 prompt_tokens=sum(r.prompt_tokens for r in critic_run_results),
                                 completion_tokens=sum(r.completion_tokens for r in critic_run_results),
                                 total_tokens=sum(r.total_tokens for r in critic_run_results),
@@ -815,13 +1575,13 @@ ORIGINAL OUTPUT TO SUMMARIZE:
                             results.extend(critic_run_results)
                         else:
                             # Fallback to single critic if multi-critic failed
-                            result = self.run(agent=agent, prompt=context, mock_mode=mock_mode, session_id=session_id, override_model=override_model)
+                            result = self._run_critic(context, mock_mode=mock_mode, session_id=session_id, override_model=override_model)
                     else:
                         # No builder result, use single critic
-                        result = self.run(agent=agent, prompt=context, mock_mode=mock_mode, session_id=session_id, override_model=override_model)
+                        result = self._run_critic(context, mock_mode=mock_mode, session_id=session_id, override_model=override_model)
                 else:
                     # Multi-critic disabled, use single critic
-                    result = self.run(agent=agent, prompt=context, mock_mode=mock_mode, session_id=session_id, override_model=override_model)
+                    result = self._run_critic(context, mock_mode=mock_mode, session_id=session_id, override_model=override_model)
             else:
                 # Non-critic agents use standard execution
                 result = self.run(agent=agent, prompt=context, mock_mode=mock_mode, session_id=session_id, override_model=override_model)
@@ -842,97 +1602,134 @@ ORIGINAL OUTPUT TO SUMMARIZE:
                         MAX_REFINEMENT_ITERATIONS,
                     )
 
+                    # No-progress iterations tolerated before stopping (identical issues always stop)
+                    grace_iterations = refinement_config.get("grace_iterations", 0)
+
                     # Track iterations
                     iteration = 1
-                    previous_issues = None
                     converged = False
-                    convergence_reason = ""
-
-                    print(f"\n🔄 Critical issues detected! Starting multi-iteration refinement (max {max_iterations} iterations)...\n")
-
-                    while iteration <= max_iterations and not converged:
-                        # Check convergence
-                        if iteration > 1:  # Skip convergence check on first iteration
-                            converged, convergence_reason = self._check_convergence(critical_issues, previous_issues)
-
-                            if converged:
-                                print(f"✅ Convergence achieved after {iteration-1} iteration(s): {convergence_reason}\n")
-                                break
-
-                        # Store current issues for next iteration
-                        previous_issues = critical_issues
-
-                        # Find the most recent builder result
-                        builder_index = -2 if iteration == 1 else -1  # First iteration: before critic, later: last result
-                        if len(results) >= 2:
-                            # Create refinement prompt for builder
-                            refine_prompt = f"""Original request: {prompt}
-
-Your previous solution had the following CRITICAL ISSUES identified by the critic (iteration {iteration}):
-
-{critical_issues}
-
-Please provide an IMPROVED version of your solution that addresses these critical issues.
-Focus on:
-1. Fixing technical errors
-2. Addressing security concerns
-3. Resolving missing components
-4. Correcting incorrect implementations
-
-Provide a complete, refined solution."""
-
-                            # Report progress if callback provided
-                            builder_label = f"builder-v{iteration+1}"
-                            if progress_callback:
-                                progress_callback(len(results) + 1, len(stages) + iteration, builder_label)
 
-                            print(f"🔄 Iteration {iteration}/{max_iterations}: Running {builder_label}...")
-
-                            # Run builder again with refinement prompt
-                            refined_result = self.run(agent="builder", prompt=refine_prompt, session_id=session_id, override_model=override_model)
-                            results.append(refined_result)
-
-                            print(f"✅ {builder_label} complete ({refined_result.total_tokens} tokens)\n")
-
-                            # Re-run critic on the refined builder output
-                            critic_label = f"critic-v{iteration+1}"
+                    status_log.info(
+                        "Critical issues detected - starting multi-iteration refinement (max %d iterations)",
+                        max_iterations, extra={"event": "refinement_start", "max_iterations": max_iterations},
+                    )
 
-                            # Get compression threshold for critic
-                            critic_cfg = self.config["agents"].get("critic", {})
-                            has_critic_memory = critic_cfg.get("memory_enabled", False)
-                            compression_threshold = 1200 if not has_critic_memory else 800
+                    while iteration <= max_iterations and len(results) >= 2:
+                        # Create refinement prompt for builder
+                        # Fixed instructions first; only the per-iteration issues vary at the tail
+                        refine_prompt = _REFINE_TEMPLATE.format(
+                            prompt=prompt, iteration=iteration, issues=critical_issues
+                        )
+
+                        # Report progress if callback provided
+                        builder_label = f"builder-v{iteration+1}"
+                        if progress_callback:
+                            progress_callback(len(results) + 1, len(stages) + iteration, builder_label)
+
+                        status_log.info(
+                            "Iteration %d/%d: running %s", iteration, max_iterations, builder_label,
+                            extra={"event": "refinement_stage", "iteration": iteration, "stage": builder_label},
+                        )
+
+                        # Run builder again with refinement prompt
+                        refined_result = self.run(agent="builder", prompt=refine_prompt, session_id=session_id, override_model=override_model)
+                        results.append(refined_result)
+
+                        status_log.info(
+                            "%s complete (%d tokens)", builder_label, refined_result.total_tokens,
+                            extra={"event": "refinement_stage_done", "stage": builder_label, "tokens": refined_result.total_tokens},
+                        )
+
+                        # Re-run critic on the refined builder output
+                        critic_label = f"critic-v{iteration+1}"
+
+                        # Compression threshold for critic (memory-aware, resolved at init)
+                        critic_context = self._build_agent_context(
+                            agent="critic",
+                            original_prompt=prompt,
+                            previous_label=f"builder output (iteration {iteration + 1})",
+                            previous_response=refined_result.response,
+                            threshold=self._agent_settings["critic"].compression_threshold,
+                        )
+
+                        if progress_callback:
+                            progress_callback(len(results) + 1, len(stages) + iteration, critic_label)
+
+                        status_log.info(
+                            "Iteration %d/%d: running %s", iteration, max_iterations, critic_label,
+                            extra={"event": "refinement_stage", "iteration": iteration, "stage": critic_label},
+                        )
+
+                        # Run critic on refined output
+                        critic_result = self._run_critic(critic_context, session_id=session_id, override_model=override_model)
+                        results.append(critic_result)
+
+                        # Extract issues from new critic response
+                        new_issues = self._extract_critical_issues(critic_result.response)
+
+                        if not new_issues:
+                            status_log.info(
+                                "%s found no critical issues - refinement successful (%d tokens)",
+                                critic_label, critic_result.total_tokens,
+                                extra={"event": "refinement_done", "stage": critic_label, "tokens": critic_result.total_tokens},
+                            )
+                            converged = True
+                            break
+
+                        status_log.warning(
+                            "%s found critical issues (%d tokens)", critic_label, critic_result.total_tokens,
+                            extra={"event": "refinement_issues", "stage": critic_label, "tokens": critic_result.total_tokens},
+                        )
+
+                        # Check convergence right away: a stuck critic should not cost another builder+critic pair
+                        converged, convergence_reason = self._check_convergence(
+                            new_issues, critical_issues, allow_no_progress=iteration <= grace_iterations
+                        )
+                        critical_issues = new_issues
+
+                        if converged:
+                            status_log.info(
+                                "Convergence achieved after %d iteration(s): %s", iteration, convergence_reason,
+                                extra={"event": "refinement_converged", "iteration": iteration},
+                            )
+                            break
 
-                            response_text = refined_result.response
-                            if len(response_text) > compression_threshold:
-                                compressed = self._compress_semantic(response_text, max_tokens=500)
-                                response_text = f"{compressed}\n\n[Note: Above is structured summary preserving all key decisions and specs]"
+                        iteration += 1
 
-                            critic_context = f"Original request: {prompt}\n\nPrevious builder output (iteration {iteration+1}):\n{response_text}\n\nYour task as critic:"
+                    # Final convergence message
+                    if iteration > max_iterations and not converged:
+                        status_log.info(
+                            "Max iterations (%d) reached - stopping refinement", max_iterations,
+                            extra={"event": "refinement_max_iterations", "max_iterations": max_iterations},
+                        )
 
-                            if progress_callback:
-                                progress_callback(len(results) + 1, len(stages) + iteration, critic_label)
+        return results
 
-                            print(f"🔄 Iteration {iteration}/{max_iterations}: Running {critic_label}...")
+    async def achain(self, prompt: str, **kwargs) -> List[RunResult]:
+        """
+        Async wrapper around chain() for use from an event loop.
 
-                            # Run critic on refined output
-                            critic_result = self.run(agent="critic", prompt=critic_context, session_id=session_id, override_model=override_model)
-                            results.append(critic_result)
+        Stages stay sequential (each depends on the previous output), so the
+        chain runs in a worker thread rather than blocking the loop.
 
-                            # Extract issues from new critic response
-                            critical_issues = self._extract_critical_issues(critic_result.response)
+        Args:
+            prompt: Initial user prompt
+            **kwargs: Passed through to chain()
 
-                            if critical_issues:
-                                print(f"⚠️  {critic_label} found critical issues ({critic_result.total_tokens} tokens)\n")
-                            else:
-                                print(f"✅ {critic_label} found no critical issues - refinement successful! ({critic_result.total_tokens} tokens)\n")
-                                converged = True
-                                convergence_reason = "No critical issues found"
-                                break
+        Returns:
+            List of RunResults from each stage
+        """
+        return await asyncio.to_thread(self.chain, prompt, **kwargs)
 
-                            iteration += 1
+    async def achain_many(self, prompts: List[str], **kwargs) -> List[List[RunResult]]:
+        """
+        Run independent chains concurrently.
 
-                    # Final convergence message
-                    if iteration > max_iterations and not converged:
-                        print(f"⏹️  Max iterations ({max_iterations}) reached - stopping refinement\n")
+        Args:
+            prompts: Independent user prompts (one chain each)
+            **kwargs: Passed through to chain() for every prompt
 
-        return results
+        Returns:
+            List of chain results, in the same order as prompts
+        """
+        return list(await asyncio.gather(*(self.achain(prompt, **kwargs) for prompt in prompts)))
@@ -0,0 +1,139 @@
+"""Extractive prompt compression ranked by BM25 relevance to a query (no LLM call)."""
+
+import math
+import re
+from collections import Counter
+from typing import List
+
+# BM25 Okapi parameters (standard defaults)
+_K1 = 1.5
+_B = 0.75
+
+_CHARS_PER_TOKEN = 4  # Same heuristic as the runtime's truncation fallback
+
+_TOKEN_RE = re.compile(r"\w+")
+_PARAGRAPH_RE = re.compile(r"\n[ \t]*\n")
+_CODE_FENCE_RE = re.compile(r"(```[^\n]*\n.*?```)", re.DOTALL)
+# Top-level definitions: code is split here so functions/classes stay intact
+_CODE_BOUNDARY_RE = re.compile(r"^(?=(?:async[ \t]+)?def |class )", re.MULTILINE)
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def _split_code_block(block: str) -> List[str]:
+    """Split a fenced code block on top-level def/class, re-fencing each piece."""
+    header, _, rest = block.partition("\n")
+    body = rest[: -len("```")].rstrip("\n")
+    pieces = [
+        piece.strip("\n") for piece in _CODE_BOUNDARY_RE.split(body) if piece.strip()
+    ]
+    if len(pieces) <= 1:
+        return [block]
+    return [f"{header}\n{piece}\n```" for piece in pieces]
+
+
+def split_passages(text: str) -> List[str]:
+    """
+    Split text into rankable passages.
+
+    Prose is split on blank lines; fenced code blocks are kept whole or split
+    on top-level def/class boundaries, never inside a function.
+    """
+    passages: List[str] = []
+    for idx, segment in enumerate(_CODE_FENCE_RE.split(text)):
+        if idx % 2:
+            passages.extend(_split_code_block(segment))
+        else:
+            passages.extend(
+                p.strip("\n") for p in _PARAGRAPH_RE.split(segment) if p.strip()
+            )
+    return passages
+
+
+def bm25_scores(passages: List[str], query: str) -> List[float]:
+    """Score each passage against query with BM25 Okapi."""
+    docs = [_tokenize(passage) for passage in passages]
+    query_terms = set(_tokenize(query))
+    if not docs or not query_terms:
+        return [0.0] * len(passages)
+
+    doc_count = len(docs)
+    avg_len = sum(len(doc) for doc in docs) / doc_count or 1.0
+    doc_freq = Counter(term for doc in docs for term in set(doc) if term in query_terms)
+
+    scores = []
+    for doc in docs:
+        term_freq = Counter(doc)
+        length_norm = _K1 * (1 - _B + _B * len(doc) / avg_len)
+        score = 0.0
+        for term in query_terms:
+            tf = term_freq.get(term, 0)
+            if not tf:
+                continue
+            df = doc_freq[term]
+            idf = math.log((doc_count - df + 0.5) / (df + 0.5) + 1)
+            score += idf * tf * (_K1 + 1) / (tf + length_norm)
+        scores.append(score)
+    return scores
+
+
+def _truncate_lines(passage: str, max_chars: int) -> str:
+    """Keep whole lines (indentation intact) up to max_chars."""
+    kept = []
+    used = 0
+    for line in passage.split("\n"):
+        if used + len(line) + 1 > max_chars:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    return "\n".join(kept)
+
+
+def bm25_compress(text: str, query: str, token_budget: int) -> str:
+    """
+    Extract the passages of text most relevant to query within a token budget.
+
+    Passages are ranked by BM25 score against the query and added greedily
+    (highest first) until the budget is spent; the first passage that does not
+    fit is cut at a line boundary. Selected passages are emitted in their
+    original order so the extract still reads top to bottom.
+
+    Args:
+        text: Text to compress (e.g. previous agent output)
+        query: Relevance query (e.g. the original user request)
+        token_budget: Approximate token budget for the result
+
+    Returns:
+        Extractive summary (text unchanged if it already fits)
+    """
+    if _estimate_tokens(text) <= token_budget:
+        return text
+
+    passages = split_passages(text)
+    scores = bm25_scores(passages, query)
+    # Highest score first; ties keep document order (earlier passages usually frame the answer)
+    ranked = sorted(range(len(passages)), key=lambda idx: (-scores[idx], idx))
+
+    remaining = token_budget
+    selected = {}
+    for idx in ranked:
+        cost = _estimate_tokens(passages[idx])
+        if cost <= remaining:
+            selected[idx] = passages[idx]
+            remaining -= cost
+            continue
+        partial = _truncate_lines(passages[idx], remaining * _CHARS_PER_TOKEN)
+        if partial.startswith("```"):
+            # Re-close a cut code block (drop it if only the fence line survived)
+            partial = f"{partial}\n```" if "\n" in partial else ""
+        if partial.strip():
+            selected[idx] = partial
+        break
+
+    return "\n\n".join(selected[idx] for idx in sorted(selected))
@@ -0,0 +1,66 @@
+"""Rule-based text pre-compression (no LLM call)."""
+
+import re
+
+# Applied in order to prose only (fenced code blocks are left untouched).
+# Kept conservative: drop filler/politeness/hedging and wordy phrases, never content words.
+_RULES = [
+    # Chatty openers and sign-offs
+    (r"^(?:sure|certainly|of course|absolutely|great question)[!,.]+[ \t]*", ""),
+    (r"^[^\n]*\b(?:let me know if|hope this helps|feel free to ask)\b[^\n]*$", ""),
+    # Politeness and hedging
+    (r"\b(?:please|kindly)[ \t]+", ""),
+    (r"\bI (?:think|believe|feel)(?: that)?[ \t]+", ""),
+    (r"\bit (?:seems|appears)(?: like| that)?[ \t]+", ""),
+    (
+        r"\b(?:basically|essentially|actually|really|quite|simply|obviously|definitely|certainly)[ \t]+",
+        "",
+    ),
+    # Wordy phrases
+    (r"\bin order to\b", "to"),
+    (r"\bdue to the fact that\b", "because"),
+    (r"\bat this point in time\b", "now"),
+    (r"\bfor the purpose of\b", "for"),
+    (r"\bin the event that\b", "if"),
+    (r"\ba large number of\b", "many"),
+    (r"\bis able to\b", "can"),
+    # Markdown horizontal rules
+    (r"^[ \t]*(?:-{3,}|\*{3,}|_{3,})[ \t]*$", ""),
+    # Whitespace: inner runs (keeps indentation), trailing spaces, blank-line runs
+    (r"(?<=\S)[ \t]{2,}", " "),
+    (r"[ \t]+$", ""),
+    (r"\n{3,}", "\n\n"),
+]
+
+_COMPILED_RULES = [
+    (re.compile(pattern, re.IGNORECASE | re.MULTILINE), replacement)
+    for pattern, replacement in _RULES
+]
+
+_CODE_FENCE = re.compile(r"(```.*?```)", re.DOTALL)
+
+
+def _compress_prose(text: str) -> str:
+    for pattern, replacement in _COMPILED_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def compress(text: str) -> str:
+    """
+    Shorten text with deterministic rewrite rules.
+
+    Removes filler, politeness and hedging words, rewrites wordy phrases and
+    normalizes whitespace. Fenced code blocks are preserved verbatim.
+
+    Args:
+        text: Text to compress (typically an agent response)
+
+    Returns:
+        Compressed text
+    """
+    # Odd indices are fenced code blocks (captured by the split group)
+    segments = _CODE_FENCE.split(text)
+    for idx in range(0, len(segments), 2):
+        segments[idx] = _compress_prose(segments[idx])
+    return "".join(segments).strip()
@@ -11,15 +11,27 @@ Features:
 - Smart truncation (preserves important content)
 """
 
+import functools
+import heapq
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
-from config.settings import count_tokens
+from config.settings import count_tokens_batch, truncate_to_tokens
 from core.memory_engine import MemoryEngine
 
 logger = logging.getLogger(__name__)
 
+# Long-lived workers for knowledge lookups, so their thread-local SQLite connections are reused
+_LOOKUP_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="context-lookup")
+
+
+def _snippet(text: str, max_chars: int) -> str:
+    """First max_chars of text plus "..." if cut (short text is returned as-is, uncopied)."""
+    return text if len(text) <= max_chars else text[:max_chars] + "..."
+
 
 class ContextAggregator:
     """
@@ -67,49 +79,69 @@ class ContextAggregator:
             'knowledge_messages': 0
         }
 
-        # 1. SESSION CONTEXT (recent conversation in this session)
+        max_tokens = config.get('max_context_tokens', 600)
+
         session_config = config.get('session_context', {})
-        if session_id and session_config.get('enabled', True):
+        knowledge_config = config.get('knowledge_context', {})
+        want_session = bool(session_id and session_config.get('enabled', True))
+        want_knowledge = knowledge_config.get('enabled', True)
+
+        # The two lookups are independent SQLite reads: when both are needed,
+        # run the knowledge one on a worker while this thread reads the session
+        knowledge_future = None
+        if want_session and want_knowledge:
+            knowledge_future = _LOOKUP_EXECUTOR.submit(
+                self._get_knowledge_conversations,
+                prompt=prompt,
+                exclude_session_id=session_id,
+                config=knowledge_config
+            )
+
+        # 1. SESSION CONTEXT (recent conversation in this session)
+        if want_session:
             session_conv = self._get_session_conversations(
                 session_id=session_id,
                 limit=session_config.get('limit', 5)
             )
 
             if session_conv:
-                session_text = self._format_session_context(session_conv)
-                session_tokens = count_tokens(session_text)
-
+                text, tokens, count = self._format_session_context(
+                    session_conv, max_tokens=int(max_tokens * 0.75)
+                )
                 contexts.append({
                     'type': 'session',
-                    'text': session_text,
-                    'tokens': session_tokens,
+                    'text': text,
+                    'tokens': tokens,
                     'priority': 1,  # Highest priority
-                    'count': len(session_conv)
+                    'count': count
                 })
 
         # 2. KNOWLEDGE CONTEXT (semantic search, exclude current session)
-        knowledge_config = config.get('knowledge_context', {})
-        if knowledge_config.get('enabled', True):
-            knowledge_conv = self._get_knowledge_conversations(
-                prompt=prompt,
-                exclude_session_id=session_id,
-                config=knowledge_config
-            )
+        if want_knowledge:
+            if knowledge_future is not None:
+                knowledge_conv = knowledge_future.result()
+            else:
+                knowledge_conv = self._get_knowledge_conversations(
+                    prompt=prompt,
+                    exclude_session_id=session_id,
+                    config=knowledge_config
+                )
 
             if knowledge_conv:
-                knowledge_text = self._format_knowledge_context(knowledge_conv)
-                knowledge_tokens = count_tokens(knowledge_text)
-
+                text, tokens, count = self._format_knowledge_context(
+                    knowledge_conv,
+                    max_tokens=max_tokens - sum(ctx['tokens'] for ctx in contexts),
+                )
                 contexts.append({
                     'type': 'knowledge',
-                    'text': knowledge_text,
-                    'tokens': knowledge_tokens,
+                    'text': text,
+                    'tokens': tokens,
                     'priority': 2,  # Lower priority
-                    'count': len(knowledge_conv)
+                    'count': count
                 })
 
         # 3. TOKEN BUDGET ENFORCEMENT (Flexible allocation with priority)
-        max_tokens = config.get('max_context_tokens', 600)
+        # Blocks were already built to fit; this only truncates a single oversized message
         selected = self._apply_token_budget_with_priority(contexts, max_tokens)
 
         # 4. FORMAT FINAL CONTEXT
@@ -169,62 +201,59 @@ class ContextAggregator:
         Returns:
             List of conversation dicts with scores
         """
-        # Use memory engine's existing search API
-        # For now, get recent conversations and manually filter by session
-        # This is a simplified approach - full semantic search would require
-        # accessing the embedding search functionality
+        if not self.memory.enabled:
+            return []
 
         try:
-            # Get recent conversations (last 50)
-            recent = self.memory.get_recent_conversations(limit=50)
+            # Most recent 50 conversations outside the current session, filtered in SQL
+            recent = self.memory.backend.query_candidates(
+                exclude_session_id=exclude_session_id,
+                limit=50,
+            )
+
+            # Simple relevance based on keyword overlap with the prompt
+            prompt_words = set(prompt.lower().split())
+            prompt_word_count = max(len(prompt_words), 1)
 
-            # Filter out current session
             filtered = []
             for conv in recent:
-                if exclude_session_id and conv.get('session_id') == exclude_session_id:
-                    continue
-                # Simple relevance based on keyword match
-                prompt_lower = prompt.lower()
-                conv_prompt_lower = conv.get('prompt', '').lower()
-
-                # Basic keyword overlap
-                prompt_words = set(prompt_lower.split())
-                conv_words = set(conv_prompt_lower.split())
-                overlap = len(prompt_words & conv_words) / max(len(prompt_words), 1)
+                conv_words = set(conv.get('prompt', '').lower().split())
+                overlap = len(prompt_words & conv_words) / prompt_word_count
 
                 if overlap > 0.1:  # At least 10% overlap
                     conv['_score'] = overlap
                     filtered.append(conv)
 
-            # Sort by score
-            filtered.sort(key=lambda x: x.get('_score', 0), reverse=True)
-
             # Check if we found any relevant conversations
             if not filtered:
                 logger.info(f"No knowledge conversations found above threshold 0.1 for prompt: '{prompt[:50]}...'")
 
                 # Fallback: return top 1 most recent conversation (regardless of score)
-                if recent and len(recent) > 0:
-                    # Filter out current session
-                    fallback_candidates = [conv for conv in recent if not (exclude_session_id and conv.get('session_id') == exclude_session_id)]
+                if recent:
+                    fallback = recent[0]
+                    fallback['_score'] = 0.05  # Low score to indicate fallback
+                    logger.info(f"Using fallback: most recent conversation (id={fallback.get('id')})")
+                    return [fallback]
 
-                    if fallback_candidates:
-                        fallback = fallback_candidates[0]
-                        fallback['_score'] = 0.05  # Low score to indicate fallback
-                        logger.info(f"Using fallback: most recent conversation (id={fallback.get('id')})")
-                        return [fallback]
-
-            return filtered[:10]
+            # Top 10 by score (partial sort; ties keep most-recent-first order)
+            return heapq.nlargest(10, filtered, key=lambda x: x['_score'])
 
         except Exception as e:
             # Graceful degradation - return empty list
             logger.warning(f"Failed to retrieve knowledge conversations: {e}")
             return []
 
-    def _format_session_context(self, conversations: List[Dict[str, Any]]) -> str:
+    def _format_session_context(
+        self,
+        conversations: List[Dict[str, Any]],
+        max_tokens: int
+    ) -> tuple[str, int, int]:
         """
         Format session conversations (recent messages in same session).
 
+        Keeps the most recent messages whose formatted text fits in max_tokens,
+        so the block never needs truncating unless one message alone is too big.
+
         Example output:
         ```
         [SESSION CONTEXT - Recent conversation]
@@ -240,36 +269,40 @@ class ContextAggregator:
 
         Args:
             conversations: List of conversation dicts (most recent first)
+            max_tokens: Token budget for the block
 
         Returns:
-            Formatted string
+            Tuple of (formatted string, token count, messages kept)
         """
         if not conversations:
-            return ""
+            return "", 0, 0
 
-        parts = ["[SESSION CONTEXT - Recent conversation]\n"]
-
-        # Reverse to chronological order (oldest first)
+        # Chronological order (oldest first)
+        entries = []
         for i, conv in enumerate(reversed(conversations)):
             age = len(conversations) - i
             age_str = f"{age} message{'s' if age > 1 else ''} ago"
 
-            parts.append(f"[{age_str}]")
-            parts.append(f"User: \"{conv['prompt'][:150]}{'...' if len(conv['prompt']) > 150 else ''}\"")
-
-            # Truncate response to first 300 chars
-            response_snippet = conv['response'][:300]
-            if len(conv['response']) > 300:
-                response_snippet += "..."
-
-            parts.append(f"Assistant: \"{response_snippet}\"\n")
+            # One f-string per message: prompt up to 150 chars, response up to 300
+            entries.append(
+                f"[{age_str}]\nUser: \"{_snippet(conv['prompt'], 150)}\"\n"
+                f"Assistant: \"{_snippet(conv['response'], 300)}\"\n"
+            )
 
-        return "\n".join(parts)
+        return self._fit_entries(
+            "[SESSION CONTEXT - Recent conversation]\n", entries, max_tokens, keep_newest=True
+        )
 
-    def _format_knowledge_context(self, conversations: List[Dict[str, Any]]) -> str:
+    def _format_knowledge_context(
+        self,
+        conversations: List[Dict[str, Any]],
+        max_tokens: int
+    ) -> tuple[str, int, int]:
         """
         Format knowledge conversations (semantic search from other sessions).
 
+        Keeps the highest-scored conversations whose formatted text fits in max_tokens.
+
         Example output:
         ```
         [KNOWLEDGE CONTEXT - Relevant past topics]
@@ -284,48 +317,88 @@ class ContextAggregator:
         ```
 
         Args:
-            conversations: List of conversation dicts with _score
+            conversations: List of conversation dicts with _score (best first)
+            max_tokens: Token budget for the block
 
         Returns:
-            Formatted string
+            Tuple of (formatted string, token count, conversations kept)
         """
         if not conversations:
-            return ""
-
-        parts = ["[KNOWLEDGE CONTEXT - Relevant past topics]\n"]
+            return "", 0, 0
 
+        entries = []
         for conv in conversations:
             score = conv.get('_score', 0.0)
-            age = self._calculate_message_age(conv['timestamp'])
+            age = self._calculate_message_age(conv['timestamp'], epoch=conv.get('ts_epoch'))
 
-            parts.append(f"[Relevance: {score:.2f}, {age}]")
-            parts.append(f"Topic: {conv['prompt'][:80]}")
+            # Response truncated to first 200 chars
+            entries.append(
+                f"[Relevance: {score:.2f}, {age}]\nTopic: {conv['prompt'][:80]}\n"
+                f"Summary: \"{_snippet(conv['response'], 200)}\"\n"
+            )
 
-            # Truncate response to first 200 chars
-            response_snippet = conv['response'][:200]
-            if len(conv['response']) > 200:
-                response_snippet += "..."
+        return self._fit_entries(
+            "[KNOWLEDGE CONTEXT - Relevant past topics]\n", entries, max_tokens, keep_newest=False
+        )
 
-            parts.append(f"Summary: \"{response_snippet}\"\n")
+    def _fit_entries(
+        self,
+        header: str,
+        entries: List[str],
+        max_tokens: int,
+        keep_newest: bool
+    ) -> tuple[str, int, int]:
+        """
+        Join header and as many entries as fit in max_tokens, counting each piece once.
 
-        return "\n".join(parts)
+        Entries are taken from the end (keep_newest) or the start of the list
+        until the next one would overflow; the kept ones stay in list order.
+        If none fit, the preferred entry is kept anyway and left for
+        _apply_token_budget_with_priority to truncate.
 
-    def _calculate_message_age(self, timestamp: str) -> str:
+        Returns:
+            Tuple of (text, token count, entries kept)
+        """
+        # Count each piece with its "\n" separator: the sum bounds the joined text's count
+        header_tokens, *entry_tokens = count_tokens_batch(
+            [header + "\n"] + [entry + "\n" for entry in entries]
+        )
+
+        order = range(len(entries) - 1, -1, -1) if keep_newest else range(len(entries))
+        kept = []
+        total = header_tokens
+        for i in order:
+            if total + entry_tokens[i] > max_tokens:
+                break
+            kept.append(i)
+            total += entry_tokens[i]
+
+        if not kept:
+            kept = [order[0]]
+            total += entry_tokens[order[0]]
+
+        kept.sort()
+        text = "\n".join([header] + [entries[i] for i in kept])
+        return text, total, len(kept)
+
+    def _calculate_message_age(self, timestamp: str, epoch: Optional[float] = None) -> str:
         """
         Calculate human-readable age of message.
 
         Args:
             timestamp: ISO timestamp string
+            epoch: Unix time of the message, if stored (skips parsing timestamp)
 
         Returns:
             Human-readable age (e.g., "2 minutes ago", "3 hours ago", "2 days ago")
         """
         try:
-            msg_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            now = datetime.now(msg_time.tzinfo) if msg_time.tzinfo else datetime.now()
-            delta = now - msg_time
-
-            seconds = delta.total_seconds()
+            if epoch is not None:
+                seconds = time.time() - epoch
+            else:
+                msg_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                now = datetime.now(msg_time.tzinfo) if msg_time.tzinfo else datetime.now()
+                seconds = (now - msg_time).total_seconds()
 
             if seconds < 60:
                 return "just now"
@@ -386,7 +459,7 @@ class ContextAggregator:
         remaining_budget = max_tokens
 
         # Sort by priority (1 = highest)
-        sorted_contexts = sorted(contexts, key=lambda x: x['priority'])
+        sorted_contexts = contexts if len(contexts) == 1 else sorted(contexts, key=lambda x: x['priority'])
 
         for ctx in sorted_contexts:
             if ctx['type'] == 'session':
@@ -414,7 +487,8 @@ class ContextAggregator:
         """
         Truncate text to fit target token count using accurate tiktoken counting.
 
-        Uses tiktoken for precise token counting (handles Chinese/emoji correctly).
+        Encodes once and cuts the token list at the budget (handles
+        Chinese/emoji correctly), keeping whole words and line breaks.
 
         Args:
             text: Text to truncate
@@ -423,28 +497,11 @@ class ContextAggregator:
         Returns:
             Truncated text
         """
-        # Check if already within budget
-        current_tokens = count_tokens(text)
-        if current_tokens <= target_tokens:
+        truncated = truncate_to_tokens(text, target_tokens)
+        if truncated is text:
             return text
 
-        # Binary search for optimal truncation point
-        words = text.split()
-        left, right = 0, len(words)
-        best_truncation = ""
-
-        while left <= right:
-            mid = (left + right) // 2
-            candidate = " ".join(words[:mid])
-            candidate_tokens = count_tokens(candidate)
-
-            if candidate_tokens <= target_tokens:
-                best_truncation = candidate
-                left = mid + 1
-            else:
-                right = mid - 1
-
-        return best_truncation + "...\n[Context truncated to fit budget]"
+        return truncated + "...\n[Context truncated to fit budget]"
 
     def _format_final_context(self, contexts: List[Dict[str, Any]]) -> str:
         """
@@ -459,6 +516,11 @@ class ContextAggregator:
         if not contexts:
             return ""
 
+        # Common case: only one of session/knowledge was selected
+        if len(contexts) == 1:
+            text = contexts[0]['text']
+            return text if text.strip() else ""
+
         parts = []
 
         for ctx in sorted(contexts, key=lambda x: x['priority']):
@@ -468,11 +530,7 @@ class ContextAggregator:
         return "\n\n".join(parts)
 
 
+@functools.cache
 def get_context_aggregator() -> ContextAggregator:
     """Get or create ContextAggregator singleton."""
-    global _context_aggregator
-
-    if '_context_aggregator' not in globals():
-        globals()['_context_aggregator'] = ContextAggregator()
-
-    return globals()['_context_aggregator']
+    return ContextAggregator()
@@ -14,6 +14,15 @@ Model: paraphrase-multilingual-MiniLM-L12-v2
 import numpy as np
 from typing import List, Optional
 import pickle
+import threading
+
+# Guards the one-time engine and model construction: concurrent first calls (parallel
+# critics, the context lookup pool) would otherwise each load the ~420MB model
+_load_lock = threading.Lock()
+
+# serialize_embedding format: this 4-byte tag, then the vector as raw float32. Decoding is
+# a buffer view instead of an unpickle; untagged blobs are legacy pickles.
+_RAW_EMBEDDING_TAG = b"F32\x00"
 
 
 class EmbeddingEngine:
@@ -33,22 +42,29 @@ class EmbeddingEngine:
     def model(self):
         """Lazy load the model only when first needed."""
         if self._model is None:
-            try:
-                from sentence_transformers import SentenceTransformer
-
-                print(f"🔄 Loading embedding model: {self.model_name}...")
-                self._model = SentenceTransformer(self.model_name)
-                print(f"✅ Model loaded (embedding dim: {self._model.get_sentence_embedding_dimension()})")
-            except ImportError:
-                raise ImportError(
-                    "sentence-transformers not installed. "
-                    "Install with: pip install sentence-transformers"
-                )
-            except Exception as e:
-                raise RuntimeError(f"Failed to load embedding model: {e}")
+            with _load_lock:
+                if self._model is None:
+                    self._model = self._load_model()
 
         return self._model
 
+    def _load_model(self):
+        """Load the sentence-transformers model (called once, under _load_lock)."""
+        try:
+            from sentence_transformers import SentenceTransformer
+
+            print(f"🔄 Loading embedding model: {self.model_name}...")
+            model = SentenceTransformer(self.model_name)
+            print(f"✅ Model loaded (embedding dim: {model.get_sentence_embedding_dimension()})")
+            return model
+        except ImportError:
+            raise ImportError(
+                "sentence-transformers not installed. "
+                "Install with: pip install sentence-transformers"
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to load embedding model: {e}")
+
     def encode(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
@@ -57,14 +73,15 @@ class EmbeddingEngine:
             text: Input text in any supported language
 
         Returns:
-            Numpy array of shape (384,) containing the embedding
+            Numpy array of shape (384,) containing the L2-normalized embedding
         """
         if not text or not text.strip():
             # Return zero vector for empty text
             return np.zeros(self.model.get_sentence_embedding_dimension())
 
-        # Generate embedding
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        # Unit length at write time: stored vectors compare by dot product, and
+        # FAISS L2 distance ranks the same as cosine similarity
+        embedding = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
         return embedding
 
     def encode_batch(self, texts: List[str]) -> np.ndarray:
@@ -75,7 +92,7 @@ class EmbeddingEngine:
             texts: List of input texts
 
         Returns:
-            Numpy array of shape (N, 384) where N is number of texts
+            Numpy array of shape (N, 384) where N is number of texts, rows L2-normalized
         """
         if not texts:
             return np.array([])
@@ -84,7 +101,9 @@ class EmbeddingEngine:
         texts = [t if t and t.strip() else " " for t in texts]
 
         # Generate embeddings in batch
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=len(texts) > 10)
+        embeddings = self.model.encode(
+            texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=len(texts) > 10
+        )
         return embeddings
 
     def cosine_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
@@ -152,9 +171,9 @@ class EmbeddingEngine:
             embedding: Numpy array embedding
 
         Returns:
-            Pickled bytes representation
+            Tagged raw float32 bytes
         """
-        return pickle.dumps(embedding)
+        return _RAW_EMBEDDING_TAG + np.asarray(embedding, dtype=np.float32).tobytes()
 
     @staticmethod
     def deserialize_embedding(data: bytes) -> np.ndarray:
@@ -162,11 +181,13 @@ class EmbeddingEngine:
         Deserialize embedding from database bytes.
 
         Args:
-            data: Pickled bytes from database
+            data: Bytes from serialize_embedding, or a pickle written by older versions
 
         Returns:
-            Numpy array embedding
+            Numpy array embedding (read-only float32 view for the raw format)
         """
+        if data[:4] == _RAW_EMBEDDING_TAG:
+            return np.frombuffer(data, dtype=np.float32, offset=4)
         return pickle.loads(data)
 
 
@@ -178,5 +199,7 @@ def get_embedding_engine() -> EmbeddingEngine:
     """Get or create the global embedding engine instance."""
     global _embedding_engine
     if _embedding_engine is None:
-        _embedding_engine = EmbeddingEngine()
+        with _load_lock:
+            if _embedding_engine is None:
+                _embedding_engine = EmbeddingEngine()
     return _embedding_engine
@@ -0,0 +1,451 @@
+"""Response cache for deterministic LLM calls."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryLRU:
+    """
+    Thread-safe in-memory LRU store with per-entry TTL.
+
+    Entries are (expires_at, value) pairs; expired entries are dropped lazily
+    on read, and the least recently used entry is evicted when full.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value, or None if missing/expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteLRU:
+    """
+    Persistent LRU store with per-entry TTL, same interface as MemoryLRU.
+
+    Survives process restarts, so one-shot CLI runs can reuse responses from
+    earlier runs. Values must be JSON-serializable; expiry uses wall-clock
+    time since entries outlive the process.
+    """
+
+    # Recency is a counter rather than a timestamp so ties can't reorder entries
+    _NEXT_SEQ = "(SELECT COALESCE(MAX(access_seq), 0) + 1 FROM llm_cache)"
+
+    def __init__(self, db_path: Path, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, access_seq INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(access_seq)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value, or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                f"UPDATE llm_cache SET access_seq = {self._NEXT_SEQ} WHERE key = ?",
+                (key,),
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store value, evicting the least recently used entries beyond maxsize."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, access_seq) "
+                f"VALUES (?, ?, ?, {self._NEXT_SEQ})",
+                (key, json.dumps(value, ensure_ascii=False), now + ttl_seconds),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY access_seq DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+def _request_digest(
+    model: str,
+    system: str,
+    user: Optional[str],
+    temperature: float,
+    max_tokens: int,
+    fallback_order: Optional[List[str]],
+) -> str:
+    """
+    128-bit BLAKE2b hex digest of the request parameters.
+
+    The prompts are hashed as length-prefixed UTF-8 bytes rather than through
+    a JSON dump, so a multi-KB prompt is only encoded once and adjacent
+    fields cannot run together.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    params = (model, temperature, max_tokens, tuple(fallback_order or ()), user is None)
+    digest.update(repr(params).encode("utf-8"))
+    for text in (system, user or ""):
+        data = text.encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    Exact-match LLM response cache keyed by a hash of the request (tier 1,
+    checked before SemanticLLMCache).
+
+    Only near-deterministic calls (temperature <= max_temperature) are cached,
+    so creative agents still get fresh samples while router/compression calls
+    and identical re-runs skip the network round-trip.
+
+    Usage:
+        cache = LLMCache(backend=MemoryLRU(maxsize=1024), ttl_seconds=3600)
+        key = cache.cache_key(model, system, user, temperature, max_tokens)
+        if key and (hit := cache.get(key)):
+            ...
+    """
+
+    def __init__(
+        self,
+        backend: Optional[Union[MemoryLRU, SQLiteLRU]] = None,
+        ttl_seconds: float = 3600,
+        max_temperature: float = 0.1,
+    ):
+        self.backend = backend if backend is not None else MemoryLRU()
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        self.hits = 0
+        self.misses = 0
+
+    def cache_key(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int,
+        fallback_order: Optional[List[str]] = None,
+    ) -> Optional[str]:
+        """
+        Build the cache key for a request.
+
+        Returns:
+            BLAKE2b hex digest, or None if the call is not cacheable (temperature too high)
+        """
+        if temperature > self.max_temperature:
+            return None
+        return _request_digest(
+            model, system, user, temperature, max_tokens, fallback_order
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response dict."""
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.info(
+            "LLM cache hit",
+            extra={
+                "event": "llm_cache_hit",
+                "tokens_saved": value.get("total_tokens", 0),
+            },
+        )
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response dict."""
+        self.backend.set(key, value, self.ttl_seconds)
+
+    def clear(self) -> None:
+        """Drop all cached responses and reset counters."""
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class SemanticLLMCache:
+    """
+    Near-duplicate LLM response cache keyed by the user prompt's embedding.
+
+    A lookup hits when an unexpired entry was stored for the same model, system
+    prompt and sampling params (the scope, matched exactly) and its user prompt
+    embedding has cosine similarity >= threshold with the query's. Catches
+    retry/refine loops that re-ask the same question with small wording changes.
+
+    Usage:
+        cache = SemanticLLMCache(threshold=0.95)
+        key = cache.cache_key(model, system, user, temperature, max_tokens)
+        if key and (hit := cache.get(key)):
+            ...
+    """
+
+    def __init__(
+        self,
+        encode: Optional[Callable[[str], np.ndarray]] = None,
+        maxsize: int = 512,
+        ttl_seconds: float = 300,
+        threshold: float = 0.95,
+        max_temperature: float = 0.1,
+    ):
+        self._encode = encode
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.max_temperature = max_temperature
+        self.hits = 0
+        self.misses = 0
+        # Struct-of-arrays storage: row i of each buffer belongs to _values[i].
+        # Buffers are sized maxsize + 1 on first insert and compacted in place.
+        self._values: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None  # float32 unit vectors
+        self._scopes = np.empty(maxsize + 1, dtype="U32")
+        self._expires_at = np.empty(maxsize + 1, dtype=np.float64)
+        self._last_access = np.empty(maxsize + 1, dtype=np.float64)
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> np.ndarray:
+        """Embed text (defaults to the shared sentence-transformers engine)."""
+        if self._encode is None:
+            from core.embedding_engine import get_embedding_engine
+
+            self._encode = get_embedding_engine().encode
+        return self._encode(text)
+
+    def cache_key(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int,
+        fallback_order: Optional[List[str]] = None,
+        embedding: Optional[np.ndarray] = None,
+    ) -> Optional[tuple[str, np.ndarray]]:
+        """
+        Build the lookup key for a request.
+
+        Args:
+            embedding: Precomputed embedding of `user` (skips encoding it again)
+
+        Returns:
+            (scope digest, unit-norm user embedding), or None if the call is not
+            cacheable (temperature too high, or the prompt embeds to a zero vector)
+        """
+        if temperature > self.max_temperature:
+            return None
+        if embedding is None:
+            embedding = self.encode(user)
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        scope = _request_digest(
+            model, system, None, temperature, max_tokens, fallback_order
+        )
+        return scope, vector / norm
+
+    def _best_match(self, scope: str, vector: np.ndarray) -> Optional[int]:
+        """Index of the most similar in-scope entry at or above threshold (lock held)."""
+        count = len(self._values)
+        if count == 0:
+            return None
+        similarities = self._matrix[:count] @ vector
+        similarities[self._scopes[:count] != scope] = -np.inf
+        best = int(np.argmax(similarities))
+        return best if similarities[best] >= self.threshold else None
+
+    def _keep(self, mask: np.ndarray) -> None:
+        """Compact all buffers down to the rows where mask is True (lock held)."""
+        count = len(self._values)
+        kept = int(mask.sum())
+        for buffer in (self._matrix, self._scopes, self._expires_at, self._last_access):
+            buffer[:kept] = buffer[:count][mask]
+        self._values = [value for value, keep in zip(self._values, mask) if keep]
+
+    def _drop_expired(self, now: float) -> None:
+        """Remove expired entries (lock held)."""
+        count = len(self._values)
+        live = self._expires_at[:count] >= now
+        if not live.all():
+            self._keep(live)
+
+    def get(self, key: tuple[str, np.ndarray]) -> Optional[Dict[str, Any]]:
+        """Look up the response cached for the closest matching prompt."""
+        scope, vector = key
+        with self._lock:
+            now = time.monotonic()
+            self._drop_expired(now)
+            index = self._best_match(scope, vector)
+            if index is None:
+                self.misses += 1
+                return None
+            self._last_access[index] = now
+            value = self._values[index]
+            self.hits += 1
+        logger.info(
+            "LLM semantic cache hit",
+            extra={
+                "event": "llm_semantic_cache_hit",
+                "tokens_saved": value.get("total_tokens", 0),
+            },
+        )
+        return value
+
+    def set(self, key: tuple[str, np.ndarray], value: Dict[str, Any]) -> None:
+        """Store a response, replacing a near-duplicate entry instead of adding one."""
+        scope, vector = key
+        with self._lock:
+            now = time.monotonic()
+            self._drop_expired(now)
+            index = self._best_match(scope, vector)
+            if index is None:
+                if self._matrix is None:
+                    self._matrix = np.empty(
+                        (self.maxsize + 1, vector.shape[0]), dtype=np.float32
+                    )
+                index = len(self._values)
+                self._values.append(value)
+                self._matrix[index] = vector
+                self._scopes[index] = scope
+            else:
+                self._values[index] = value
+            self._expires_at[index] = now + self.ttl_seconds
+            self._last_access[index] = now
+            count = len(self._values)
+            if count > self.maxsize:
+                keep = np.ones(count, dtype=bool)
+                keep[int(np.argmin(self._last_access[:count]))] = False
+                self._keep(keep)
+
+    def clear(self) -> None:
+        """Drop all cached responses and reset counters."""
+        with self._lock:
+            self._values = []
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+def create_llm_cache(config: Optional[Dict[str, Any]]) -> Optional[LLMCache]:
+    """
+    Build an LLMCache from the `cache` section of agents.yaml.
+
+    Args:
+        config: Cache config dict (enabled, backend, db_path, max_entries,
+            ttl_seconds, max_temperature)
+
+    Returns:
+        LLMCache instance, or None if caching is disabled
+    """
+    config = config or {}
+    if not config.get("enabled", False):
+        return None
+    max_entries = config.get("max_entries", 1024)
+    if config.get("backend", "memory") == "sqlite":
+        from config.settings import BASE_DIR
+
+        db_path = BASE_DIR / config.get("db_path", "data/MEMORY/llm_cache.db")
+        backend: Union[MemoryLRU, SQLiteLRU] = SQLiteLRU(db_path, maxsize=max_entries)
+    else:
+        backend = MemoryLRU(maxsize=max_entries)
+    return LLMCache(
+        backend=backend,
+        ttl_seconds=config.get("ttl_seconds", 3600),
+        max_temperature=config.get("max_temperature", 0.1),
+    )
+
+
+def create_semantic_llm_cache(
+    config: Optional[Dict[str, Any]],
+) -> Optional[SemanticLLMCache]:
+    """
+    Build a SemanticLLMCache from the `semantic_cache` section of agents.yaml.
+
+    Args:
+        config: Semantic cache config dict (enabled, max_entries, ttl_seconds, threshold, max_temperature)
+
+    Returns:
+        SemanticLLMCache instance, or None if disabled
+    """
+    config = config or {}
+    if not config.get("enabled", False):
+        return None
+    return SemanticLLMCache(
+        maxsize=config.get("max_entries", 512),
+        ttl_seconds=config.get("ttl_seconds", 300),
+        threshold=config.get("threshold", 0.95),
+        max_temperature=config.get("max_temperature", 0.1),
+    )
@@ -1,16 +1,114 @@
 """LLM connector using LiteLLM for unified API access."""
 
+import asyncio
+import atexit
+import email.utils
+import functools
+import importlib.util
 import os
+import random
+import re
+import threading
 import time
-from dataclasses import dataclass
-from typing import List, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Generator, Iterator, List, NamedTuple, Optional
 
+import httpx
 import litellm
 
 from config.settings import is_provider_enabled
-
-
-@dataclass
+from core.llm_cache import LLMCache, SemanticLLMCache
+
+# Shared keep-alive pool for provider HTTPS calls (avoids a TCP+TLS handshake per call)
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+_HTTP_TIMEOUT = httpx.Timeout(600.0, connect=5.0)  # Long read timeout: generations can be slow
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None  # httpx needs h2 for HTTP/2
+_http_client_lock = threading.Lock()
+
+# Error text meaning a missing API key or failed auth ("auth" also covers "authentication")
+_AUTH_ERROR_RE = re.compile(r"api key|auth|unauthorized", re.IGNORECASE)
+
+# How a failed provider call should be retried (see _classify_error)
+_RETRY_NOW = "retry_now"  # Connection drop / timeout: transient, retry immediately once
+_RETRY_BACKOFF = "retry_backoff"  # 429 / 5xx / unknown: retry after an exponential backoff
+_FATAL = "fatal"  # Other 4xx (bad request, not found, context too long): retrying cannot help
+
+_BACKOFF_BASE_SECONDS = 0.1
+# Longest provider Retry-After we wait out; beyond this, failing over to the next model is faster
+_MAX_RETRY_AFTER_SECONDS = 30.0
+
+
+def _classify_error(error: Exception) -> str:
+    """Classify a provider exception as _RETRY_NOW, _RETRY_BACKOFF or _FATAL."""
+    if isinstance(error, litellm.APIConnectionError):  # Includes litellm.Timeout
+        return _RETRY_NOW
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500 and status not in (408, 409, 429):
+        return _FATAL
+    return _RETRY_BACKOFF
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the provider's Retry-After header (delta or HTTP-date), if present."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Seconds to wait before retrying after a failed attempt.
+
+    Returns:
+        None if the error is not worth retrying (or the provider asks for a
+        longer wait than _MAX_RETRY_AFTER_SECONDS), 0 for an immediate retry
+        (first transient network failure only), the provider's Retry-After
+        when given, else 0.1s * 2**attempt with ±20% jitter so concurrent
+        callers do not retry in lockstep
+    """
+    kind = _classify_error(error)
+    if kind == _FATAL:
+        return None
+    if kind == _RETRY_NOW and attempt == 0:
+        return 0.0
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return retry_after if retry_after <= _MAX_RETRY_AFTER_SECONDS else None
+    return _BACKOFF_BASE_SECONDS * (2 ** attempt) * random.uniform(0.8, 1.2)
+
+
+# Runs hedged attempts (see LLMConnector._hedged_attempts). A losing attempt cannot be
+# interrupted mid-request, so it finishes in the background and its result is dropped.
+_HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+# LiteLLM model prefixes whose canonical provider name differs
+_PROVIDER_MAP = {
+    "gemini": "google",  # gemini/* models use GOOGLE_API_KEY
+}
+
+
+def _ensure_shared_http_client() -> None:
+    """Install one pooled httpx.Client as LiteLLM's session (once per process)."""
+    if litellm.client_session is not None:
+        return
+    with _http_client_lock:
+        if litellm.client_session is None:
+            client = httpx.Client(http2=_HTTP2_AVAILABLE, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+            litellm.client_session = client
+            atexit.register(client.close)
+
+
+@dataclass(slots=True)
 class LLMResponse:
     """Response from LLM call."""
 
@@ -25,31 +123,118 @@ class LLMResponse:
     error: Optional[str] = None
     original_model: Optional[str] = None  # If fallback was used
     fallback_reason: Optional[str] = None  # Why fallback was triggered
+    cached: bool = False  # Served from LLMCache or SemanticLLMCache (no provider call)
+    time_to_first_token_ms: Optional[float] = None  # stream() only: latency until the first text delta
+
+
+class _CacheKeys(NamedTuple):
+    """Cache keys computed for one request (None = not cached there)."""
+
+    exact: Optional[str] = None
+    semantic: Optional[tuple] = None
 
 
 class LLMConnector:
     """Unified LLM connector using LiteLLM."""
 
-    def __init__(self, retry_count: int = 1):
+    def __init__(
+        self,
+        retry_count: int = 1,
+        cache: Optional[LLMCache] = None,
+        semantic_cache: Optional[SemanticLLMCache] = None,
+        race_fallbacks: bool = False,
+        hedge_ms: Optional[int] = None,
+    ):
         self.retry_count = retry_count
+        self.cache = cache  # Optional exact-match response cache (deterministic calls only)
+        self.semantic_cache = semantic_cache  # Optional near-duplicate prompt cache, checked after an exact miss
+        self.race_fallbacks = race_fallbacks  # acall(): try all fallbacks at once after the primary fails
+        self.hedge_ms = hedge_ms  # call(): default hedge delay (None = strictly serial fallbacks)
         # Disable LiteLLM logging
         litellm.suppress_debug_info = True
+        _ensure_shared_http_client()
 
-    def _extract_provider(self, model: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _extract_provider(model: str) -> str:
         """
-        Extract provider name from model string.
+        Extract provider name from model string (memoized: few distinct models).
 
         Maps LiteLLM model prefixes to canonical provider names.
         Example: "gemini/gemini-2.5-pro" → "google"
         """
         prefix = model.split("/")[0] if "/" in model else "unknown"
+        return _PROVIDER_MAP.get(prefix, prefix)
+
+    def _build_messages(self, model: str, system: str, user: str) -> list:
+        """
+        Build chat messages for a model.
+
+        Anthropic only reuses a cached prompt prefix when it is marked with
+        cache_control, so the system prompt (static per agent) gets an ephemeral
+        breakpoint there. Other providers cache common prefixes automatically.
+        """
+        if self._extract_provider(model) == "anthropic":
+            system_content: Any = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        else:
+            system_content = system
+        return [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": user},
+        ]
 
-        # Map LiteLLM prefixes to canonical provider names
-        provider_map = {
-            "gemini": "google",  # gemini/* models use GOOGLE_API_KEY
-        }
+    def _parse_completion(
+        self, response: Any, model: str, provider: str, start_time: float
+    ) -> tuple[Optional[LLMResponse], Optional[str]]:
+        """
+        Convert a LiteLLM completion into an LLMResponse.
 
-        return provider_map.get(prefix, prefix)
+        Returns:
+            Tuple of (LLMResponse if usable, error_reason if empty/filtered)
+        """
+        duration_ms = (time.perf_counter() - start_time) * 1000
+
+        # Extract text
+        text = response.choices[0].message.content
+
+        # Check for empty/filtered content
+        if text is None or (isinstance(text, str) and not text.strip()):
+            # Check finish_reason for filtering
+            finish_reason = response.choices[0].finish_reason if hasattr(response.choices[0], 'finish_reason') else None
+
+            if finish_reason in ['content_filter', 'safety']:
+                return None, f"Content filtered by provider (reason: {finish_reason})"
+            elif completion_tokens := (response.usage.completion_tokens if response.usage else 0):
+                # Model generated tokens but returned empty content - unusual
+                return None, f"Empty response despite {completion_tokens} completion tokens (possible content filter)"
+            else:
+                return None, "Empty response from model"
+
+        # Extract usage
+        usage = response.usage
+        prompt_tokens = usage.prompt_tokens if usage else 0
+        completion_tokens = usage.completion_tokens if usage else 0
+        total_tokens = usage.total_tokens if usage else 0
+
+        return (
+            LLMResponse(
+                text=text,
+                model=model,
+                provider=provider,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=total_tokens,
+                duration_ms=duration_ms,
+            ),
+            None,
+        )
+
+    @staticmethod
+    def _is_auth_error(error_str: str) -> bool:
+        """Check if an error message indicates a missing API key or auth failure."""
+        return _AUTH_ERROR_RE.search(error_str) is not None
 
     def _try_model(
         self,
@@ -81,152 +266,272 @@ class LLMConnector:
                     temperature=temperature,
                     max_tokens=max_tokens,
                 )
-
-                duration_ms = (time.perf_counter() - start_time) * 1000
-
-                # Extract text
-                text = response.choices[0].message.content
-
-                # Check for empty/filtered content
-                if text is None or (isinstance(text, str) and not text.strip()):
-                    # Check finish_reason for filtering
-                    finish_reason = response.choices[0].finish_reason if hasattr(response.choices[0], 'finish_reason') else None
-
-                    if finish_reason in ['content_filter', 'safety']:
-                        return None, f"Content filtered by provider (reason: {finish_reason})"
-                    elif completion_tokens := (response.usage.completion_tokens if response.usage else 0):
-                        # Model generated tokens but returned empty content - unusual
-                        return None, f"Empty response despite {completion_tokens} completion tokens (possible content filter)"
-                    else:
-                        return None, "Empty response from model"
-
-                # Extract usage
-                usage = response.usage
-                prompt_tokens = usage.prompt_tokens if usage else 0
-                completion_tokens = usage.completion_tokens if usage else 0
-                total_tokens = usage.total_tokens if usage else 0
-
-                return (
-                    LLMResponse(
-                        text=text,
-                        model=model,
-                        provider=provider,
-                        prompt_tokens=prompt_tokens,
-                        completion_tokens=completion_tokens,
-                        total_tokens=total_tokens,
-                        duration_ms=duration_ms,
-                    ),
-                    None,
-                )
+                return self._parse_completion(response, model, provider, start_time)
 
             except Exception as e:
-                error_str = str(e).lower()
                 last_error = str(e)
 
                 # Check if error is due to missing API key or auth
-                if any(
-                    keyword in error_str
-                    for keyword in ["api key", "authentication", "unauthorized", "auth"]
-                ):
+                if self._is_auth_error(last_error):
                     # Provider unavailable - don't retry
                     return None, f"Authentication failed for provider '{provider}'"
 
-                # Other errors - retry
-                if attempt < self.retry_count:
-                    time.sleep(1)
-                    continue
+                # Other errors - retry if the error class can recover
+                delay = _retry_delay(e, attempt)
+                if delay is None or attempt == self.retry_count:
+                    break
+                if delay:
+                    time.sleep(delay)
 
         # All retries failed
-        return None, f"Model call failed after {self.retry_count + 1} attempts: {last_error}"
+        return None, f"Model call failed after {attempt + 1} attempts: {last_error}"
 
-    def call(
+    async def _atry_model(
         self,
         model: str,
-        system: str,
-        user: str,
-        temperature: float = 0.2,
-        max_tokens: int = 1500,
-        fallback_order: Optional[List[str]] = None,
-        mock_mode: Optional[bool] = None,
-    ) -> LLMResponse:
+        messages: list,
+        temperature: float,
+        max_tokens: int,
+        start_time: float,
+    ) -> tuple[Optional[LLMResponse], Optional[str]]:
         """
-        Call LLM with retry logic and fallback support.
+        Async variant of _try_model using litellm.acompletion.
 
-        Args:
-            model: Model identifier (e.g., "openai/gpt-4o-mini")
-            system: System prompt
-            user: User prompt
-            temperature: Sampling temperature
-            max_tokens: Maximum tokens to generate
-            fallback_order: List of fallback models to try if primary fails
-            mock_mode: Override to enable/disable mock mode (defaults to LLM_MOCK env var)
+        Retries wait with asyncio.sleep so other in-flight calls keep progressing.
 
         Returns:
-            LLMResponse with text and metadata
+            Tuple of (LLMResponse if successful, error_reason if failed)
         """
-        start_time = time.perf_counter()
-        original_model = model
+        provider = self._extract_provider(model)
 
-        # Check for mock mode (parameter overrides environment variable)
-        if mock_mode is None:
-            mock_mode = os.environ.get("LLM_MOCK", "").lower() in ["1", "true", "yes"]
+        if not is_provider_enabled(provider):
+            return None, f"Missing API key for provider '{provider}'"
 
-        if mock_mode:
-            # Return mock response for testing without API keys
-            duration_ms = (time.perf_counter() - start_time) * 1000
-            provider = self._extract_provider(model)
+        last_error = None
+        for attempt in range(self.retry_count + 1):
+            try:
+                response = await litellm.acompletion(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+                return self._parse_completion(response, model, provider, start_time)
 
-            mock_text = f"[MOCK RESPONSE] This is a simulated response from {model}. The user asked: '{user[:50]}...'. System context: '{system[:50]}...'. In production, this would be a real LLM response."
+            except Exception as e:
+                last_error = str(e)
 
-            return LLMResponse(
-                text=mock_text,
-                model=model,
-                provider=provider,
-                prompt_tokens=len(system.split()) + len(user.split()),
-                completion_tokens=len(mock_text.split()),
-                total_tokens=len(system.split()) + len(user.split()) + len(mock_text.split()),
-                duration_ms=duration_ms + 150,  # Simulate API latency
-            )
+                if self._is_auth_error(last_error):
+                    return None, f"Authentication failed for provider '{provider}'"
 
-        messages = [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ]
+                delay = _retry_delay(e, attempt)
+                if delay is None or attempt == self.retry_count:
+                    break
+                if delay:
+                    await asyncio.sleep(delay)
 
-        # Build list of models to try (primary + fallbacks)
-        models_to_try = [model]
-        if fallback_order:
-            models_to_try.extend(fallback_order)
+        return None, f"Model call failed after {attempt + 1} attempts: {last_error}"
 
-        first_error = None  # Track primary model error
-        last_error = None   # Track most recent error
-        for idx, current_model in enumerate(models_to_try):
-            # Try this model
-            result, error_reason = self._try_model(
-                model=current_model,
-                messages=messages,
+    async def _race_models(
+        self,
+        models: List[str],
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int,
+        start_time: float,
+    ) -> List[tuple[Optional[LLMResponse], Optional[str]]]:
+        """
+        Call models concurrently and keep the first success.
+
+        Returns:
+            [(winning LLMResponse, None)], or every model's failed attempt in
+            the order given when none succeeded
+        """
+        tasks = [
+            asyncio.create_task(
+                self._atry_model(
+                    model=model,
+                    messages=self._build_messages(model, system, user),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    start_time=start_time,
+                )
+            )
+            for model in models
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result, error_reason = await next_done
+                if result:
+                    return [(result, error_reason)]
+        finally:
+            for task in tasks:
+                task.cancel()
+        return [task.result() for task in tasks]
+
+    def _hedged_attempts(
+        self,
+        models: List[str],
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int,
+        start_time: float,
+        hedge_ms: int,
+    ) -> List[tuple[Optional[LLMResponse], Optional[str]]]:
+        """
+        Call the primary model, and also the first fallback if the primary is still
+        running after hedge_ms; the first success wins.
+
+        Returns:
+            Attempts in model order, ready to send into _fallback_chain: the
+            primary's outcome (a placeholder failure if the fallback won while it
+            was still running), then the fallback's if it was started
+        """
+        def attempt(model: str) -> tuple[Optional[LLMResponse], Optional[str]]:
+            return self._try_model(
+                model=model,
+                messages=self._build_messages(model, system, user),
                 temperature=temperature,
                 max_tokens=max_tokens,
                 start_time=start_time,
             )
 
-            if result:
-                # Success! Add fallback metadata if we used a fallback
-                if idx > 0:
-                    result.original_model = original_model
-                    # Use the error from the PRIMARY model (idx == 0)
-                    result.fallback_reason = first_error or "Primary model unavailable"
-                return result
+        primary = _HEDGE_EXECUTOR.submit(attempt, models[0])
+        done, _ = wait([primary], timeout=hedge_ms / 1000)
+        if done:
+            return [primary.result()]
+
+        hedge = _HEDGE_EXECUTOR.submit(attempt, models[1])
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            if primary in done and primary.result()[0]:
+                return [primary.result()]
+            if hedge in done and hedge.result()[0]:
+                if primary.done():
+                    return [primary.result(), hedge.result()]
+                return [(None, f"Primary model still running after {hedge_ms}ms hedge delay"), hedge.result()]
+        return [primary.result(), hedge.result()]
+
+    def _stream_model(
+        self,
+        model: str,
+        messages: list,
+        temperature: float,
+        max_tokens: int,
+        start_time: float,
+        stop_when: Optional[Callable[[str], bool]],
+    ) -> Generator[tuple[str, None], None, tuple[Optional[LLMResponse], Optional[str]]]:
+        """
+        Streaming variant of _try_model: yields (delta, None) as text arrives.
 
-            # This model failed, track reason
-            error = error_reason or f"Model '{current_model}' failed"
-            last_error = error
+        Returns (via StopIteration) the same (LLMResponse, error_reason) tuple as
+        _try_model. Once a delta has been yielded the call is not retried: a
+        mid-stream failure ends with the partial text and the error set.
+        """
+        provider = self._extract_provider(model)
 
-            # Save the first error (primary model failure reason)
-            if idx == 0:
-                first_error = error
+        if not is_provider_enabled(provider):
+            return None, f"Missing API key for provider '{provider}'"
 
-        # All models exhausted - return helpful error message
+        last_error = None
+        first_token_ms = None
+        for attempt in range(self.retry_count + 1):
+            chunks: list = []
+            text_parts: List[str] = []
+            try:
+                response = litellm.completion(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                for chunk in response:
+                    chunks.append(chunk)
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start_time) * 1000
+                    text_parts.append(delta)
+                    yield delta, None
+                    # Only re-check on line boundaries: callers parse complete lines
+                    if stop_when is not None and "\n" in delta and stop_when("".join(text_parts)):
+                        # Stop reading; closing the stream lets the provider stop generating
+                        close = getattr(getattr(response, "completion_stream", None), "close", None)
+                        if close:
+                            close()
+                        break
+                result, error_reason = self._parse_completion(
+                    litellm.stream_chunk_builder(chunks, messages=messages), model, provider, start_time
+                )
+                if result is not None:
+                    result.time_to_first_token_ms = first_token_ms
+                return result, error_reason
+
+            except Exception as e:
+                last_error = str(e)
+
+                if text_parts:
+                    # Output already went to the caller: finish with what arrived
+                    return (
+                        LLMResponse(
+                            text="".join(text_parts),
+                            model=model,
+                            provider=provider,
+                            prompt_tokens=0,
+                            completion_tokens=0,
+                            total_tokens=0,
+                            duration_ms=(time.perf_counter() - start_time) * 1000,
+                            error=f"Stream interrupted: {last_error}",
+                            time_to_first_token_ms=first_token_ms,
+                        ),
+                        None,
+                    )
+
+                if self._is_auth_error(last_error):
+                    return None, f"Authentication failed for provider '{provider}'"
+
+                delay = _retry_delay(e, attempt)
+                if delay is None or attempt == self.retry_count:
+                    break
+                if delay:
+                    time.sleep(delay)
+
+        return None, f"Model call failed after {attempt + 1} attempts: {last_error}"
+
+    def _mock_response(self, model: str, system: str, user: str, start_time: float) -> LLMResponse:
+        """Build a simulated response for testing without API keys."""
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        provider = self._extract_provider(model)
+
+        mock_text = f"[MOCK RESPONSE] This is a simulated response from {model}. The user asked: '{user[:50]}...'. System context: '{system[:50]}...'. In production, this would be a real LLM response."
+
+        return LLMResponse(
+            text=mock_text,
+            model=model,
+            provider=provider,
+            prompt_tokens=len(system.split()) + len(user.split()),
+            completion_tokens=len(mock_text.split()),
+            total_tokens=len(system.split()) + len(user.split()) + len(mock_text.split()),
+            duration_ms=duration_ms + 150,  # Simulate API latency
+        )
+
+    @staticmethod
+    def _is_mock_mode(mock_mode: Optional[bool]) -> bool:
+        """Resolve mock mode (parameter overrides LLM_MOCK environment variable)."""
+        if mock_mode is None:
+            return os.environ.get("LLM_MOCK", "").lower() in ["1", "true", "yes"]
+        return mock_mode
+
+    def _all_failed_response(
+        self, original_model: str, last_error: Optional[str], start_time: float
+    ) -> LLMResponse:
+        """Build the error response returned when every model in the fallback chain failed."""
         duration_ms = (time.perf_counter() - start_time) * 1000
         provider = self._extract_provider(original_model)
 
@@ -249,3 +554,296 @@ class LLMConnector:
             duration_ms=duration_ms,
             error=error_msg,
         )
+
+    @staticmethod
+    def _cached_response(cached: Optional[dict], start_time: float) -> Optional[LLMResponse]:
+        """Rebuild a cached response dict as a fresh LLMResponse."""
+        if cached is None:
+            return None
+        return LLMResponse(
+            **{
+                **cached,
+                "duration_ms": (time.perf_counter() - start_time) * 1000,
+                "cached": True,
+            }
+        )
+
+    def _cache_store(self, cache_keys: _CacheKeys, result: LLMResponse) -> None:
+        """Store a successful response under each of its cache keys."""
+        if cache_keys.exact is None and cache_keys.semantic is None:
+            return
+        value = asdict(result)
+        if cache_keys.exact is not None:
+            self.cache.set(cache_keys.exact, value)
+        if cache_keys.semantic is not None:
+            self.semantic_cache.set(cache_keys.semantic, value)
+
+    def _start_call(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        temperature: float,
+        max_tokens: int,
+        fallback_order: Optional[List[str]],
+        mock_mode: Optional[bool],
+        start_time: float,
+        prompt_embedding: Optional[Any] = None,
+    ) -> tuple[_CacheKeys, Optional[LLMResponse]]:
+        """
+        Shared entry for call/acall/stream: mock mode and cache lookup.
+
+        The exact cache is checked first; the semantic cache (which has to
+        embed the prompt) only on an exact miss.
+
+        Returns:
+            Tuple of (cache keys, response to return immediately or None)
+        """
+        if self._is_mock_mode(mock_mode):
+            # Return mock response for testing without API keys
+            return _CacheKeys(), self._mock_response(model, system, user, start_time)
+
+        exact_key = None
+        if self.cache is not None:
+            exact_key = self.cache.cache_key(model, system, user, temperature, max_tokens, fallback_order)
+            if exact_key is not None:
+                hit = self._cached_response(self.cache.get(exact_key), start_time)
+                if hit:
+                    return _CacheKeys(exact_key), hit
+
+        semantic_key = None
+        if self.semantic_cache is not None:
+            semantic_key = self.semantic_cache.cache_key(
+                model, system, user, temperature, max_tokens, fallback_order, embedding=prompt_embedding
+            )
+            if semantic_key is not None:
+                hit = self._cached_response(self.semantic_cache.get(semantic_key), start_time)
+                if hit:
+                    return _CacheKeys(exact_key, semantic_key), hit
+
+        return _CacheKeys(exact_key, semantic_key), None
+
+    def _fallback_chain(
+        self,
+        model: str,
+        fallback_order: Optional[List[str]],
+        cache_keys: _CacheKeys,
+        start_time: float,
+        cacheable: bool = True,
+    ) -> Generator[str, tuple[Optional[LLMResponse], Optional[str]], LLMResponse]:
+        """
+        Fallback bookkeeping shared by call(), acall() and stream().
+
+        Yields each model to try (primary first, then fallback_order) and is
+        sent that attempt's (LLMResponse, error_reason). Returns the first
+        successful response, with fallback metadata and cached, or the
+        all-failed error response. The caller only performs the attempt
+        (sync, async or streaming), so the fallback rules live in one place.
+        """
+        models_to_try = [model]
+        if fallback_order:
+            models_to_try.extend(fallback_order)
+
+        first_error = None  # Track primary model error
+        last_error = None   # Track most recent error
+        for idx, current_model in enumerate(models_to_try):
+            result, error_reason = yield current_model
+
+            if result:
+                # Success! Add fallback metadata if we used a fallback
+                if idx > 0:
+                    result.original_model = model
+                    # Use the error from the PRIMARY model (idx == 0)
+                    result.fallback_reason = first_error or "Primary model unavailable"
+                if cacheable and result.error is None:
+                    self._cache_store(cache_keys, result)
+                return result
+
+            # This model failed, track reason
+            error = error_reason or f"Model '{current_model}' failed"
+            last_error = error
+
+            # Save the first error (primary model failure reason)
+            if idx == 0:
+                first_error = error
+
+        # All models exhausted - return helpful error message
+        return self._all_failed_response(model, last_error, start_time)
+
+    def call(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        temperature: float = 0.2,
+        max_tokens: int = 1500,
+        fallback_order: Optional[List[str]] = None,
+        mock_mode: Optional[bool] = None,
+        prompt_embedding: Optional[Any] = None,
+        hedge_ms: Optional[int] = None,
+    ) -> LLMResponse:
+        """
+        Call LLM with retry logic and fallback support.
+
+        Args:
+            model: Model identifier (e.g., "openai/gpt-4o-mini")
+            system: System prompt
+            user: User prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            fallback_order: List of fallback models to try if primary fails
+            mock_mode: Override to enable/disable mock mode (defaults to LLM_MOCK env var)
+            prompt_embedding: Embedding of `user` the caller already computed; the
+                semantic cache uses it instead of embedding the prompt again
+            hedge_ms: If the primary has not finished after this many ms, also call
+                the first fallback and keep whichever succeeds first (defaults to
+                the connector's hedge_ms; the slower call is still billed)
+
+        Returns:
+            LLMResponse with text and metadata
+        """
+        start_time = time.perf_counter()
+        cache_keys, early = self._start_call(
+            model, system, user, temperature, max_tokens, fallback_order, mock_mode, start_time,
+            prompt_embedding,
+        )
+        if early:
+            return early
+
+        if hedge_ms is None:
+            hedge_ms = self.hedge_ms
+        chain = self._fallback_chain(model, fallback_order, cache_keys, start_time)
+        try:
+            current_model = next(chain)
+            if hedge_ms is not None and fallback_order:
+                for attempt in self._hedged_attempts(
+                    [model, fallback_order[0]], system, user, temperature, max_tokens, start_time, hedge_ms
+                ):
+                    current_model = chain.send(attempt)
+            while True:
+                current_model = chain.send(
+                    self._try_model(
+                        model=current_model,
+                        messages=self._build_messages(current_model, system, user),
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        start_time=start_time,
+                    )
+                )
+        except StopIteration as done:
+            return done.value
+
+    async def acall(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        temperature: float = 0.2,
+        max_tokens: int = 1500,
+        fallback_order: Optional[List[str]] = None,
+        mock_mode: Optional[bool] = None,
+        prompt_embedding: Optional[Any] = None,
+    ) -> LLMResponse:
+        """
+        Async variant of call() — awaits the provider instead of blocking a thread.
+
+        Same arguments, fallback semantics and return value as call(). Use it to
+        overlap independent LLM round-trips (e.g. with asyncio.gather).
+
+        With race_fallbacks, once the primary fails every fallback model is
+        called concurrently and the first success wins (the rest are
+        cancelled), so latency is the fastest fallback's rather than the sum.
+        """
+        start_time = time.perf_counter()
+        cache_keys, early = self._start_call(
+            model, system, user, temperature, max_tokens, fallback_order, mock_mode, start_time,
+            prompt_embedding,
+        )
+        if early:
+            return early
+
+        chain = self._fallback_chain(model, fallback_order, cache_keys, start_time)
+        try:
+            current_model = next(chain)
+            if self.race_fallbacks and fallback_order and len(fallback_order) > 1:
+                current_model = chain.send(
+                    await self._atry_model(
+                        model=current_model,
+                        messages=self._build_messages(current_model, system, user),
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        start_time=start_time,
+                    )
+                )
+                # Primary failed: the chain now expects fallback attempts, in order
+                for attempt in await self._race_models(
+                    fallback_order, system, user, temperature, max_tokens, start_time
+                ):
+                    current_model = chain.send(attempt)
+            while True:
+                current_model = chain.send(
+                    await self._atry_model(
+                        model=current_model,
+                        messages=self._build_messages(current_model, system, user),
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        start_time=start_time,
+                    )
+                )
+        except StopIteration as done:
+            return done.value
+
+    def stream(
+        self,
+        model: str,
+        system: str,
+        user: str,
+        temperature: float = 0.2,
+        max_tokens: int = 1500,
+        fallback_order: Optional[List[str]] = None,
+        mock_mode: Optional[bool] = None,
+        prompt_embedding: Optional[Any] = None,
+        stop_when: Optional[Callable[[str], bool]] = None,
+    ) -> Iterator[tuple[str, Optional[LLMResponse]]]:
+        """
+        Streaming variant of call(): yield output as the model generates it.
+
+        Yields (delta, None) for each text chunk, then a final ("", LLMResponse)
+        with the full text and usage. Fallback models are only tried while
+        nothing has been yielded yet.
+
+        Args:
+            Same as call(), plus:
+            stop_when: Optional predicate on the text so far, checked whenever a
+                chunk completes a line; returning True stops generation early
+                (the final LLMResponse then holds the partial text)
+
+        Yields:
+            Tuples of (text delta, None), then ("", LLMResponse)
+        """
+        start_time = time.perf_counter()
+        cache_keys, early = self._start_call(
+            model, system, user, temperature, max_tokens, fallback_order, mock_mode, start_time,
+            prompt_embedding,
+        )
+        if early:
+            yield early.text, None
+            yield "", early
+            return
+
+        # An early-stopped text is partial: never cache it
+        chain = self._fallback_chain(model, fallback_order, cache_keys, start_time, cacheable=stop_when is None)
+        try:
+            current_model = next(chain)
+            while True:
+                attempt = yield from self._stream_model(
+                    model=current_model,
+                    messages=self._build_messages(current_model, system, user),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    start_time=start_time,
+                    stop_when=stop_when,
+                )
+                current_model = chain.send(attempt)
+        except StopIteration as done:
+            yield "", done.value
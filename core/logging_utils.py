@@ -1,17 +1,89 @@
 """Logging utilities for conversation tracking."""
 
+import atexit
+import heapq
 import json
 import logging
+import logging.handlers
+import os
+import queue
 import re
+import sys
+import threading
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from config.settings import CONVERSATIONS_DIR, estimate_cost
 
+try:
+    import orjson  # Optional: C JSON encoder, much faster than json.dump for log records
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Compact per-log metrics, one JSON line per written log keyed by filename, so
+# get_metrics looks up the newest logs here instead of re-parsing up to 1000 full
+# log files. The directory stays the source of truth: entries for deleted logs are
+# ignored and logs missing from the index are parsed and added.
+_METRICS_INDEX = ".metrics.ndjson"
+_METRIC_FIELDS = ("agent", "total_tokens", "estimated_cost_usd", "duration_ms")
+# Serializes index appends (write_json) with index rewrites (_read_metrics)
+_metrics_lock = threading.Lock()
+
+# Background listener that drains queued status records (see get_status_logger)
+_status_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_status_logger(name: str) -> logging.Logger:
+    """
+    Get a logger for runtime status lines (critic progress, selection, etc.).
+
+    Records are pushed onto a queue and written to stdout by a dedicated
+    listener thread, so threaded critic fan-out never contends on the stdout
+    lock. Verbosity follows the LOG_LEVEL env var (default: INFO); set
+    LOG_LEVEL=WARNING to silence status output.
+
+    Args:
+        name: Logger name (usually __name__ of the caller)
+
+    Returns:
+        Configured logger
+    """
+    global _status_listener
+
+    status_logger = logging.getLogger(name)
+    if _status_listener is None:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter("%(message)s"))
+        _status_listener = logging.handlers.QueueListener(
+            queue.SimpleQueue(), stream_handler, respect_handler_level=False
+        )
+        _status_listener.start()
+        atexit.register(_status_listener.stop)
+
+    if not any(
+        isinstance(h, logging.handlers.QueueHandler) for h in status_logger.handlers
+    ):
+        status_logger.addHandler(logging.handlers.QueueHandler(_status_listener.queue))
+        status_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        # Avoid duplicate lines if the root logger is configured
+        status_logger.propagate = False
+
+    return status_logger
+
+
+# One pass over the text: bare sk- keys, or an *API_KEY= style label followed by its value.
+# The provider-prefixed labels (ANTHROPIC_API_KEY etc.) are covered by the API_KEY branch.
+_MASK_RE = re.compile(r"sk-[a-zA-Z0-9]{8,}|(API[_-]?KEY[=:\s]+)[^\s]+", re.IGNORECASE)
+
+
+def _mask_match(match: "re.Match[str]") -> str:
+    label = match.group(1)
+    return "sk-***MASKED***" if label is None else label + "***MASKED***"
+
 
 def mask_sensitive_data(text: str) -> str:
     """Mask API keys and sensitive data in text."""
@@ -19,26 +91,28 @@ def mask_sensitive_data(text: str) -> str:
     if not text:
         return text or ""
 
-    patterns = [
-        (r"(sk-[a-zA-Z0-9]{8,})", "sk-***MASKED***"),
-        (r"(API[_-]?KEY[=:\s]+)([^\s]+)", r"\1***MASKED***"),
-        (r"(ANTHROPIC[_-]?API[_-]?KEY[=:\s]+)([^\s]+)", r"\1***MASKED***"),
-        (r"(OPENAI[_-]?API[_-]?KEY[=:\s]+)([^\s]+)", r"\1***MASKED***"),
-        (r"(GOOGLE[_-]?API[_-]?KEY[=:\s]+)([^\s]+)", r"\1***MASKED***"),
-    ]
+    # Most prompts contain neither marker: skip the regex scan entirely
+    lowered = text.lower()
+    if "sk-" not in lowered and "key" not in lowered:
+        return text
+
+    return _MASK_RE.sub(_mask_match, text)
 
-    for pattern, replacement in patterns:
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
 
-    return text
+def make_log_filename(agent: str) -> str:
+    """Generate a unique conversation log filename ({timestamp}-{agent}-{id}.json)."""
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    unique_id = str(uuid.uuid4())[:8]
+    return f"{timestamp}-{agent}-{unique_id}.json"
 
 
-def write_json(record: Dict[str, Any]) -> Path:
+def write_json(record: Dict[str, Any], filename: Optional[str] = None) -> Path:
     """
     Write conversation record to JSON file.
 
     Args:
         record: Dictionary containing conversation data
+        filename: Optional pre-generated filename (see make_log_filename)
 
     Returns:
         Path to written file
@@ -47,10 +121,8 @@ def write_json(record: Dict[str, Any]) -> Path:
     CONVERSATIONS_DIR.mkdir(parents=True, exist_ok=True)
 
     # Generate filename
-    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    agent = record.get("agent", "unknown")
-    unique_id = str(uuid.uuid4())[:8]
-    filename = f"{timestamp}-{agent}-{unique_id}.json"
+    if filename is None:
+        filename = make_log_filename(record.get("agent", "unknown"))
     filepath = CONVERSATIONS_DIR / filename
 
     # Mask sensitive data
@@ -69,13 +141,44 @@ def write_json(record: Dict[str, Any]) -> Path:
             record["model"], record["prompt_tokens"], record["completion_tokens"]
         )
 
-    # Write to file
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(record, f, indent=2, ensure_ascii=False)
+    # Write to file (serialize in memory, then a single write)
+    filepath.write_bytes(_dumps_record(record))
+
+    with _metrics_lock, open(CONVERSATIONS_DIR / _METRICS_INDEX, "ab") as f:
+        f.write(_metrics_line(_metrics_entry(record, filename)))
 
     return filepath
 
 
+def _metrics_entry(record: Dict[str, Any], filename: str) -> Dict[str, Any]:
+    """The metric fields of a log record, tagged with its log filename."""
+    metrics = {field: record[field] for field in _METRIC_FIELDS if field in record}
+    metrics["filename"] = filename
+    return metrics
+
+
+def _metrics_line(metrics: Dict[str, Any]) -> bytes:
+    """Serialize a metrics entry as one NDJSON line."""
+    return json.dumps(metrics, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes (orjson if installed)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_record(record: Dict[str, Any]) -> bytes:
+    """Serialize a log record to indented UTF-8 JSON (orjson if installed)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(record, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            pass  # Types orjson rejects (e.g. non-str keys): fall back to stdlib
+    return json.dumps(record, indent=2, ensure_ascii=False).encode("utf-8")
+
+
 def read_logs(limit: int = 20) -> list[Dict[str, Any]]:
     """
     Read recent conversation logs.
@@ -89,18 +192,16 @@ def read_logs(limit: int = 20) -> list[Dict[str, Any]]:
     if not CONVERSATIONS_DIR.exists():
         return []
 
-    # Get all JSON files, sorted by modification time (newest first)
-    files = sorted(
-        CONVERSATIONS_DIR.glob("*.json"), key=lambda x: x.stat().st_mtime, reverse=True
-    )
+    # Newest `limit` JSON files by modification time (no full sort)
+    newest = heapq.nlargest(limit, _scan_logs())
 
     logs = []
-    for filepath in files[:limit]:
+    for _, path in newest:
+        filepath = Path(path)
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                log = json.load(f)
-                log["filename"] = filepath.name
-                logs.append(log)
+            log = _loads(filepath.read_bytes())
+            log["filename"] = filepath.name
+            logs.append(log)
         except Exception as e:
             logger.warning(f"Failed to parse log file {filepath.name}: {e}")
             continue
@@ -108,6 +209,70 @@ def read_logs(limit: int = 20) -> list[Dict[str, Any]]:
     return logs
 
 
+def _scan_logs() -> list[tuple[float, str]]:
+    """(mtime, path) of every JSON log file (scandir caches the stat)."""
+    with os.scandir(CONVERSATIONS_DIR) as entries:
+        return [
+            (entry.stat().st_mtime, entry.path)
+            for entry in entries
+            if entry.name.endswith(".json") and entry.is_file()
+        ]
+
+
+def _read_metrics(limit: int) -> list[Dict[str, Any]]:
+    """
+    Read the metric fields of the newest `limit` logs.
+
+    Entries come from the metrics index; logs it does not cover (written before
+    the index existed, or by another process) are parsed once and added. The
+    index is rewritten without entries for logs that no longer exist.
+    """
+    files = _scan_logs()
+    present = {os.path.basename(path) for _, path in files}
+    index_path = CONVERSATIONS_DIR / _METRICS_INDEX
+
+    index: Dict[str, Dict[str, Any]] = {}
+    try:
+        lines = index_path.read_bytes().splitlines()
+    except FileNotFoundError:
+        lines = []
+    for line in lines:
+        try:
+            entry = _loads(line)
+        except ValueError:
+            continue  # Partially written line
+        index[entry.get("filename")] = entry
+
+    metrics = []
+    added = False
+    for _, path in heapq.nlargest(limit, files):
+        name = os.path.basename(path)
+        entry = index.get(name)
+        if entry is None:
+            try:
+                entry = _metrics_entry(_loads(Path(path).read_bytes()), name)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to parse log file {name}: {e}")
+                continue
+            index[name] = entry
+            added = True
+        metrics.append(entry)
+
+    if added or len(index) != len(lines) or not index.keys() <= present:
+        # Atomic replace: readers never see a half-written index. An append that lands
+        # between the read above and this replace is dropped from the index, and that
+        # log is simply parsed again on the next call.
+        entries = b"".join(
+            _metrics_line(entry) for name, entry in index.items() if name in present
+        )
+        tmp_path = index_path.with_name(f"{_METRICS_INDEX}.{os.getpid()}.tmp")
+        with _metrics_lock:
+            tmp_path.write_bytes(entries)
+            os.replace(tmp_path, index_path)
+
+    return metrics
+
+
 def get_metrics() -> Dict[str, Any]:
     """
     Calculate aggregate metrics from all logs.
@@ -115,7 +280,10 @@ def get_metrics() -> Dict[str, Any]:
     Returns:
         Dictionary with metrics
     """
-    logs = read_logs(limit=1000)  # Last 1000 logs
+    if not CONVERSATIONS_DIR.exists():
+        logs = []
+    else:
+        logs = _read_metrics(limit=1000)  # Last 1000 logs
 
     if not logs:
         return {
@@ -1,20 +1,162 @@
 """Memory storage backend implementations."""
 
+import atexit
 import json
 import logging
+import queue
 import sqlite3
 import threading
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from config.settings import BASE_DIR
 
+try:
+    import orjson  # Optional: faster tags (de)serialization on every stored/read row
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 # Thread-local storage for per-thread SQLite connections
 _thread_local = threading.local()
 
+# Applied once per new connection: WAL for concurrent readers, plus read-heavy tuning
+# (temp tables in RAM, 256 MB memory-mapped reads, 64 MB page cache)
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+# Session-history query, hoisted so every call hits the connection's statement cache
+_SESSION_SQL = (
+    "SELECT id, timestamp, agent, prompt, response FROM conversations "
+    "WHERE session_id = ? ORDER BY timestamp DESC LIMIT ?"
+)
+
+_INSERT_SQL = """
+    INSERT INTO conversations (
+        timestamp, agent, model, provider, prompt, response,
+        duration_ms, prompt_tokens, completion_tokens, total_tokens,
+        cost_usd, fallback_used, original_model, fallback_reason,
+        session_id, tags, error, ts_epoch, tokens, embedding
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Keyword index over prompt/response. The trigram tokenizer gives substring
+# matching with the same semantics as LIKE '%q%' for queries of 3+ characters.
+# External-content table: text is stored once, in conversations; triggers keep it in sync.
+_FTS_SCHEMA = (
+    (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5("
+        "prompt, response, content='conversations', content_rowid='id', tokenize='trigram')"
+    ),
+    (
+        "CREATE TRIGGER IF NOT EXISTS conversations_ai AFTER INSERT ON conversations BEGIN "
+        "INSERT INTO conversations_fts(rowid, prompt, response) "
+        "VALUES (new.id, new.prompt, new.response); END"
+    ),
+    (
+        "CREATE TRIGGER IF NOT EXISTS conversations_ad AFTER DELETE ON conversations BEGIN "
+        "INSERT INTO conversations_fts(conversations_fts, rowid, prompt, response) "
+        "VALUES ('delete', old.id, old.prompt, old.response); END"
+    ),
+    (
+        "CREATE TRIGGER IF NOT EXISTS conversations_au "
+        "AFTER UPDATE OF prompt, response ON conversations BEGIN "
+        "INSERT INTO conversations_fts(conversations_fts, rowid, prompt, response) "
+        "VALUES ('delete', old.id, old.prompt, old.response); "
+        "INSERT INTO conversations_fts(rowid, prompt, response) "
+        "VALUES (new.id, new.prompt, new.response); END"
+    ),
+)
+
+# query_candidates(full=False): everything scoring needs except the prompt/response text,
+# which hydrate() fetches afterwards for the few rows that survive scoring
+_SLIM_COLUMNS = "id, timestamp, agent, model, provider, session_id, ts_epoch, embedding, tokens"
+
+# get_stats: every aggregate from one GROUP BY, answered from idx_stats alone (no table rows)
+_STATS_SQL = (
+    "SELECT agent, model, COUNT(*), SUM(total_tokens), SUM(cost_usd) "
+    "FROM conversations GROUP BY agent, model"
+)
+
+
+def _add_sums(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    """Combine two SQL SUM() results (NULL when every summed value was NULL)."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a + b
+
+
+# Background writer: rows per transaction, and how long to wait for a batch to fill
+_WRITE_BATCH_SIZE = 256
+_WRITE_BATCH_WAIT_SECONDS = 0.05
+
+# cleanup() deletes in chunks of this many rows, committing each, so a large purge
+# doesn't hold the write lock or grow the WAL for its whole duration
+_CLEANUP_CHUNK_ROWS = 10000
+
+# Every connection opened by _get_connection, closed at process exit
+_open_connections: List[sqlite3.Connection] = []
+_open_connections_lock = threading.Lock()
+
+
+def _close_connections() -> None:
+    with _open_connections_lock:
+        for conn in _open_connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.debug(f"Failed to close memory db connection at exit: {e}")
+        _open_connections.clear()
+
+
+atexit.register(_close_connections)
+
+
+def _dumps_tags(tags: Any) -> str:
+    """Serialize a conversation's tags to the JSON text stored in the tags column."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(tags).decode()
+        except TypeError:
+            pass  # Types orjson rejects: fall back to stdlib
+    return json.dumps(tags)
+
+
+def _loads_tags(raw: Optional[str]) -> List[Any]:
+    """Parse the tags column (most rows hold an empty list)."""
+    if not raw or raw == "[]":
+        return []
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _embedding_blob(embedding: Any) -> Optional[bytes]:
+    """Embedding column value: serialized bytes pass through, arrays are serialized."""
+    if embedding is None or isinstance(embedding, (bytes, bytearray)):
+        return embedding
+    from core.embedding_engine import EmbeddingEngine
+    return EmbeddingEngine.serialize_embedding(embedding)
+
+
+def _timestamp_epoch(timestamp: str) -> Optional[float]:
+    """Unix time of an ISO timestamp (naive = UTC), or None if it does not parse."""
+    try:
+        parsed = datetime.fromisoformat(timestamp)  # accepts a "Z" suffix on 3.11+
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
 # Memory data directory
 MEMORY_DIR = BASE_DIR / "data" / "MEMORY"
 MEMORY_DIR.mkdir(parents=True, exist_ok=True)
@@ -125,6 +267,16 @@ class SQLiteBackend:
             db_path: Path to SQLite database file (default: data/MEMORY/conversations.db)
         """
         self.db_path = db_path or (MEMORY_DIR / "conversations.db")
+        # Conversations queued by enqueue(), written in batches by a background thread
+        self._write_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=10000)
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        # Serializes write transactions across this backend's per-thread connections:
+        # a waiting writer wakes as soon as the lock is released instead of sleeping in
+        # SQLite's busy handler. Readers never take it (WAL readers don't block on writers).
+        self._write_txn_lock = threading.Lock()
+        self._write_generation = 0  # Bumped on every commit through this backend; see data_version()
+        self._fts_enabled = False  # Set by _init_database when FTS5 trigram is available
         self._init_database()
         self._faiss = FAISSIndex(
             dim=384,
@@ -158,20 +310,67 @@ class SQLiteBackend:
                     fallback_reason TEXT,
                     session_id TEXT,
                     tags TEXT,
-                    error TEXT
+                    error TEXT,
+                    ts_epoch REAL,
+                    tokens TEXT
                 )
             """
             )
 
+            # Databases created before ts_epoch existed: add it and backfill from timestamp
+            cursor.execute("PRAGMA table_info(conversations)")
+            columns = {col[1] for col in cursor.fetchall()}
+            # Cached semantic embeddings (see update_embedding); previously only added
+            # by scripts/migrate_add_embeddings.py
+            if "embedding" not in columns:
+                cursor.execute("ALTER TABLE conversations ADD COLUMN embedding BLOB")
+            if "ts_epoch" not in columns:
+                cursor.execute("ALTER TABLE conversations ADD COLUMN ts_epoch REAL")
+                cursor.execute(
+                    "UPDATE conversations SET ts_epoch = (julianday(timestamp) - 2440587.5) * 86400.0"
+                )
+            # Keyword set for scoring, written by MemoryEngine.store_conversation; older rows
+            # stay NULL until scripts/migrate_add_tokens.py fills them
+            if "tokens" not in columns:
+                cursor.execute("ALTER TABLE conversations ADD COLUMN tokens TEXT")
+
             # Create indexes for fast queries
             cursor.execute(
                 "CREATE INDEX IF NOT EXISTS idx_timestamp ON conversations(timestamp DESC)"
             )
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_agent ON conversations(agent)")
+            # Agent-filtered queries (get_recent, search, query_candidates) walk this in
+            # timestamp order and stop at LIMIT; supersedes the old single-column idx_agent
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_agent_ts ON conversations(agent, timestamp DESC)"
+            )
+            cursor.execute("DROP INDEX IF EXISTS idx_agent")
+            # Serves session lookups as an index range scan already in timestamp order;
+            # supersedes the old single-column idx_session
             cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_session ON conversations(session_id)"
+                "CREATE INDEX IF NOT EXISTS idx_sess_ts ON conversations(session_id, timestamp DESC)"
             )
+            cursor.execute("DROP INDEX IF EXISTS idx_session")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_model ON conversations(model)")
+            # Covering index for get_stats: grouped aggregates without touching the wide rows
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_stats ON conversations(agent, model, total_tokens, cost_usd)"
+            )
+
+            # Full-text index for search(); optional, LIKE is used if FTS5/trigram is unavailable
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations_fts'"
+            )
+            fts_existed = cursor.fetchone() is not None
+            try:
+                for statement in _FTS_SCHEMA:
+                    cursor.execute(statement)
+                if not fts_existed:
+                    # Index rows stored before the FTS table existed
+                    cursor.execute("INSERT INTO conversations_fts(conversations_fts) VALUES ('rebuild')")
+                self._fts_enabled = True
+            except sqlite3.OperationalError as e:
+                logger.info(f"FTS5 trigram search unavailable, using LIKE: {e}")
+                self._fts_enabled = False
 
             conn.commit()
         finally:
@@ -183,7 +382,7 @@ class SQLiteBackend:
 
         Reuses the same connection per thread to avoid the overhead of
         opening a new connection on every query (connection pooling via
-        threading.local). WAL mode is set once per connection.
+        threading.local). WAL mode and read PRAGMAs are set once per connection.
         """
         # Key by db_path so different databases get separate connections
         cache = getattr(_thread_local, 'memory_conns', None)
@@ -194,11 +393,14 @@ class SQLiteBackend:
         db_key = str(self.db_path)
         conn = cache.get(db_key)
 
-        # Verify the cached connection is still alive
+        # Verify the cached connection was not closed by a caller (attribute access, no SQL round-trip)
         if conn is not None:
             try:
-                conn.execute("SELECT 1")
-            except Exception:
+                conn.total_changes
+            except sqlite3.ProgrammingError:
+                with _open_connections_lock:
+                    if conn in _open_connections:
+                        _open_connections.remove(conn)
                 conn = None
                 cache.pop(db_key, None)
 
@@ -209,11 +411,41 @@ class SQLiteBackend:
                 check_same_thread=False,
             )
             conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA synchronous=NORMAL")
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
             cache[db_key] = conn
+            with _open_connections_lock:
+                _open_connections.append(conn)
         return conn
 
+    @staticmethod
+    def _conversation_row(conversation: Dict[str, Any]) -> tuple:
+        """Map a conversation dict to the _INSERT_SQL parameter tuple."""
+        # Fixed-width "+00:00" form: string order matches time order, parses without rewriting
+        timestamp = conversation.get("timestamp") or datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        return (
+            timestamp,
+            conversation.get("agent", "unknown"),
+            conversation.get("model", "unknown"),
+            conversation.get("provider", "unknown"),
+            conversation.get("prompt", ""),
+            conversation.get("response", ""),
+            conversation.get("duration_ms", 0),
+            conversation.get("prompt_tokens", 0),
+            conversation.get("completion_tokens", 0),
+            conversation.get("total_tokens", 0),
+            conversation.get("estimated_cost_usd") or conversation.get("cost_usd", 0.0),
+            conversation.get("fallback_used", False),
+            conversation.get("original_model"),
+            conversation.get("fallback_reason"),
+            conversation.get("session_id"),
+            _dumps_tags(conversation.get("tags", [])),
+            conversation.get("error"),
+            _timestamp_epoch(timestamp),
+            conversation.get("tokens"),
+            _embedding_blob(conversation.get("embedding")),
+        )
+
     def store(self, conversation: Dict[str, Any]) -> int:
         """
         Store conversation to database.
@@ -224,78 +456,101 @@ class SQLiteBackend:
         Returns:
             Row ID of inserted conversation
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        return self.store_many([conversation])[0]
 
-        try:
-            # Extract fields
-            timestamp = conversation.get("timestamp", datetime.now(timezone.utc).isoformat())
-            agent = conversation.get("agent", "unknown")
-            model = conversation.get("model", "unknown")
-            provider = conversation.get("provider", "unknown")
-            prompt = conversation.get("prompt", "")
-            response = conversation.get("response", "")
-            duration_ms = conversation.get("duration_ms", 0)
-            prompt_tokens = conversation.get("prompt_tokens", 0)
-            completion_tokens = conversation.get("completion_tokens", 0)
-            total_tokens = conversation.get("total_tokens", 0)
-            cost_usd = conversation.get("estimated_cost_usd") or conversation.get(
-                "cost_usd", 0.0
-            )
-            fallback_used = conversation.get("fallback_used", False)
-            original_model = conversation.get("original_model")
-            fallback_reason = conversation.get("fallback_reason")
-            session_id = conversation.get("session_id")
-            tags = json.dumps(conversation.get("tags", []))
-            error = conversation.get("error")
+    def store_many(self, conversations: List[Dict[str, Any]]) -> List[int]:
+        """
+        Store several conversations in a single transaction (one commit/fsync).
 
-            cursor.execute(
-                """
-                INSERT INTO conversations (
-                    timestamp, agent, model, provider, prompt, response,
-                    duration_ms, prompt_tokens, completion_tokens, total_tokens,
-                    cost_usd, fallback_used, original_model, fallback_reason,
-                    session_id, tags, error
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    timestamp,
-                    agent,
-                    model,
-                    provider,
-                    prompt,
-                    response,
-                    duration_ms,
-                    prompt_tokens,
-                    completion_tokens,
-                    total_tokens,
-                    cost_usd,
-                    fallback_used,
-                    original_model,
-                    fallback_reason,
-                    session_id,
-                    tags,
-                    error,
-                ),
-            )
+        Args:
+            conversations: Conversation data dictionaries
 
-            row_id = cursor.lastrowid
-            conn.commit()
+        Returns:
+            Row IDs of the inserted conversations, in order
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
 
-            # If embedding provided, add to FAISS index as well as SQLite
-            embedding = conversation.get("embedding")
-            if embedding is not None and self._faiss.FAISS_AVAILABLE:
+        with self._write_txn_lock:
+            try:
+                row_ids = []
+                for conversation in conversations:
+                    cursor.execute(_INSERT_SQL, self._conversation_row(conversation))
+                    row_ids.append(cursor.lastrowid)
+                conn.commit()
+                self._write_generation += 1
+            except Exception:
+                conn.rollback()
+                raise
+
+        # If embedding provided, add to FAISS index as well as SQLite
+        if self._faiss.FAISS_AVAILABLE:
+            for row_id, conversation in zip(row_ids, conversations):
+                embedding = conversation.get("embedding")
+                if embedding is None:
+                    continue
                 try:
-                    import pickle
+                    from core.embedding_engine import EmbeddingEngine
                     if isinstance(embedding, (bytes, bytearray)):
-                        embedding = pickle.loads(embedding)
+                        embedding = EmbeddingEngine.deserialize_embedding(bytes(embedding))
                     self._faiss.add(conv_id=row_id, embedding=embedding)
                 except Exception as e:
                     logger.warning(f"FAISS index update failed for conv {row_id}: {e}")
 
-            return row_id
-        finally:
-            pass  # Thread-local connection stays open for reuse
+        return row_ids
+
+    def enqueue(self, conversation: Dict[str, Any]) -> None:
+        """
+        Queue a conversation for the background writer instead of storing it inline.
+
+        The writer groups queued conversations into batched transactions, so a
+        burst of stores (e.g. parallel critics) costs one commit instead of one
+        each. Reads on this backend flush the queue first, so queued rows are
+        always visible to queries.
+        """
+        if self._writer_thread is None:
+            with self._writer_lock:
+                if self._writer_thread is None:
+                    self._writer_thread = threading.Thread(
+                        target=self._writer_loop, name="memory-writer", daemon=True
+                    )
+                    self._writer_thread.start()
+                    atexit.register(self.flush)
+        self._write_queue.put(conversation)
+
+    def _writer_loop(self) -> None:
+        """Drain the write queue in batches of up to _WRITE_BATCH_SIZE rows."""
+        while True:
+            batch = [self._write_queue.get()]
+            try:
+                while len(batch) < _WRITE_BATCH_SIZE:
+                    batch.append(self._write_queue.get(timeout=_WRITE_BATCH_WAIT_SECONDS))
+            except queue.Empty:
+                pass
+            try:
+                self.store_many(batch)
+            except Exception as e:
+                logger.warning(f"Failed to store {len(batch)} queued conversations: {e}")
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    def flush(self) -> None:
+        """Block until all queued conversations are written."""
+        self._write_queue.join()
+
+    def data_version(self) -> Tuple[int, int]:
+        """
+        A value that changes whenever the database contents may have changed.
+
+        Combines commits made through this backend with SQLite's PRAGMA
+        data_version, which moves when any other connection (another thread's
+        or another process's) commits. Queued writes are flushed first.
+        Cheap: no table access.
+        """
+        self.flush()
+        conn = self._get_connection()
+        return self._write_generation, conn.execute("PRAGMA data_version").fetchone()[0]
 
     def search_faiss(
         self,
@@ -309,6 +564,7 @@ class SQLiteBackend:
             List of conversation IDs (most similar first).
             Empty list if FAISS unavailable or no results.
         """
+        self.flush()
         results = self._faiss.search(query_embedding, k=k)
         # Sort by distance (ascending = most similar first)
         results.sort(key=lambda x: x[1])
@@ -327,6 +583,7 @@ class SQLiteBackend:
         Returns:
             List of conversation dictionaries
         """
+        self.flush()
         conn = self._get_connection()
         cursor = conn.cursor()
 
@@ -381,6 +638,7 @@ class SQLiteBackend:
         Returns:
             List of matching conversations
         """
+        self.flush()
         conn = self._get_connection()
         cursor = conn.cursor()
 
@@ -390,8 +648,16 @@ class SQLiteBackend:
             params = []
 
             if query:
-                where_clauses.append("(prompt LIKE ? OR response LIKE ?)")
-                params.extend([f"%{query}%", f"%{query}%"])
+                if self._fts_enabled and len(query) >= 3 and "%" not in query and "_" not in query:
+                    # Quoted FTS5 string: matched literally as a substring
+                    where_clauses.append(
+                        "id IN (SELECT rowid FROM conversations_fts WHERE conversations_fts MATCH ?)"
+                    )
+                    params.append('"' + query.replace('"', '""') + '"')
+                else:
+                    # Short queries (below trigram length) or explicit LIKE wildcards
+                    where_clauses.append("(prompt LIKE ? OR response LIKE ?)")
+                    params.extend([f"%{query}%", f"%{query}%"])
 
             if agent:
                 where_clauses.append("agent = ?")
@@ -436,6 +702,7 @@ class SQLiteBackend:
         Returns:
             Conversation dict or None if not found
         """
+        self.flush()
         conn = self._get_connection()
         cursor = conn.cursor()
 
@@ -456,13 +723,16 @@ class SQLiteBackend:
         Returns:
             True if deleted, False if not found
         """
+        self.flush()
         conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
-            cursor.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
-            deleted = cursor.rowcount > 0
-            conn.commit()
+            with self._write_txn_lock:
+                cursor.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+                deleted = cursor.rowcount > 0
+                conn.commit()
+                self._write_generation += 1
             return deleted
         finally:
             pass  # Thread-local connection stays open for reuse
@@ -474,41 +744,25 @@ class SQLiteBackend:
         Returns:
             Statistics dictionary
         """
+        self.flush()
         conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
-            # Total conversations
-            cursor.execute("SELECT COUNT(*) FROM conversations")
-            total_conversations = cursor.fetchone()[0]
-
-            # Total tokens
-            cursor.execute("SELECT SUM(total_tokens) FROM conversations")
-            total_tokens = cursor.fetchone()[0] or 0
-
-            # Total cost
-            cursor.execute("SELECT SUM(cost_usd) FROM conversations")
-            total_cost = cursor.fetchone()[0] or 0.0
-
-            # By agent
-            cursor.execute(
-                """
-                SELECT agent, COUNT(*) as count, SUM(total_tokens) as tokens
-                FROM conversations
-                GROUP BY agent
-            """
-            )
-            by_agent = {row[0]: {"count": row[1], "tokens": row[2]} for row in cursor}
-
-            # By model
-            cursor.execute(
-                """
-                SELECT model, COUNT(*) as count, SUM(total_tokens) as tokens
-                FROM conversations
-                GROUP BY model
-            """
-            )
-            by_model = {row[0]: {"count": row[1], "tokens": row[2]} for row in cursor}
+            total_conversations = 0
+            total_tokens = total_cost = None
+            by_agent: Dict[str, Dict[str, Any]] = {}
+            by_model: Dict[str, Dict[str, Any]] = {}
+            for agent, model, count, tokens, cost in cursor.execute(_STATS_SQL):
+                total_conversations += count
+                total_tokens = _add_sums(total_tokens, tokens)
+                total_cost = _add_sums(total_cost, cost)
+                for groups, key in ((by_agent, agent), (by_model, model)):
+                    group = groups.setdefault(key, {"count": 0, "tokens": None})
+                    group["count"] += count
+                    group["tokens"] = _add_sums(group["tokens"], tokens)
+            total_tokens = total_tokens or 0
+            total_cost = total_cost or 0.0
 
             return {
                 "total_conversations": total_conversations,
@@ -530,21 +784,29 @@ class SQLiteBackend:
         Returns:
             Number of conversations deleted
         """
+        self.flush()
         conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
             cutoff_date = datetime.now(timezone.utc).replace(
                 hour=0, minute=0, second=0, microsecond=0
-            )
-            cutoff_date = cutoff_date.replace(day=cutoff_date.day - days)
-
-            cursor.execute(
-                "DELETE FROM conversations WHERE timestamp < ?", (cutoff_date.isoformat(),)
-            )
-            deleted_count = cursor.rowcount
-            conn.commit()
-            return deleted_count
+            ) - timedelta(days=days)
+
+            # Range scan on idx_timestamp, one chunk per transaction
+            deleted_count = 0
+            while True:
+                with self._write_txn_lock:
+                    cursor.execute(
+                        "DELETE FROM conversations WHERE id IN "
+                        "(SELECT id FROM conversations WHERE timestamp < ? LIMIT ?)",
+                        (cutoff_date.isoformat(), _CLEANUP_CHUNK_ROWS),
+                    )
+                    conn.commit()
+                    self._write_generation += 1
+                deleted_count += cursor.rowcount
+                if cursor.rowcount < _CLEANUP_CHUNK_ROWS:
+                    return deleted_count
         finally:
             pass  # Thread-local connection stays open for reuse
 
@@ -563,11 +825,13 @@ class SQLiteBackend:
         cursor = conn.cursor()
 
         try:
-            cursor.execute(
-                "UPDATE conversations SET embedding = ? WHERE id = ?",
-                (embedding_blob, conversation_id),
-            )
-            conn.commit()
+            with self._write_txn_lock:
+                cursor.execute(
+                    "UPDATE conversations SET embedding = ? WHERE id = ?",
+                    (embedding_blob, conversation_id),
+                )
+                conn.commit()
+                self._write_generation += 1
             return True
         except Exception as e:
             logger.warning(f"Failed to update embedding for conversation {conversation_id}: {e}")
@@ -580,6 +844,8 @@ class SQLiteBackend:
         agent: Optional[str] = None,
         exclude_session_id: Optional[str] = None,
         limit: int = 500,
+        full: bool = True,
+        min_ts: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
         """
         Query candidate conversations for context retrieval.
@@ -591,10 +857,14 @@ class SQLiteBackend:
             agent: Filter by agent (None = all agents)
             exclude_session_id: Exclude conversations from this session
             limit: Maximum candidates to return
+            full: Include prompt/response; with False only _SLIM_COLUMNS are
+                read (call hydrate() on the records that are kept)
+            min_ts: Skip conversations with ts_epoch older than this Unix time
 
         Returns:
             List of conversation dictionaries
         """
+        self.flush()
         conn = self._get_connection()
         cursor = conn.cursor()
 
@@ -611,8 +881,12 @@ class SQLiteBackend:
                 where_clauses.append("(session_id IS NULL OR session_id != ?)")
                 params.append(exclude_session_id)
 
+            if min_ts is not None:
+                where_clauses.append("(ts_epoch IS NULL OR ts_epoch >= ?)")
+                params.append(min_ts)
+
             # Construct SQL
-            sql = "SELECT * FROM conversations"
+            sql = f"SELECT {'*' if full else _SLIM_COLUMNS} FROM conversations"
             if where_clauses:
                 sql += " WHERE " + " AND ".join(where_clauses)
             sql += " ORDER BY timestamp DESC LIMIT ?"
@@ -620,10 +894,96 @@ class SQLiteBackend:
 
             cursor.execute(sql, params)
             rows = cursor.fetchall()
+            if not full:
+                return [dict(row) for row in rows]
             return [self._row_to_dict(row) for row in rows]
         finally:
             pass  # Thread-local connection stays open for reuse
 
+    def fts_search(
+        self,
+        query: str,
+        agent: Optional[str] = None,
+        exclude_session_id: Optional[str] = None,
+        limit: int = 500,
+        full: bool = True,
+        min_ts: Optional[float] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Full-text candidates for keyword retrieval, best BM25 match first.
+
+        Args:
+            query: FTS5 MATCH expression (e.g. quoted terms joined with OR)
+            agent: Filter by agent (None = all agents)
+            exclude_session_id: Exclude conversations from this session
+            limit: Maximum candidates to return
+            full: Include prompt/response; with False only _SLIM_COLUMNS are
+                read (call hydrate() on the records that are kept)
+            min_ts: Skip conversations with ts_epoch older than this Unix time
+
+        Returns:
+            Conversation dictionaries with a "rank" key (bm25, lower is better),
+            or None if FTS5 is unavailable and the caller should use query_candidates()
+        """
+        if not self._fts_enabled:
+            return None
+        self.flush()
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            where_clauses = ["conversations_fts MATCH ?"]
+            params: List[Any] = [query]
+
+            if agent:
+                where_clauses.append("c.agent = ?")
+                params.append(agent)
+
+            if exclude_session_id:
+                where_clauses.append("(c.session_id IS NULL OR c.session_id != ?)")
+                params.append(exclude_session_id)
+
+            if min_ts is not None:
+                where_clauses.append("(c.ts_epoch IS NULL OR c.ts_epoch >= ?)")
+                params.append(min_ts)
+
+            columns = "c.*" if full else ", ".join("c." + col for col in _SLIM_COLUMNS.split(", "))
+            sql = (
+                f"SELECT {columns}, bm25(conversations_fts) AS rank FROM conversations_fts "
+                "JOIN conversations c ON c.id = conversations_fts.rowid "
+                "WHERE " + " AND ".join(where_clauses) + " ORDER BY rank LIMIT ?"
+            )
+            params.append(limit)
+
+            cursor.execute(sql, params)
+            records = []
+            for row in cursor.fetchall():
+                rec = self._row_to_dict(row) if full else dict(row)
+                rec["rank"] = row["rank"]
+                records.append(rec)
+            return records
+        finally:
+            pass  # Thread-local connection stays open for reuse
+
+    def hydrate(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Fill in prompt/response, in place, for records from query_candidates(full=False).
+
+        One query for all records; rows deleted in the meantime get empty text.
+        """
+        missing = [rec for rec in records if "prompt" not in rec]
+        if not missing:
+            return
+        conn = self._get_connection()
+        placeholders = ", ".join("?" * len(missing))
+        rows = conn.execute(
+            f"SELECT id, prompt, response FROM conversations WHERE id IN ({placeholders})",
+            [rec["id"] for rec in missing],
+        ).fetchall()
+        texts = {row[0]: (row[1], row[2]) for row in rows}
+        for rec in missing:
+            rec["prompt"], rec["response"] = texts.get(rec["id"], ("", ""))
+
     def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
         """Convert SQLite row to dictionary."""
         return {
@@ -643,9 +1003,11 @@ class SQLiteBackend:
             "original_model": row["original_model"],
             "fallback_reason": row["fallback_reason"],
             "session_id": row["session_id"],
-            "tags": json.loads(row["tags"]) if row["tags"] else [],
+            "tags": _loads_tags(row["tags"]),
             "error": row["error"],
             "embedding": row["embedding"] if "embedding" in row.keys() else None,
+            "ts_epoch": row["ts_epoch"],
+            "tokens": row["tokens"] if "tokens" in row.keys() else None,
         }
 
     def get_session_conversations(
@@ -665,17 +1027,12 @@ class SQLiteBackend:
         Returns:
             List of conversation dicts with id, timestamp, agent, prompt, response
         """
+        self.flush()
         conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
-            cursor.execute("""
-                SELECT id, timestamp, agent, prompt, response
-                FROM conversations
-                WHERE session_id = ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (session_id, limit))
+            cursor.execute(_SESSION_SQL, (session_id, limit))
 
             rows = cursor.fetchall()
 
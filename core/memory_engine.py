@@ -2,14 +2,47 @@
 
 import logging
 import math
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Set
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Set
 
+import numpy as np
+
+from config.settings import count_tokens_batch, load_memory_config
 from core.memory_backend import SQLiteBackend
 from core.embedding_engine import get_embedding_engine, EmbeddingEngine
 
 logger = logging.getLogger(__name__)
 
+# Common English words ignored by keyword extraction
+_STOP_WORDS = frozenset(
+    {
+        "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of",
+        "with", "by", "from", "as", "is", "was", "are", "were", "been", "be", "have",
+        "has", "had", "do", "does", "did", "will", "would", "should", "could", "may",
+        "might", "can", "this", "that", "these", "those",
+    }
+)
+
+# get_context_for_prompt: cached results kept (LRU)
+_CONTEXT_CACHE_SIZE = 128
+
+# get_context_for_prompt: top-scored records considered for optimal budget packing
+_KNAPSACK_CANDIDATES = 30
+
+# Keyword tokens: runs of word characters (Unicode-aware, so non-English text still matches)
+_WORD_RE = re.compile(r"\w{3,}")
+
+
+@lru_cache(maxsize=None)
+def _word_pattern(min_length: int) -> "re.Pattern[str]":
+    """Token regex for a min_length other than the default 3."""
+    return re.compile(r"\w{%d,}" % min_length)
+
 
 class MemoryEngine:
     """
@@ -34,6 +67,17 @@ class MemoryEngine:
             self.backend = SQLiteBackend()
             self.enabled = True  # Can be disabled via config
             self._embedding_engine: Optional[EmbeddingEngine] = None  # Lazy load
+            # get_context_for_prompt results, reused until the database changes or the TTL
+            # passes (0 = caching off); see memory.performance in config/memory.yaml
+            performance = load_memory_config().get("memory", {}).get("performance", {})
+            self._context_cache_ttl = (
+                float(performance.get("cache_ttl_seconds", 300)) if performance.get("cache_enabled") else 0.0
+            )
+            self._context_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+            self._context_cache_lock = threading.Lock()
+            # Query embeddings by (encoder, prompt): a retry after the conversation was stored
+            # misses the context cache but skips the model forward pass
+            self._query_embedding_cache: "OrderedDict[tuple, Any]" = OrderedDict()
             self._initialized = True
 
     @property
@@ -53,6 +97,7 @@ class MemoryEngine:
         metadata: Optional[Dict[str, Any]] = None,
         generate_embedding: bool = True,
         session_id: Optional[str] = None,
+        background: bool = False,
     ) -> int:
         """
         Store conversation to memory with optional embedding generation.
@@ -66,9 +111,10 @@ class MemoryEngine:
             metadata: Additional metadata (tokens, cost, duration, etc.)
             generate_embedding: Whether to generate and store embedding
             session_id: Optional session ID for conversation tracking (v0.11.0+)
+            background: Queue the write for the backend's batching writer thread
 
         Returns:
-            Conversation ID
+            Conversation ID (-1 if memory is disabled or the write was queued)
         """
         if not self.enabled:
             return -1
@@ -80,6 +126,8 @@ class MemoryEngine:
             "agent": agent,
             "model": model,
             "provider": provider,
+            # Keyword set for _score_keywords, extracted once here instead of on every retrieval
+            "tokens": " ".join(sorted(self._extract_keywords(prompt + " " + response))),
         }
 
         # Add session_id if provided
@@ -103,6 +151,9 @@ class MemoryEngine:
                 pass
 
         # Store to backend
+        if background:
+            self.backend.enqueue(conversation)
+            return -1
         return self.backend.store(conversation)
 
     def get_recent_conversations(
@@ -260,31 +311,92 @@ class MemoryEngine:
         if not self.enabled:
             return ""
 
-        # Query candidates from backend
+        args = (prompt, strategy, max_tokens, min_relevance, time_decay_hours,
+                exclude_current_session, agent, session_id)
+        if not self._context_cache_ttl:
+            return self._build_context(*args)
+
+        # Valid while nothing was written to the database and within the TTL (time decay
+        # drifts slowly); the prompt string itself is the key, its hash is cached by Python
+        version = (id(self.backend), self.backend.data_version())
+        now = time.monotonic()
+        with self._context_cache_lock:
+            entry = self._context_cache.get(args)
+            if entry is not None and entry[0] == version and now - entry[1] < self._context_cache_ttl:
+                self._context_cache.move_to_end(args)
+                return entry[2]
+
+        context = self._build_context(*args)
+        with self._context_cache_lock:
+            self._context_cache[args] = (version, now, context)
+            self._context_cache.move_to_end(args)
+            if len(self._context_cache) > _CONTEXT_CACHE_SIZE:
+                self._context_cache.popitem(last=False)
+        return context
+
+    def _build_context(
+        self,
+        prompt: str,
+        strategy: str,
+        max_tokens: int,
+        min_relevance: float,
+        time_decay_hours: int,
+        exclude_current_session: bool,
+        agent: Optional[str],
+        session_id: Optional[str],
+    ) -> str:
+        """Uncached get_context_for_prompt (same arguments, positional)."""
+        # Query candidates from backend. Scoring only needs stored embeddings / keyword
+        # sets, so candidates skip the prompt/response text until they survive scoring.
         exclude_session = session_id if exclude_current_session else None
-        candidates = self.backend.query_candidates(
-            agent=agent, exclude_session_id=exclude_session, limit=500
-        )
+        # Every strategy scores at most 1 * exp(-age_hours / time_decay_hours), so rows
+        # old enough for that to fall below min_relevance are never read
+        min_ts = None
+        if time_decay_hours and 0 < min_relevance <= 1:
+            min_ts = time.time() + math.log(min_relevance) * time_decay_hours * 3600
+        candidates = None
+        keywords = strategy not in ("semantic", "hybrid")
+        query_tokens = self._extract_keywords(prompt) if keywords else set()
+        if keywords and not query_tokens:
+            # No keywords (short or all-stop-word prompt): every record would score 0
+            return ""
+        if keywords and min_relevance > 0:
+            # Rows sharing no keyword with the prompt score 0 and cannot pass a positive
+            # threshold, so let FTS5 pick the matching rows (best BM25 first)
+            fts_query = self._fts_query(query_tokens)
+            if fts_query:
+                candidates = self.backend.fts_search(
+                    fts_query, agent=agent, exclude_session_id=exclude_session, limit=500, full=False,
+                    min_ts=min_ts,
+                )
+        if candidates is None:
+            candidates = self.backend.query_candidates(
+                agent=agent, exclude_session_id=exclude_session, limit=500, full=False,
+                min_ts=min_ts,
+            )
 
         if not candidates:
             return ""
 
         # Score candidates based on strategy
         if strategy == "semantic":
+            # Text is needed to embed candidates that have no stored embedding yet
+            self.backend.hydrate([rec for rec in candidates if not rec.get("embedding")])
             scored = self._score_semantic(prompt, candidates, time_decay_hours)
         elif strategy == "hybrid":
+            self.backend.hydrate(
+                [rec for rec in candidates if not rec.get("embedding") or rec.get("tokens") is None]
+            )
             scored = self._score_hybrid(prompt, candidates, time_decay_hours)
         else:  # Default: keywords
-            query_tokens = self._extract_keywords(prompt)
+            # Rows stored before the tokens column existed are scored from their text
+            self.backend.hydrate([rec for rec in candidates if rec.get("tokens") is None])
+            scores = self._score_keywords(query_tokens, candidates, time_decay_hours)
             scored = []
-            for rec in candidates:
-                score = self._score_record(
-                    rec, query_tokens, time_decay_hours=time_decay_hours
-                )
-                if score >= min_relevance:
-                    rec["_score"] = score
-                    rec["_est_tokens"] = self._estimate_tokens(rec)
-                    scored.append(rec)
+            for i in np.flatnonzero(scores >= min_relevance).tolist():
+                rec = candidates[i]
+                rec["_score"] = float(scores[i])
+                scored.append(rec)
 
         # Filter by min relevance
         scored = [r for r in scored if r.get("_score", 0) >= min_relevance]
@@ -292,148 +404,158 @@ class MemoryEngine:
         if not scored:
             return ""
 
+        # Text and token estimates only for the survivors
+        self.backend.hydrate(scored)
+        for rec, est in zip(scored, self._estimate_tokens_batch(scored)):
+            rec["_est_tokens"] = est
+
         # Sort by score DESC, then timestamp DESC
         scored.sort(
             key=lambda r: (
                 -r["_score"],
-                -self._parse_timestamp(r["timestamp"]).timestamp(),
+                -self._record_epoch(r),
             )
         )
 
         # Budget selection
-        picked = []
-        budget = max_tokens
-        for r in scored:
-            if r["_est_tokens"] <= budget:
-                picked.append(r)
-                budget -= r["_est_tokens"]
+        picked = self._select_within_budget(scored, max_tokens)
 
         if not picked:
             return ""
 
         return self._format_context(picked)
 
-    def _extract_keywords(self, text: str, min_length: int = 3) -> Set[str]:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _extract_keywords(text: str, min_length: int = 3) -> FrozenSet[str]:
         """
         Extract keywords from text (simple word extraction).
 
+        Memoized on the text; the result is immutable so cached sets can be shared.
+
         Args:
             text: Input text
             min_length: Minimum word length
 
         Returns:
-            Set of keywords
-        """
-        # Simple approach: split by space, filter short words and common words
-        stop_words = {
-            "the",
-            "a",
-            "an",
-            "and",
-            "or",
-            "but",
-            "in",
-            "on",
-            "at",
-            "to",
-            "for",
-            "of",
-            "with",
-            "by",
-            "from",
-            "as",
-            "is",
-            "was",
-            "are",
-            "were",
-            "been",
-            "be",
-            "have",
-            "has",
-            "had",
-            "do",
-            "does",
-            "did",
-            "will",
-            "would",
-            "should",
-            "could",
-            "may",
-            "might",
-            "can",
-            "this",
-            "that",
-            "these",
-            "those",
-        }
+            Frozen set of keywords
+        """
+        # One C-level pass: word runs of min_length+ characters, minus common words
+        pattern = _WORD_RE if min_length == 3 else _word_pattern(min_length)
+        return frozenset(w for w in pattern.findall(text.lower()) if w not in _STOP_WORDS)
 
-        words = text.lower().split()
-        keywords = {
-            w.strip(".,!?;:")
-            for w in words
-            if len(w) >= min_length and w.lower() not in stop_words
-        }
+    def _fts_query(self, query_tokens: Set[str]) -> str:
+        """
+        FTS5 MATCH expression for a keyword set: each keyword as a quoted
+        phrase, joined with OR (implicit AND would demand every keyword).
 
-        return keywords
+        Keywords shorter than 3 characters are dropped; the trigram index
+        cannot match them.
+        """
+        phrases = sorted('"' + tok.replace('"', '""') + '"' for tok in query_tokens if len(tok) >= 3)
+        return " OR ".join(phrases)
 
-    def _score_record(
-        self, rec: Dict[str, Any], query_tokens: Set[str], *, time_decay_hours: int
-    ) -> float:
+    def _score_keywords(
+        self,
+        query_tokens: Set[str],
+        candidates: List[Dict[str, Any]],
+        time_decay_hours: int,
+    ) -> np.ndarray:
         """
-        Calculate relevance score for a conversation record.
+        Keyword relevance scores for a whole candidate batch, as one array.
 
-        Score = keyword_overlap * exp(-age_hours / decay_hours)
+        Score = keyword_overlap * exp(-age_hours / decay_hours). Only the set
+        intersections stay per record; the overlap ratio and the time decay are
+        computed over the batch with NumPy.
 
         Args:
-            rec: Conversation record
             query_tokens: Set of query keywords
+            candidates: Candidate conversation records
             time_decay_hours: Time decay factor (0 = no decay)
 
         Returns:
-            Relevance score (0-1)
+            float64 array of relevance scores (0-1) aligned with candidates
         """
-        # Keyword overlap scoring
         if not query_tokens:
-            kw_score = 0.0
-        else:
-            doc_tokens = self._extract_keywords(rec["prompt"] + " " + rec["response"])
-            overlap = len(query_tokens & doc_tokens)
-            kw_score = overlap / max(1, len(query_tokens))
-
-        # Time decay
-        if time_decay_hours:
-            age_hours = max(
-                0.0,
-                (
-                    datetime.now(timezone.utc) - self._parse_timestamp(rec["timestamp"])
-                ).total_seconds()
-                / 3600,
-            )
-            decay = math.exp(-age_hours / float(time_decay_hours))
-        else:
-            decay = 1.0
-
-        return kw_score * decay
+            return np.zeros(len(candidates))
+        overlaps = np.fromiter(
+            (len(query_tokens & self._record_tokens(rec)) for rec in candidates),
+            dtype=np.float64,
+            count=len(candidates),
+        )
+        return overlaps / len(query_tokens) * self._decay_factors(candidates, time_decay_hours)
 
-    def _estimate_tokens(self, rec: Dict[str, Any]) -> int:
+    def _estimate_tokens_batch(self, records: List[Dict[str, Any]]) -> List[int]:
         """
-        Estimate token count for a conversation record.
+        Estimate the context token cost of each record, with one count_tokens_batch
+        call (one encoder lookup; tiktoken's threaded batch encode on multi-core hosts).
 
         Args:
-            rec: Conversation record
+            records: Conversation records
 
         Returns:
-            Estimated token count
+            Estimated token counts aligned with records
         """
-        from config.settings import count_tokens
+        return count_tokens_batch([self._estimate_text(rec) for rec in records])
 
+    @staticmethod
+    def _estimate_text(rec: Dict[str, Any]) -> str:
+        """Text whose token count stands in for a record's share of the context."""
         # Truncate response to first 300 chars to fit budget
         # (Full responses are 2000-4000 tokens, budget is only 600)
         response_snippet = rec['response'][:300] + "..." if len(rec['response']) > 300 else rec['response']
 
         # Format: "[Past conversation]\nQ: {prompt}\nA: {response_snippet}"
-        text = f"[Past conversation]\nQ: {rec['prompt']}\nA: {response_snippet}"
-        return count_tokens(text)
+        return f"[Past conversation]\nQ: {rec['prompt']}\nA: {response_snippet}"
+
+    def _select_within_budget(
+        self, scored: List[Dict[str, Any]], max_tokens: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Pick records maximizing total score within the token budget.
+
+        The top _KNAPSACK_CANDIDATES records are chosen by 0/1 knapsack (greedy
+        first-fit can spend the budget on one large record where two smaller ones
+        score more); any budget left is then filled first-fit from the rest.
+
+        Args:
+            scored: Records sorted by score, each with _score and _est_tokens
+            max_tokens: Token budget
+
+        Returns:
+            Picked records, in their sorted order
+        """
+        if max_tokens <= 0:
+            return []
+
+        # dp[b]: best total score within b tokens; take[i, b]: item i is used at dp[b]
+        head = scored[:_KNAPSACK_CANDIDATES]
+        dp = np.zeros(max_tokens + 1)
+        take = np.zeros((len(head), max_tokens + 1), dtype=bool)
+        for i, rec in enumerate(head):
+            w = rec["_est_tokens"]
+            if w > max_tokens:
+                continue
+            with_item = dp[: max_tokens + 1 - w] + rec["_score"]
+            better = with_item > dp[w:]
+            take[i, w:] = better
+            dp[w:] = np.where(better, with_item, dp[w:])
+
+        chosen = set()
+        b = max_tokens
+        for i in range(len(head) - 1, -1, -1):
+            if take[i, b]:
+                chosen.add(i)
+                b -= head[i]["_est_tokens"]
+
+        # Leftover budget (including zero-score records the DP never gains from)
+        budget = max_tokens - sum(head[i]["_est_tokens"] for i in chosen)
+        for i, rec in enumerate(scored):
+            if i not in chosen and rec["_est_tokens"] <= budget:
+                chosen.add(i)
+                budget -= rec["_est_tokens"]
+
+        return [rec for i, rec in enumerate(scored) if i in chosen]
 
     def _format_context(self, conversations: List[Dict[str, Any]]) -> str:
         """
@@ -474,13 +596,62 @@ class MemoryEngine:
         Returns:
             datetime object
         """
-        # Handle both with and without microseconds
+        # Python 3.11+ parses every ISO 8601 form we write, "Z" suffix included
         try:
-            return datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-        except Exception:
+            return datetime.fromisoformat(timestamp_str)
+        except ValueError:
             # Fallback: try without timezone
             return datetime.fromisoformat(timestamp_str.split("+")[0].split("Z")[0])
 
+    def _record_epoch(self, rec: Dict[str, Any]) -> float:
+        """
+        Unix timestamp of a record, parsed once and kept on the record as `_epoch`.
+
+        Scoring and sorting both need a record's age; caching it here keeps
+        that to a single ISO parse per record per retrieval.
+        """
+        epoch = rec.get("_epoch")
+        if epoch is None:
+            epoch = rec.get("ts_epoch")  # Stored at write time by the backend
+            if epoch is None:
+                epoch = self._parse_timestamp(rec["timestamp"]).timestamp()
+            rec["_epoch"] = epoch
+        return epoch
+
+    def _record_tokens(self, rec: Dict[str, Any]) -> FrozenSet[str]:
+        """
+        Keyword set of a record, kept on the record as `_tokens`.
+
+        Read from the stored `tokens` column; rows written before it existed
+        fall back to extracting keywords from the text.
+        """
+        tokens = rec.get("_tokens")
+        if tokens is None:
+            stored = rec.get("tokens")
+            if stored is not None:
+                tokens = frozenset(stored.split())
+            else:
+                tokens = self._extract_keywords(rec["prompt"] + " " + rec["response"])
+            rec["_tokens"] = tokens
+        return tokens
+
+    def _decay_factors(self, records: List[Dict[str, Any]], time_decay_hours: int) -> np.ndarray:
+        """
+        Time decay exp(-age_hours / time_decay_hours) for each record, as one array.
+
+        Args:
+            records: Conversation records
+            time_decay_hours: Time decay factor (0 = no decay)
+
+        Returns:
+            float64 array of decay factors aligned with records
+        """
+        if not time_decay_hours:
+            return np.ones(len(records))
+        epochs = np.fromiter((self._record_epoch(rec) for rec in records), dtype=np.float64, count=len(records))
+        age_hours = np.maximum(time.time() - epochs, 0.0) / 3600
+        return np.exp(-age_hours / time_decay_hours)
+
     def enable(self):
         """Enable memory system."""
         self.enabled = True
@@ -504,12 +675,12 @@ class MemoryEngine:
             time_decay_hours: Time decay factor
 
         Returns:
-            List of scored records with _score and _est_tokens fields
+            List of scored records with _score fields
         """
-        # Generate query embedding
-        query_embedding = self.embedding_engine.encode(prompt)
+        query_embedding = self._encode_query(prompt)
 
-        scored = []
+        records = []
+        embeddings = []
         for rec in candidates:
             # Get or generate embedding for candidate
             candidate_embedding = self._get_or_generate_embedding(rec)
@@ -517,27 +688,25 @@ class MemoryEngine:
             if candidate_embedding is None:
                 continue  # Skip if embedding unavailable
 
-            # Calculate semantic similarity
-            similarity = self.embedding_engine.cosine_similarity(
-                query_embedding, candidate_embedding
-            )
+            records.append(rec)
+            embeddings.append(candidate_embedding)
 
-            # Apply time decay
-            if time_decay_hours > 0:
-                age_hours = (
-                    datetime.now(timezone.utc)
-                    - self._parse_timestamp(rec["timestamp"])
-                ).total_seconds() / 3600
-                decay = math.exp(-age_hours / time_decay_hours)
-                score = similarity * decay
-            else:
-                score = similarity
+        if not records:
+            return []
 
+        # Cosine similarity for all candidates in one float32 matrix-vector product. New
+        # embeddings are stored unit-length; dividing by norms keeps older rows correct.
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        dots = matrix @ query
+        similarities = np.divide(dots, norms, out=np.zeros_like(dots), where=norms != 0)
+        scores = np.clip(similarities, 0.0, 1.0) * self._decay_factors(records, time_decay_hours)
+
+        for rec, score in zip(records, scores.tolist()):
             rec["_score"] = score
-            rec["_est_tokens"] = self._estimate_tokens(rec)
-            scored.append(rec)
 
-        return scored
+        return records
 
     def _score_hybrid(
         self,
@@ -554,16 +723,16 @@ class MemoryEngine:
             time_decay_hours: Time decay factor
 
         Returns:
-            List of scored records with _score and _est_tokens fields
+            List of scored records with _score fields
         """
         # Get keyword scores
         query_tokens = self._extract_keywords(prompt)
-        keyword_scores = {}
-        for rec in candidates:
-            score = self._score_record(
-                rec, query_tokens, time_decay_hours=time_decay_hours
+        keyword_scores = dict(
+            zip(
+                (rec["id"] for rec in candidates),
+                self._score_keywords(query_tokens, candidates, time_decay_hours).tolist(),
             )
-            keyword_scores[rec["id"]] = score
+        )
 
         # Get semantic scores
         semantic_scored = self._score_semantic(prompt, candidates, time_decay_hours)
@@ -580,6 +749,26 @@ class MemoryEngine:
 
         return scored
 
+    def _encode_query(self, prompt: str) -> Any:
+        """Embed a retrieval prompt, reusing the embedding of a recently seen identical prompt."""
+        if not self._context_cache_ttl:
+            return self.embedding_engine.encode(prompt)
+
+        # Keyed on the encoder object itself so a swapped model never serves stale vectors
+        key = (self.embedding_engine, prompt)
+        with self._context_cache_lock:
+            embedding = self._query_embedding_cache.get(key)
+            if embedding is not None:
+                self._query_embedding_cache.move_to_end(key)
+                return embedding
+
+        embedding = self.embedding_engine.encode(prompt)
+        with self._context_cache_lock:
+            self._query_embedding_cache[key] = embedding
+            if len(self._query_embedding_cache) > _CONTEXT_CACHE_SIZE:
+                self._query_embedding_cache.popitem(last=False)
+        return embedding
+
     def _get_or_generate_embedding(self, record: Dict[str, Any]) -> Optional[Any]:
         """
         Get embedding from record or generate if missing.
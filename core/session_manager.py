@@ -33,6 +33,9 @@ _thread_local_session = threading.local()
 # Singleton lock for thread safety
 _session_db_lock = Lock()
 
+# Allowed session_id characters (validated on every session call)
+_SESSION_ID_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+
 
 class SessionManager:
     """
@@ -199,7 +202,7 @@ class SessionManager:
             raise ValueError("session_id too long (max 64 chars)")
 
         # Allow only alphanumeric, underscore, hyphen
-        if not re.match(r'^[a-zA-Z0-9_-]+$', session_id):
+        if not _SESSION_ID_RE.match(session_id):
             raise ValueError(
                 "Invalid characters in session_id (allowed: a-z, A-Z, 0-9, _, -)"
             )
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Database migration: (Re)compute the keyword `tokens` column for all conversations.
+
+Rows stored before the column existed are still scored correctly (keywords
+are extracted from their text on every retrieval); this one-shot backfill
+lets them use the precomputed set like new rows do. Re-run it after a change
+to MemoryEngine._extract_keywords so stored sets match new queries.
+
+Usage:
+    python scripts/migrate_add_tokens.py
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.memory_engine import MemoryEngine
+
+BATCH_SIZE = 1000
+
+
+def migrate():
+    """Compute and store keyword tokens for every row."""
+    # Opening the engine applies the schema upgrade that adds the column
+    engine = MemoryEngine()
+    engine.backend.flush()
+    db_path = engine.backend.db_path
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    print("🔄 Computing 'tokens' column for existing conversations...")
+
+    try:
+        filled = 0
+        last_id = 0
+        while True:
+            cursor.execute(
+                "SELECT id, prompt, response FROM conversations WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, BATCH_SIZE),
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            cursor.executemany(
+                "UPDATE conversations SET tokens = ? WHERE id = ?",
+                [
+                    (
+                        " ".join(
+                            sorted(engine._extract_keywords(prompt + " " + response))
+                        ),
+                        conv_id,
+                    )
+                    for conv_id, prompt, response in rows
+                ],
+            )
+            conn.commit()
+            filled += len(rows)
+            last_id = rows[-1][0]
+
+        print("✅ Migration successful!")
+        print(f"   Conversations updated: {filled}")
+
+    except sqlite3.Error as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    migrate()
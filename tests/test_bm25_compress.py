@@ -0,0 +1,49 @@
+"""Test BM25 extractive compression."""
+
+from core.bm25_compress import bm25_compress, bm25_scores, split_passages
+
+
+def test_short_text_unchanged():
+    """Test text within budget is returned as-is."""
+    assert (
+        bm25_compress("Use Redis for sessions.", query="sessions", token_budget=100)
+        == "Use Redis for sessions."
+    )
+
+
+def test_keeps_most_relevant_passages_in_order():
+    """Test highest-scoring passages fill the budget and keep document order."""
+    filler = "The weather discussion is unrelated to the system design at all. " * 4
+    text = (
+        "Authentication uses JWT tokens with refresh rotation.\n\n"
+        f"{filler}\n\n"
+        "Store JWT refresh tokens in Redis with a TTL.\n\n"
+        f"{filler}"
+    )
+
+    result = bm25_compress(text, query="JWT authentication tokens", token_budget=40)
+
+    assert result == (
+        "Authentication uses JWT tokens with refresh rotation.\n\n"
+        "Store JWT refresh tokens in Redis with a TTL."
+    )
+
+
+def test_bm25_scores_rank_matching_passage_highest():
+    """Test passages containing query terms score higher."""
+    scores = bm25_scores(
+        ["postgres schema design", "frontend button colors"], "postgres schema"
+    )
+    assert scores[0] > scores[1] == 0.0
+
+
+def test_split_passages_keeps_functions_intact():
+    """Test fenced code is split on top-level def, not on blank lines inside a function."""
+    text = "Intro.\n\n```python\ndef a():\n    x = 1\n\n    return x\n\ndef b():\n    return 2\n```"
+    passages = split_passages(text)
+
+    assert passages == [
+        "Intro.",
+        "```python\ndef a():\n    x = 1\n\n    return x\n```",
+        "```python\ndef b():\n    return 2\n```",
+    ]
@@ -0,0 +1,27 @@
+"""Test rule-based pre-compression."""
+
+from core.caveman import compress
+
+
+def test_compress_strips_filler_and_hedging():
+    """Test politeness, hedging and wordy phrases are removed or shortened."""
+    text = "Sure! I think that you should basically use Redis in order to cache sessions. Please add a TTL."
+    result = compress(text)
+
+    assert result == "you should use Redis to cache sessions. add a TTL."
+
+
+def test_compress_normalizes_whitespace():
+    """Test inner space runs and blank-line runs collapse, indentation is kept."""
+    text = "Step one:   do  this\n\n\n\n  - nested item   \nHope this helps!"
+    result = compress(text)
+
+    assert result == "Step one: do this\n\n  - nested item"
+
+
+def test_compress_preserves_code_blocks():
+    """Test fenced code blocks are left untouched."""
+    code = "```python\ndef f():\n    # please   keep\n    return 1\n```"
+    result = compress(f"Basically this:\n\n{code}")
+
+    assert result == f"this:\n\n{code}"
@@ -2,10 +2,16 @@
 
 import sys
 from pathlib import Path
+from unittest.mock import patch
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from config.settings import load_agents_config
+from config.settings import (
+    count_tokens,
+    count_tokens_batch,
+    load_agents_config,
+    truncate_to_tokens,
+)
 
 
 def test_config_loads():
@@ -34,3 +40,49 @@ def test_agent_config_structure():
         assert "model" in agent_config, f"{agent_name} missing model"
         assert "system" in agent_config, f"{agent_name} missing system prompt"
         assert "description" in agent_config, f"{agent_name} missing description"
+
+
+class _CharEncoding:
+    """Stand-in tokenizer: one token per character."""
+
+    def encode(self, text):
+        return [ord(ch) for ch in text]
+
+    def decode(self, tokens):
+        return "".join(chr(token) for token in tokens)
+
+    encode_ordinary = encode
+
+    def encode_ordinary_batch(self, texts, num_threads=1):
+        return [self.encode(text) for text in texts]
+
+
+def test_truncate_to_tokens_keeps_whole_words():
+    """Test truncation slices the token list once and backs off to a word boundary."""
+    with patch("config.settings._tiktoken_encoding", _CharEncoding()):
+        text = "alpha beta\ngamma delta"
+        assert truncate_to_tokens(text, 100) is text
+        assert truncate_to_tokens(text, 13) == "alpha beta"
+        assert truncate_to_tokens(text, 16) == "alpha beta\ngamma"
+
+
+def test_count_tokens_batch_matches_inputs():
+    """Test batch counting returns one count per text, in order."""
+    with patch("config.settings._tiktoken_encoding", _CharEncoding()):
+        assert count_tokens_batch(["ab", "", "abcd"]) == [2, 0, 4]
+        assert count_tokens_batch([]) == []
+
+
+def test_count_tokens_treats_special_tokens_as_text():
+    """Test stored text containing a special token is counted, not rejected."""
+    import tiktoken
+
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={"<|endoftext|>": 256},
+    )
+    with patch("config.settings._tiktoken_encoding", encoding):
+        assert count_tokens("a <|endoftext|> b") == len("a <|endoftext|> b")
+        assert count_tokens_batch(["<|endoftext|>"]) == [13]
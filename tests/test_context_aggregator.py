@@ -87,6 +87,54 @@ class TestGetSessionConversations:
         assert ids == sorted(ids, reverse=True)
 
 
+class TestGetKnowledgeConversations:
+    """Tests for _get_knowledge_conversations."""
+
+    def test_excludes_current_session(self, aggregator, backend):
+        backend.store({**make_conversation(1, session_id="sess-A"), "prompt": "deploy the api"})
+        backend.store({**make_conversation(2, session_id="sess-B"), "prompt": "deploy the worker"})
+        result = aggregator._get_knowledge_conversations("deploy the api", "sess-A", {})
+        assert [c["session_id"] for c in result] == ["sess-B"]
+
+    def test_fallback_skips_current_session(self, aggregator, backend):
+        backend.store(make_conversation(1, session_id="sess-B"))
+        backend.store(make_conversation(2, session_id="sess-A"))
+        result = aggregator._get_knowledge_conversations("unrelated words", "sess-A", {})
+        assert len(result) == 1
+        assert result[0]["session_id"] == "sess-B"
+        assert result[0]["_score"] == 0.05
+
+
+class TestFormatWithinBudget:
+    """Tests for building context blocks that already fit their token budget."""
+
+    @staticmethod
+    def _char_tokens(texts):
+        return [len(text) for text in texts]
+
+    def test_session_keeps_newest_messages_that_fit(self, aggregator):
+        conversations = [  # Most recent first
+            {"prompt": f"Question {i}", "response": "x" * 40} for i in (4, 3, 2, 1, 0)
+        ]
+        with patch("core.context_aggregator.count_tokens_batch", side_effect=self._char_tokens):
+            text, tokens, count = aggregator._format_session_context(conversations, max_tokens=240)
+
+        assert count == 2
+        assert tokens <= 240
+        assert "Question 4" in text and "Question 3" in text
+        assert "Question 2" not in text
+        assert text.index("Question 3") < text.index("Question 4")  # Chronological
+
+    def test_single_oversized_message_is_kept_for_truncation(self, aggregator):
+        conversations = [{"prompt": "Big", "response": "y" * 300}]
+        with patch("core.context_aggregator.count_tokens_batch", side_effect=self._char_tokens):
+            text, tokens, count = aggregator._format_session_context(conversations, max_tokens=50)
+
+        assert count == 1
+        assert tokens > 50
+        assert "Big" in text
+
+
 class TestTokenBudget:
     """Tests for _apply_token_budget_with_priority."""
 
@@ -146,6 +194,11 @@ class TestFormatMessageAge:
         age = aggregator._calculate_message_age(ts)
         assert "hour" in age
 
+    def test_stored_epoch_skips_timestamp_parsing(self, aggregator):
+        import time
+        age = aggregator._calculate_message_age("not-a-date", epoch=time.time() - 2 * 86400)
+        assert age == "2 days ago"
+
     def test_invalid_timestamp_returns_unknown(self, aggregator):
         age = aggregator._calculate_message_age("not-a-date")
         assert age == "unknown age"
@@ -187,6 +240,26 @@ class TestGetFullContext:
         # Some context should be returned
         assert meta.get("total_context_tokens", 0) > 0 or context != ""
 
+    def test_knowledge_lookup_overlaps_session_read(self, aggregator):
+        import threading
+
+        threads = {}
+
+        def record(name, result):
+            def lookup(*args, **kwargs):
+                threads[name] = threading.current_thread().name
+                return result
+            return lookup
+
+        config = self._agent_config()
+        config["knowledge_context"]["enabled"] = True
+        with patch.object(aggregator, "_get_session_conversations", side_effect=record("session", [])), \
+                patch.object(aggregator, "_get_knowledge_conversations", side_effect=record("knowledge", [])):
+            aggregator.get_full_context(prompt="q", session_id="sess-X", config=config)
+
+        assert threads["session"] == threading.current_thread().name
+        assert threads["knowledge"].startswith("context-lookup")
+
     def test_metadata_has_expected_keys(self, aggregator):
         context, meta = aggregator.get_full_context(
             prompt="test",
@@ -0,0 +1,267 @@
+"""Test LLM response cache."""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from core.llm_cache import (
+    LLMCache,
+    MemoryLRU,
+    SemanticLLMCache,
+    SQLiteLRU,
+    create_llm_cache,
+    create_semantic_llm_cache,
+)
+from core.llm_connector import LLMConnector
+
+
+def _mock_completion_response(text: str) -> MagicMock:
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock()]
+    mock_response.choices[0].message.content = text
+    mock_response.usage.prompt_tokens = 10
+    mock_response.usage.completion_tokens = 20
+    mock_response.usage.total_tokens = 30
+    return mock_response
+
+
+def _letter_counts(text: str) -> np.ndarray:
+    """Toy embedding: a-z letter histogram (similar wording -> similar vector)."""
+    vector = np.zeros(26)
+    for char in text.lower():
+        if "a" <= char <= "z":
+            vector[ord(char) - ord("a")] += 1
+    return vector
+
+
+def test_memory_lru_evicts_least_recently_used():
+    """Test LRU eviction keeps recently read entries."""
+    store = MemoryLRU(maxsize=2)
+    store.set("a", 1, ttl_seconds=60)
+    store.set("b", 2, ttl_seconds=60)
+    assert store.get("a") == 1  # "a" is now most recently used
+
+    store.set("c", 3, ttl_seconds=60)
+
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert store.get("c") == 3
+
+
+def test_memory_lru_expires_entries():
+    """Test entries past their TTL are not returned."""
+    store = MemoryLRU(maxsize=10)
+    store.set("a", 1, ttl_seconds=-1)
+    assert store.get("a") is None
+    assert len(store) == 0
+
+
+def test_sqlite_lru_persists_across_instances_and_evicts(tmp_path):
+    """Test the SQLite store survives reopening and keeps recently read entries."""
+    db_path = tmp_path / "llm_cache.db"
+    store = SQLiteLRU(db_path, maxsize=2)
+    store.set("a", {"text": "one"}, ttl_seconds=60)
+    store.set("b", {"text": "two"}, ttl_seconds=60)
+    assert store.get("a") == {"text": "one"}  # "a" is now most recently used
+    store.set("c", {"text": "three"}, ttl_seconds=60)
+
+    reopened = SQLiteLRU(db_path, maxsize=2)
+    assert reopened.get("b") is None
+    assert reopened.get("a") == {"text": "one"}
+    assert reopened.get("c") == {"text": "three"}
+
+    reopened.set(
+        "d", {"text": "four"}, ttl_seconds=-1
+    )  # evicts "a", then expires on read
+    assert reopened.get("d") is None
+    assert len(reopened) == 1
+
+
+def test_cache_key_skips_high_temperature():
+    """Test only near-deterministic calls are cacheable."""
+    cache = LLMCache(max_temperature=0.1)
+
+    assert cache.cache_key("openai/gpt-4o", "sys", "user", 0.7, 100) is None
+
+    key = cache.cache_key("openai/gpt-4o", "sys", "user", 0.1, 100)
+    assert key == cache.cache_key("openai/gpt-4o", "sys", "user", 0.1, 100)
+    assert key != cache.cache_key("openai/gpt-4o", "sys", "other user", 0.1, 100)
+
+
+def test_create_llm_cache_disabled():
+    """Test cache is not created when disabled in config."""
+    assert create_llm_cache(None) is None
+    assert create_llm_cache({"enabled": False}) is None
+    assert isinstance(create_llm_cache({"enabled": True}), LLMCache)
+
+
+def test_create_llm_cache_sqlite_backend(tmp_path):
+    """Test the sqlite backend option builds a persistent store."""
+    cache = create_llm_cache(
+        {"enabled": True, "backend": "sqlite", "db_path": str(tmp_path / "cache.db")}
+    )
+    assert isinstance(cache.backend, SQLiteLRU)
+    assert (tmp_path / "cache.db").exists()
+
+
+@patch("core.llm_connector.is_provider_enabled", return_value=True)
+@patch("core.llm_connector.litellm.completion")
+def test_connector_serves_repeat_call_from_cache(mock_completion, mock_enabled):
+    """Test identical deterministic call skips the provider on the second request."""
+    mock_completion.return_value = _mock_completion_response("builder")
+    connector = LLMConnector(retry_count=0, cache=LLMCache())
+
+    first = connector.call(
+        model="gemini/gemini-2.5-flash",
+        system="route",
+        user="Build API",
+        temperature=0.1,
+    )
+    second = connector.call(
+        model="gemini/gemini-2.5-flash",
+        system="route",
+        user="Build API",
+        temperature=0.1,
+    )
+
+    assert mock_completion.call_count == 1
+    assert first.cached is False
+    assert second.cached is True
+    assert second.text == "builder"
+    assert second.total_tokens == 30
+
+
+@patch("core.llm_connector.is_provider_enabled", return_value=True)
+@patch("core.llm_connector.litellm.completion")
+def test_connector_does_not_cache_errors(mock_completion, mock_enabled):
+    """Test failed calls are not cached."""
+    mock_completion.side_effect = Exception("Rate limit exceeded")
+    connector = LLMConnector(retry_count=0, cache=LLMCache())
+
+    connector.call(model="openai/gpt-4o-mini", system="s", user="u", temperature=0.0)
+    connector.call(model="openai/gpt-4o-mini", system="s", user="u", temperature=0.0)
+
+    assert mock_completion.call_count == 2
+    assert len(connector.cache.backend) == 0
+
+
+def test_semantic_cache_hits_near_duplicate_prompt_in_same_scope():
+    """Test a reworded prompt hits, while another system prompt or an unrelated prompt misses."""
+    cache = SemanticLLMCache(encode=_letter_counts, threshold=0.9)
+    key = cache.cache_key("openai/gpt-4o", "sys", "Build a REST API", 0.0, 100)
+    cache.set(key, {"text": "api"})
+
+    assert cache.get(
+        cache.cache_key("openai/gpt-4o", "sys", "Build a REST API!", 0.0, 100)
+    ) == {"text": "api"}
+    assert (
+        cache.get(
+            cache.cache_key("openai/gpt-4o", "other", "Build a REST API", 0.0, 100)
+        )
+        is None
+    )
+    assert (
+        cache.get(cache.cache_key("openai/gpt-4o", "sys", "zzz qqq", 0.0, 100)) is None
+    )
+    assert cache.cache_key("openai/gpt-4o", "sys", "Build a REST API", 0.7, 100) is None
+
+
+def test_semantic_cache_overwrites_near_duplicates_and_evicts_lru():
+    """Test near-duplicate stores replace the entry and the least recently used entry is evicted."""
+    cache = SemanticLLMCache(encode=_letter_counts, maxsize=2, threshold=0.99)
+    cache.set(cache.cache_key("m", "s", "aaaa", 0.0, 10), {"text": "1"})
+    cache.set(cache.cache_key("m", "s", "aaaa", 0.0, 10), {"text": "2"})
+    assert len(cache) == 1
+
+    cache.set(cache.cache_key("m", "s", "bbbb", 0.0, 10), {"text": "b"})
+    assert cache.get(cache.cache_key("m", "s", "aaaa", 0.0, 10)) == {"text": "2"}
+    cache.set(cache.cache_key("m", "s", "cccc", 0.0, 10), {"text": "c"})
+
+    assert cache.get(cache.cache_key("m", "s", "bbbb", 0.0, 10)) is None
+    assert cache.get(cache.cache_key("m", "s", "aaaa", 0.0, 10)) == {"text": "2"}
+    assert cache.get(cache.cache_key("m", "s", "cccc", 0.0, 10)) == {"text": "c"}
+
+
+def test_semantic_cache_drops_expired_rows_and_keeps_the_rest_aligned():
+    """Test expiring an early entry leaves later entries matched to their own responses."""
+    cache = SemanticLLMCache(encode=_letter_counts, threshold=0.99)
+    cache.set(cache.cache_key("m", "s", "aaaa", 0.0, 10), {"text": "a"})
+    cache.set(cache.cache_key("m", "other", "bbbb", 0.0, 10), {"text": "b"})
+    cache.set(cache.cache_key("m", "s", "cccc", 0.0, 10), {"text": "c"})
+    cache._expires_at[0] = 0.0  # expire "aaaa"
+
+    assert cache.get(cache.cache_key("m", "s", "aaaa", 0.0, 10)) is None
+    assert len(cache) == 2
+    assert cache.get(cache.cache_key("m", "other", "bbbb", 0.0, 10)) == {"text": "b"}
+    assert cache.get(cache.cache_key("m", "s", "cccc", 0.0, 10)) == {"text": "c"}
+    assert cache.get(cache.cache_key("m", "s", "bbbb", 0.0, 10)) is None
+
+
+def test_create_semantic_llm_cache_disabled_by_default():
+    """Test the semantic cache is opt-in."""
+    assert create_semantic_llm_cache(None) is None
+    assert isinstance(create_semantic_llm_cache({"enabled": True}), SemanticLLMCache)
+
+
+@patch("core.llm_connector.is_provider_enabled", return_value=True)
+@patch("core.llm_connector.litellm.completion")
+def test_connector_serves_reworded_call_from_semantic_cache(
+    mock_completion, mock_enabled
+):
+    """Test a near-identical deterministic call is answered from the semantic cache."""
+    mock_completion.return_value = _mock_completion_response("builder")
+    connector = LLMConnector(
+        retry_count=0,
+        semantic_cache=SemanticLLMCache(encode=_letter_counts, threshold=0.9),
+    )
+
+    first = connector.call(
+        model="gemini/gemini-2.5-flash",
+        system="route",
+        user="Build API",
+        temperature=0.1,
+    )
+    second = connector.call(
+        model="gemini/gemini-2.5-flash",
+        system="route",
+        user="Build API.",
+        temperature=0.1,
+    )
+
+    assert mock_completion.call_count == 1
+    assert first.cached is False
+    assert second.cached is True
+    assert second.text == "builder"
+
+
+@patch("core.llm_connector.is_provider_enabled", return_value=True)
+@patch("core.llm_connector.litellm.completion")
+def test_connector_reuses_caller_prompt_embedding(mock_completion, mock_enabled):
+    """Test a precomputed prompt embedding is used instead of re-encoding the prompt."""
+    mock_completion.return_value = _mock_completion_response("builder")
+    encode = MagicMock(side_effect=_letter_counts)
+    connector = LLMConnector(
+        retry_count=0, semantic_cache=SemanticLLMCache(encode=encode)
+    )
+
+    connector.call(
+        model="gemini/gemini-2.5-flash",
+        system="route",
+        user="Build API",
+        temperature=0.1,
+        prompt_embedding=_letter_counts("Build API"),
+    )
+
+    encode.assert_not_called()
+    assert len(connector.semantic_cache) == 1
+
+
+def test_cache_key_fields_cannot_run_together():
+    """Test moving text between system and user prompts changes the key."""
+    cache = LLMCache()
+    assert cache.cache_key("m", "ab", "c", 0.0, 10) != cache.cache_key(
+        "m", "a", "bc", 0.0, 10
+    )
+    assert cache.cache_key("m", "s", "u", 0.0, 10, ["x"]) != cache.cache_key(
+        "m", "s", "u", 0.0, 10
+    )
@@ -1,7 +1,8 @@
 """Test LLMConnector fallback logic."""
 
+import asyncio
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 
 from core.llm_connector import LLMConnector
@@ -157,6 +158,143 @@ class TestLLMConnectorFallback:
         assert result.text == ""
         assert result.error is not None
 
+    @patch("core.llm_connector.is_provider_enabled")
+    @patch("core.llm_connector.litellm.acompletion", new_callable=AsyncMock)
+    def test_acall_primary_disabled_fallback_succeeds(
+        self, mock_acompletion, mock_enabled
+    ):
+        """Test async call applies the same fallback logic as call()."""
+        mock_enabled.side_effect = lambda provider: provider == "openai"
+
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "Async fallback response"
+        mock_response.usage.prompt_tokens = 10
+        mock_response.usage.completion_tokens = 20
+        mock_response.usage.total_tokens = 30
+        mock_acompletion.return_value = mock_response
+
+        result = asyncio.run(
+            self.connector.acall(
+                model="anthropic/claude-3-5-sonnet-20241022",
+                system="Test system",
+                user="Test user",
+                fallback_order=["openai/gpt-4o-mini"],
+            )
+        )
+
+        assert result.model == "openai/gpt-4o-mini"
+        assert result.text == "Async fallback response"
+        assert result.original_model == "anthropic/claude-3-5-sonnet-20241022"
+        assert mock_acompletion.await_count == 1
+
+    @patch("core.llm_connector.is_provider_enabled", return_value=True)
+    @patch("core.llm_connector.litellm.acompletion", new_callable=AsyncMock)
+    def test_acall_races_fallbacks_after_primary_failure(
+        self, mock_acompletion, mock_enabled
+    ):
+        """Test race_fallbacks returns the fastest fallback and cancels the others."""
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "Fast fallback"
+        mock_response.usage.prompt_tokens = 10
+        mock_response.usage.completion_tokens = 20
+        mock_response.usage.total_tokens = 30
+        slow_cancelled = []
+
+        async def acompletion(model, **kwargs):
+            if model.startswith("anthropic/"):
+                raise Exception("Internal server error")
+            if model.startswith("openai/"):
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    slow_cancelled.append(model)
+                    raise
+            return mock_response
+
+        mock_acompletion.side_effect = acompletion
+        connector = LLMConnector(retry_count=0, race_fallbacks=True)
+
+        result = asyncio.run(
+            connector.acall(
+                model="anthropic/claude-3-5-sonnet-20241022",
+                system="Test system",
+                user="Test user",
+                fallback_order=["openai/gpt-4o-mini", "gemini/gemini-2.5-pro"],
+            )
+        )
+
+        assert result.model == "gemini/gemini-2.5-pro"
+        assert result.text == "Fast fallback"
+        assert result.original_model == "anthropic/claude-3-5-sonnet-20241022"
+        assert "Internal server error" in result.fallback_reason
+        assert slow_cancelled == ["openai/gpt-4o-mini"]
+
+    @patch("core.llm_connector.is_provider_enabled", return_value=True)
+    @patch("core.llm_connector.litellm.completion")
+    def test_call_hedges_slow_primary(self, mock_completion, mock_enabled):
+        """Test a primary slower than hedge_ms races the first fallback, and a fast one does not."""
+        import threading
+
+        release_primary = threading.Event()
+
+        def completion(model, **kwargs):
+            if model.startswith("anthropic/"):
+                release_primary.wait(5)
+            response = MagicMock()
+            response.choices = [MagicMock()]
+            response.choices[0].message.content = f"from {model}"
+            response.usage.prompt_tokens = 10
+            response.usage.completion_tokens = 20
+            response.usage.total_tokens = 30
+            return response
+
+        mock_completion.side_effect = completion
+        connector = LLMConnector(retry_count=0, hedge_ms=20)
+
+        try:
+            result = connector.call(
+                model="anthropic/claude-3-5-sonnet-20241022",
+                system="s",
+                user="u",
+                fallback_order=["openai/gpt-4o-mini", "gemini/gemini-2.5-pro"],
+            )
+        finally:
+            release_primary.set()
+
+        assert result.model == "openai/gpt-4o-mini"
+        assert result.original_model == "anthropic/claude-3-5-sonnet-20241022"
+        assert "hedge" in result.fallback_reason
+
+        mock_completion.reset_mock()
+        result = connector.call(
+            model="anthropic/claude-3-5-sonnet-20241022",
+            system="s",
+            user="u",
+            fallback_order=["openai/gpt-4o-mini"],
+            hedge_ms=1000,
+        )
+        assert result.model == "anthropic/claude-3-5-sonnet-20241022"
+        assert mock_completion.call_count == 1
+
+    @patch("core.llm_connector.is_provider_enabled", return_value=False)
+    def test_acall_race_all_failed(self, mock_enabled):
+        """Test a race with no success ends in the usual all-failed error."""
+        connector = LLMConnector(retry_count=0, race_fallbacks=True)
+
+        result = asyncio.run(
+            connector.acall(
+                model="anthropic/claude-3-5-sonnet-20241022",
+                system="s",
+                user="u",
+                fallback_order=["openai/gpt-4o-mini", "gemini/gemini-2.5-pro"],
+            )
+        )
+
+        assert result.text == ""
+        assert result.error is not None
+
     @patch.dict(os.environ, {"DISABLE_ANTHROPIC": "1"}, clear=False)
     def test_feature_flag_disables_provider(self):
         """Test DISABLE_ANTHROPIC environment variable."""
@@ -180,3 +318,164 @@ class TestLLMConnectorFallback:
         assert "openai" in available
         assert "google" in available
         assert "anthropic" not in available
+
+
+def test_build_messages_marks_anthropic_system_prompt_cacheable():
+    """Test Anthropic system prompt carries a cache_control breakpoint; others stay plain."""
+    connector = LLMConnector()
+
+    anthropic_messages = connector._build_messages(
+        "anthropic/claude-sonnet-4-5", "system text", "user text"
+    )
+    system_content = anthropic_messages[0]["content"]
+    assert system_content[0]["text"] == "system text"
+    assert system_content[0]["cache_control"] == {"type": "ephemeral"}
+    assert anthropic_messages[1] == {"role": "user", "content": "user text"}
+
+    openai_messages = connector._build_messages(
+        "openai/gpt-4o-mini", "system text", "user text"
+    )
+    assert openai_messages[0] == {"role": "system", "content": "system text"}
+
+
+def test_connectors_share_one_http_client():
+    """Test every connector reuses the same pooled LiteLLM HTTP session."""
+    import httpx
+    import litellm
+
+    LLMConnector()
+    first_client = litellm.client_session
+    LLMConnector()
+
+    assert isinstance(first_client, httpx.Client)
+    assert litellm.client_session is first_client
+
+
+def _stream_chunks(*deltas):
+    from litellm.types.utils import Delta, ModelResponseStream, StreamingChoices
+
+    return [
+        ModelResponseStream(
+            model="openai/gpt-4o-mini",
+            choices=[StreamingChoices(index=0, delta=Delta(content=delta))],
+        )
+        for delta in deltas
+    ]
+
+
+@patch("core.llm_connector.is_provider_enabled", return_value=True)
+@patch("core.llm_connector.litellm.completion")
+def test_stream_yields_deltas_then_final_response(mock_completion, mock_enabled):
+    """Test stream() yields text as it arrives and ends with the full LLMResponse."""
+    mock_completion.return_value = iter(_stream_chunks("Hello ", "world\n", "done"))
+    connector = LLMConnector(retry_count=0)
+
+    events = list(connector.stream(model="openai/gpt-4o-mini", system="s", user="u"))
+
+    assert [delta for delta, final in events if final is None] == [
+        "Hello ",
+        "world\n",
+        "done",
+    ]
+    final = events[-1][1]
+    assert final.text == "Hello world\ndone"
+    assert final.error is None
+    assert 0 <= final.time_to_first_token_ms <= final.duration_ms
+    assert mock_completion.call_args.kwargs["stream"] is True
+
+
+@patch("core.llm_connector.is_provider_enabled", return_value=True)
+@patch("core.llm_connector.litellm.completion")
+def test_stream_stop_when_ends_generation_early(mock_completion, mock_enabled):
+    """Test stop_when is checked on completed lines and stops reading the stream."""
+    mock_completion.return_value = iter(
+        _stream_chunks("line 1\n", "line 2\n", "line 3\n")
+    )
+    connector = LLMConnector(retry_count=0)
+
+    events = list(
+        connector.stream(
+            model="openai/gpt-4o-mini",
+            system="s",
+            user="u",
+            stop_when=lambda text: "line 2" in text,
+        )
+    )
+
+    assert events[-1][1].text == "line 1\nline 2\n"
+
+
+@patch("core.llm_connector.is_provider_enabled", return_value=True)
+@patch("core.llm_connector.litellm.completion")
+def test_stream_falls_back_before_first_delta(mock_completion, mock_enabled):
+    """Test a primary model that fails before streaming anything falls back."""
+    mock_completion.side_effect = [
+        Exception("Rate limit exceeded"),
+        iter(_stream_chunks("fallback text")),
+    ]
+    connector = LLMConnector(retry_count=0)
+
+    events = list(
+        connector.stream(
+            model="anthropic/claude-sonnet-4-5",
+            system="s",
+            user="u",
+            fallback_order=["openai/gpt-4o-mini"],
+        )
+    )
+
+    final = events[-1][1]
+    assert final.text == "fallback text"
+    assert final.original_model == "anthropic/claude-sonnet-4-5"
+
+
+@patch("core.llm_connector.time.sleep")
+@patch("core.llm_connector.is_provider_enabled", return_value=True)
+@patch("core.llm_connector.litellm.completion")
+def test_retry_skips_permanent_errors_and_backs_off_on_rate_limits(
+    mock_completion, mock_enabled, mock_sleep
+):
+    """Test a 400 is not retried, while a 429 is retried after a short jittered backoff."""
+    import litellm
+
+    connector = LLMConnector(retry_count=1)
+
+    mock_completion.side_effect = litellm.BadRequestError(
+        "bad request", model="gpt-4o-mini", llm_provider="openai"
+    )
+    result = connector.call(model="openai/gpt-4o-mini", system="s", user="u")
+    assert mock_completion.call_count == 1
+    assert "after 1 attempts" in result.error
+    mock_sleep.assert_not_called()
+
+    mock_completion.reset_mock()
+    mock_completion.side_effect = litellm.RateLimitError(
+        "slow down", model="gpt-4o-mini", llm_provider="openai"
+    )
+    connector.call(model="openai/gpt-4o-mini", system="s", user="u")
+    assert mock_completion.call_count == 2
+    (delay,), _ = mock_sleep.call_args
+    assert 0.08 <= delay <= 0.12
+
+
+def test_retry_delay_honors_retry_after_header():
+    """Test a provider Retry-After sets the wait, and one too long gives up on the model."""
+    import httpx
+    import litellm
+
+    from core.llm_connector import _retry_delay
+
+    def rate_limited(retry_after):
+        response = httpx.Response(
+            429,
+            headers={"retry-after": retry_after},
+            request=httpx.Request("POST", "http://x"),
+        )
+        return litellm.RateLimitError(
+            "slow down", model="m", llm_provider="openai", response=response
+        )
+
+    assert _retry_delay(rate_limited("2"), attempt=0) == 2.0
+    assert _retry_delay(rate_limited("120"), attempt=0) is None
+    # Date in the past
+    assert _retry_delay(rate_limited("Wed, 21 Oct 2015 07:28:00 GMT"), attempt=0) == 0.0
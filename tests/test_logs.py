@@ -18,6 +18,15 @@ def test_mask_api_keys():
     assert "***MASKED***" in masked
 
 
+def test_mask_provider_labels_and_clean_text():
+    """Test prefixed key labels keep the label, and text without markers is returned as-is."""
+    masked = mask_sensitive_data("ANTHROPIC_API_KEY: abc\napi-key=sk-abcdefgh12")
+
+    assert masked == "ANTHROPIC_API_KEY: ***MASKED***\napi-key=***MASKED***"
+    clean = "Build a REST API for users"
+    assert mask_sensitive_data(clean) is clean
+
+
 def test_write_json_creates_file():
     """Test that write_json creates a file."""
     record = {
@@ -70,3 +79,84 @@ def test_write_json_masks_sensitive_data():
 
     # Cleanup
     filepath.unlink()
+
+
+def test_write_json_preserves_unicode():
+    """Test non-ASCII text is written as readable UTF-8 JSON."""
+    record = {
+        "agent": "builder",
+        "prompt": "Kimlik doğrulama sistemi tasarla",
+        "response": "Tamam ✅",
+    }
+
+    filepath = write_json(record)
+
+    import json
+
+    raw = filepath.read_text(encoding="utf-8")
+    assert "doğrulama" in raw
+    assert json.loads(raw)["response"] == "Tamam ✅"
+
+    # Cleanup
+    filepath.unlink()
+
+
+def test_read_logs_and_metrics_index(tmp_path):
+    """Test read_logs returns the newest files and get_metrics backfills then appends its index."""
+    import os
+    from unittest.mock import patch
+
+    from core.logging_utils import get_metrics, read_logs
+
+    with patch("core.logging_utils.CONVERSATIONS_DIR", tmp_path):
+        for i, agent in enumerate(["builder", "critic", "builder"]):
+            path = write_json(
+                {
+                    "agent": agent,
+                    "total_tokens": 10,
+                    "duration_ms": 100.0,
+                    "prompt": "p",
+                }
+            )
+            os.utime(path, (1000 + i, 1000 + i))
+
+        assert [log["agent"] for log in read_logs(limit=2)] == ["builder", "critic"]
+        assert get_metrics()["total_requests"] == 3
+
+        write_json({"agent": "closer", "total_tokens": 5, "duration_ms": 300.0})
+        metrics = get_metrics()
+
+    assert (tmp_path / ".metrics.ndjson").exists()
+    assert metrics["total_requests"] == 4
+    assert metrics["total_tokens"] == 35
+    assert metrics["avg_duration_ms"] == 150.0
+    assert metrics["agents_used"] == {"builder": 2, "critic": 1, "closer": 1}
+
+
+def test_metrics_follow_log_directory(tmp_path):
+    """Test get_metrics drops deleted logs and picks up logs the index never saw."""
+    import json
+    from unittest.mock import patch
+
+    from core.logging_utils import get_metrics
+
+    with patch("core.logging_utils.CONVERSATIONS_DIR", tmp_path):
+        paths = [write_json({"agent": "builder", "total_tokens": 10}) for _ in range(3)]
+        assert get_metrics()["total_tokens"] == 30
+
+        for path in paths[1:]:
+            path.unlink()
+        assert get_metrics()["total_tokens"] == 10
+
+        # Written around the index (another process, or before it existed)
+        (tmp_path / "external.json").write_text(
+            json.dumps({"agent": "critic", "total_tokens": 7})
+        )
+        metrics = get_metrics()
+        assert metrics["total_tokens"] == 17
+        assert metrics["agents_used"] == {"builder": 1, "critic": 1}
+
+        paths[0].unlink()
+        (tmp_path / "external.json").unlink()
+        assert get_metrics()["total_requests"] == 0
+        assert (tmp_path / ".metrics.ndjson").read_bytes() == b""
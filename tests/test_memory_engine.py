@@ -2,7 +2,9 @@
 
 import tempfile
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 from core.memory_backend import SQLiteBackend
@@ -42,6 +44,95 @@ class TestSQLiteBackend:
 
         conn.close()
 
+    def test_connection_reused_with_pragmas(self, temp_db):
+        """Test the thread-local connection is tuned once and reopened after a close."""
+        backend = SQLiteBackend(temp_db)
+        conn = backend._get_connection()
+
+        assert backend._get_connection() is conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+        conn.close()
+        reopened = backend._get_connection()
+        assert reopened is not conn
+        assert reopened.execute("SELECT COUNT(*) FROM conversations").fetchone()[0] == 0
+
+    def test_session_query_uses_index_without_sort(self, temp_db):
+        """Test the session-history query is an index range scan with no temp B-tree sort."""
+        from core.memory_backend import _SESSION_SQL
+
+        backend = SQLiteBackend(temp_db)
+        conn = backend._get_connection()
+        plan = " ".join(
+            row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + _SESSION_SQL, ("s", 5))
+        )
+
+        assert "idx_sess_ts" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_agent_query_uses_composite_index_without_sort(self, temp_db):
+        """Test agent-filtered candidate queries walk idx_agent_ts instead of sorting."""
+        backend = SQLiteBackend(temp_db)
+        conn = backend._get_connection()
+        plan = " ".join(
+            row[3]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM conversations WHERE agent = ? "
+                "ORDER BY timestamp DESC LIMIT 500",
+                ("builder",),
+            )
+        )
+
+        assert "idx_agent_ts" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_ts_epoch_stored_and_backfilled(self, temp_db):
+        """Test ts_epoch is written on store and backfilled for databases that predate it."""
+        import sqlite3
+        from datetime import datetime
+
+        conn = sqlite3.connect(temp_db)
+        conn.execute(
+            "CREATE TABLE conversations (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME, "
+            "agent TEXT NOT NULL, model TEXT NOT NULL, provider TEXT NOT NULL, prompt TEXT NOT NULL, "
+            "response TEXT NOT NULL, duration_ms REAL, prompt_tokens INTEGER, completion_tokens INTEGER, "
+            "total_tokens INTEGER, cost_usd REAL, fallback_used BOOLEAN DEFAULT 0, original_model TEXT, "
+            "fallback_reason TEXT, session_id TEXT, tags TEXT, error TEXT)"
+        )
+        conn.execute(
+            "INSERT INTO conversations (timestamp, agent, model, provider, prompt, response) "
+            "VALUES ('2026-01-02T03:04:05+00:00', 'builder', 'm', 'p', 'old', 'r')"
+        )
+        conn.commit()
+        conn.close()
+
+        backend = SQLiteBackend(temp_db)
+        new_id = backend.store(
+            {"timestamp": "2026-01-02T03:04:05+00:00", "agent": "builder", "prompt": "new", "response": "r"}
+        )
+
+        expected = datetime.fromisoformat("2026-01-02T03:04:05+00:00").timestamp()
+        old, new = backend.get_by_id(1), backend.get_by_id(new_id)
+        assert old["ts_epoch"] == pytest.approx(expected, abs=0.01)
+        assert new["ts_epoch"] == expected
+
+    def test_store_many_and_queued_writes(self, temp_db):
+        """Test batched stores return ids in order and queued writes are visible to reads."""
+        backend = SQLiteBackend(temp_db)
+        ids = backend.store_many(
+            [{"agent": "builder", "prompt": f"p{i}", "response": "r", "session_id": "s"} for i in range(3)]
+        )
+        assert ids == sorted(ids) and len(set(ids)) == 3
+        assert backend.get_by_id(ids[1])["prompt"] == "p1"
+
+        for i in range(3, 5):
+            backend.enqueue({"agent": "critic", "prompt": f"p{i}", "response": "r", "session_id": "s"})
+
+        # Reads flush the write queue first
+        session = backend.get_session_conversations("s", limit=10)
+        assert {conv["prompt"] for conv in session} == {f"p{i}" for i in range(5)}
+
     def test_store_conversation(self, temp_db):
         """Test storing a conversation."""
         backend = SQLiteBackend(temp_db)
@@ -54,6 +145,7 @@ class TestSQLiteBackend:
             "response": "Test response",
             "total_tokens": 100,
             "cost_usd": 0.01,
+            "tags": ["api", "café"],
         }
 
         row_id = backend.store(conversation)
@@ -65,6 +157,7 @@ class TestSQLiteBackend:
         assert stored["agent"] == "builder"
         assert stored["prompt"] == "Test prompt"
         assert stored["total_tokens"] == 100
+        assert stored["tags"] == ["api", "café"]
 
     def test_get_recent(self, temp_db):
         """Test retrieving recent conversations."""
@@ -149,6 +242,89 @@ class TestSQLiteBackend:
         results = backend.search(query="code")
         assert len(results) == 2  # Both have "code" in response
 
+    def test_search_fts_matches_like_semantics(self, temp_db):
+        """Test the FTS index matches substrings case-insensitively and follows deletes and backfill."""
+        import sqlite3
+
+        backend = SQLiteBackend(temp_db)
+        assert backend._fts_enabled
+        keep = backend.store({"agent": "builder", "prompt": "Build a RAPID prototype", "response": "ok"})
+        gone = backend.store({"agent": "builder", "prompt": "rapid again", "response": "ok"})
+        backend.delete(gone)
+
+        assert [r["id"] for r in backend.search(query="apid")] == [keep]
+        assert [r["id"] for r in backend.search(query='"rapid"')] == []  # quotes matched literally
+        assert [r["id"] for r in backend.search(query="RA")] == [keep]  # short query: LIKE path
+
+        # Rows stored before the FTS table existed are indexed on the next open
+        conn = sqlite3.connect(temp_db)
+        conn.execute("DROP TABLE conversations_fts")
+        conn.commit()
+        conn.close()
+        reopened = SQLiteBackend(temp_db)
+        assert [r["id"] for r in reopened.search(query="prototype")] == [keep]
+
+    def test_concurrent_writers_and_readers(self, temp_db):
+        """Test threads with their own connections write and read concurrently without errors."""
+        import threading
+
+        backend = SQLiteBackend(temp_db)
+        errors = []
+
+        def work(n):
+            try:
+                for i in range(25):
+                    backend.store({"agent": "builder", "prompt": f"p{n}-{i}", "response": "r"})
+                    backend.get_recent(limit=5)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert backend.get_stats()["total_conversations"] == 100
+
+    def test_fts_search_ranks_by_bm25(self, temp_db):
+        """Test fts_search returns only matching rows, best BM25 match first, with filters applied."""
+        backend = SQLiteBackend(temp_db)
+        one = backend.store({"agent": "builder", "prompt": "parse json", "response": "ok"})
+        both = backend.store({"agent": "builder", "prompt": "parse json with python", "response": "python ok"})
+        backend.store({"agent": "builder", "prompt": "weather today", "response": "sunny"})
+        backend.store({"agent": "critic", "prompt": "python review", "response": "ok",
+                       "session_id": "s1"})
+
+        results = backend.fts_search('"json" OR "python"', agent="builder")
+        assert [r["id"] for r in results] == [both, one]
+        assert results[0]["rank"] <= results[1]["rank"]
+        assert backend.fts_search('"python"', exclude_session_id="s1") == backend.fts_search(
+            '"python"', agent="builder"
+        )
+
+        backend._fts_enabled = False
+        assert backend.fts_search('"python"') is None
+
+    def test_cleanup_deletes_old_conversations_in_chunks(self, temp_db):
+        """Test cleanup handles windows longer than the current day-of-month and purges in chunks."""
+        from datetime import datetime, timedelta, timezone
+
+        backend = SQLiteBackend(temp_db)
+        now = datetime.now(timezone.utc)
+        for age_days in (400, 100, 45):
+            backend.store({"agent": "builder", "prompt": "old", "response": "r",
+                           "timestamp": (now - timedelta(days=age_days)).isoformat()})
+        recent = backend.store({"agent": "builder", "prompt": "new", "response": "r",
+                                "timestamp": now.isoformat()})
+
+        with patch("core.memory_backend._CLEANUP_CHUNK_ROWS", 2):
+            assert backend.cleanup(days=40) == 3
+
+        assert [r["id"] for r in backend.get_recent(limit=10)] == [recent]
+        assert backend.search(query="old") == []
+
     def test_search_by_model(self, temp_db):
         """Test filtering search by model."""
         backend = SQLiteBackend(temp_db)
@@ -235,6 +411,14 @@ class TestSQLiteBackend:
         assert stats["total_cost_usd"] == 0.015
         assert "builder" in stats["by_agent"]
         assert "critic" in stats["by_agent"]
+        assert stats["by_model"] == {"test": {"count": 2, "tokens": 150}}
+
+        # Aggregated from the covering index, without reading table rows or sorting
+        from core.memory_backend import _STATS_SQL
+
+        plan = " ".join(row[3] for row in backend._get_connection().execute("EXPLAIN QUERY PLAN " + _STATS_SQL))
+        assert "COVERING INDEX idx_stats" in plan
+        assert "TEMP B-TREE" not in plan
 
 
 class TestMemoryEngine:
@@ -368,7 +552,7 @@ class TestMemoryEngine:
 
         keywords = engine._extract_keywords("Create a function to parse JSON data")
         # Now returns a set
-        assert isinstance(keywords, set)
+        assert isinstance(keywords, frozenset)
         assert "create" in keywords
         assert "function" in keywords
         assert "parse" in keywords
@@ -377,6 +561,12 @@ class TestMemoryEngine:
         assert "a" not in keywords
         assert "to" not in keywords
 
+        # Punctuation splits words; non-ASCII words are kept
+        assert engine._extract_keywords("Use json.loads(), the parser! Größe") == {
+            "use", "json", "loads", "parser", "größe"
+        }
+        assert engine._extract_keywords("json data parse", min_length=5) == {"parse"}
+
     def test_disable_enable(self, temp_db):
         """Test disabling and enabling memory."""
         engine = MemoryEngine()
@@ -504,6 +694,145 @@ class TestMemoryEngine:
         assert "json.loads" in context
         assert "sunny" not in context
 
+    def test_keyword_context_uses_fts_candidates(self, temp_db):
+        """Test keyword retrieval asks FTS for OR-joined keywords instead of scanning recent rows."""
+        engine = MemoryEngine()
+        backend = engine.backend
+        engine.store_conversation(
+            prompt="Parse JSON in Python", response="Use json.loads()", agent="builder",
+            model="test", provider="test",
+        )
+
+        with patch.object(engine, "_estimate_tokens_batch", side_effect=lambda recs: [10] * len(recs)):
+            with patch.object(backend, "query_candidates", wraps=backend.query_candidates) as scan, \
+                    patch.object(backend, "fts_search", wraps=backend.fts_search) as fts:
+                context = engine.get_context_for_prompt("json python", min_relevance=0.5, max_tokens=1000)
+
+            assert "json.loads" in context
+            assert fts.call_args.args[0] == '"json" OR "python"'
+            assert fts.call_args.kwargs["full"] is False  # text fetched for survivors only
+            scan.assert_not_called()
+
+            # Without FTS5 the recent-rows scan still serves the same result
+            with patch.object(backend, "_fts_enabled", False):
+                assert engine.get_context_for_prompt(
+                    "json python", min_relevance=0.5, max_tokens=1000
+                ) == context
+
+    def test_keyword_scoring_reads_stored_tokens(self, temp_db):
+        """Test keywords are stored once at write time and scoring does not re-extract them."""
+        engine = MemoryEngine()
+        conv_id = engine.store_conversation(
+            prompt="Parse JSON in Python", response="Use json.loads()", agent="builder",
+            model="test", provider="test",
+        )
+        rec = engine.backend.get_by_id(conv_id)
+        assert rec["tokens"] == "json loads parse python use"
+
+        with patch.object(engine, "_extract_keywords", return_value={"json", "python"}) as extract:
+            scores = engine._score_keywords({"json", "python"}, [rec], 0)
+        assert scores.tolist() == [1.0]
+        extract.assert_not_called()
+
+        # Rows without stored tokens fall back to the text
+        legacy = dict(rec, tokens=None)
+        assert engine._score_keywords({"json", "python"}, [legacy], 0).tolist() == [1.0]
+
+    def test_score_keywords_overlap_and_decay(self, temp_db):
+        """Test batched keyword scores are keyword overlap times exponential time decay."""
+        import math
+        import time
+
+        engine = MemoryEngine()
+        now = time.time()
+        candidates = [
+            {"id": 1, "tokens": "json parse python", "ts_epoch": now - 3600},
+            {"id": 2, "tokens": "weather sunny", "ts_epoch": now - 7200},
+            {"id": 3, "tokens": "python", "ts_epoch": now - 72 * 3600},
+        ]
+        query = {"json", "python"}
+
+        scores = engine._score_keywords(query, candidates, 24)
+        expected = [math.exp(-1 / 24), 0.0, 0.5 * math.exp(-72 / 24)]
+        assert scores.tolist() == pytest.approx(expected)
+        assert engine._score_keywords(set(), candidates, 24).tolist() == [0.0, 0.0, 0.0]
+
+    def test_budget_selection_packs_optimally(self, temp_db):
+        """Test budget selection prefers two smaller records over one large one that scores less."""
+        engine = MemoryEngine()
+        scored = [
+            {"id": 1, "_score": 0.9, "_est_tokens": 60},
+            {"id": 2, "_score": 0.8, "_est_tokens": 50},
+            {"id": 3, "_score": 0.7, "_est_tokens": 50},
+            {"id": 4, "_score": 0.0, "_est_tokens": 0},
+        ]
+
+        assert [r["id"] for r in engine._select_within_budget(scored, 100)] == [2, 3, 4]
+        assert [r["id"] for r in engine._select_within_budget(scored, 1000)] == [1, 2, 3, 4]
+        assert [r["id"] for r in engine._select_within_budget(scored, 59)] == [2, 4]
+
+    def test_no_keywords_skips_candidate_query(self, temp_db):
+        """Test a prompt with no keywords returns no context without querying the backend."""
+        engine = MemoryEngine()
+        with patch.object(engine.backend, "query_candidates") as scan, \
+                patch.object(engine.backend, "fts_search") as fts:
+            assert engine.get_context_for_prompt("is it a", min_relevance=0.0) == ""
+        scan.assert_not_called()
+        fts.assert_not_called()
+
+    def test_context_cache_reused_until_database_changes(self, temp_db):
+        """Test repeated context requests skip retrieval until a write, from any connection."""
+        import sqlite3
+
+        engine = MemoryEngine()
+        backend = SQLiteBackend(temp_db)
+
+        with patch.object(engine, "backend", backend), \
+                patch.object(engine, "_context_cache_ttl", 300.0), \
+                patch.object(engine, "_estimate_tokens_batch", side_effect=lambda recs: [10] * len(recs)), \
+                patch.object(engine, "_build_context", wraps=engine._build_context) as build:
+            engine.store_conversation("Parse JSON in Python", "Use json.loads()", "builder", "m", "p",
+                                      generate_embedding=False)
+            first = engine.get_context_for_prompt("json python cache", min_relevance=0.3)
+            assert engine.get_context_for_prompt("json python cache", min_relevance=0.3) == first
+            assert build.call_count == 1
+
+            engine.store_conversation("Python cache tips", "Use lru_cache", "builder", "m", "p",
+                                      generate_embedding=False)
+            assert "lru_cache" in engine.get_context_for_prompt("json python cache", min_relevance=0.3)
+            assert build.call_count == 2
+
+            other = sqlite3.connect(backend.db_path)
+            other.execute("DELETE FROM conversations")
+            other.commit()
+            other.close()
+            assert engine.get_context_for_prompt("json python cache", min_relevance=0.3) == ""
+            assert build.call_count == 3
+
+    def test_candidates_too_old_to_score_are_not_read(self, temp_db):
+        """Test rows whose time decay alone falls below min_relevance are filtered in SQL."""
+        import math
+        import time
+        from datetime import datetime, timedelta, timezone
+
+        engine = MemoryEngine()
+        backend = SQLiteBackend(temp_db)
+        now = datetime.now(timezone.utc)
+        backend.store({"agent": "builder", "prompt": "python json", "response": "old",
+                             "timestamp": (now - timedelta(hours=40)).isoformat()})
+        recent = backend.store({"agent": "builder", "prompt": "python json", "response": "new",
+                                "timestamp": (now - timedelta(hours=30)).isoformat()})
+        assert [r["id"] for r in backend.query_candidates(min_ts=time.time() - 35 * 3600)] == [recent]
+
+        # exp(-age / 24h) < 0.25 beyond 24 * ln(4) = 33.3 hours
+        with patch.object(engine, "backend", backend), \
+                patch.object(engine, "_context_cache_ttl", 0.0), \
+                patch.object(engine, "_estimate_tokens_batch", side_effect=lambda recs: [10] * len(recs)), \
+                patch.object(backend, "fts_search", wraps=backend.fts_search) as fts:
+            context = engine.get_context_for_prompt("python json", min_relevance=0.25, time_decay_hours=24)
+        assert "A: new" in context
+        assert fts.call_args.kwargs["min_ts"] == pytest.approx(time.time() - 24 * math.log(4) * 3600, abs=5)
+
     def test_exclude_current_session(self, temp_db):
         """Test that exclude_current_session filters out same-session conversations."""
         engine = MemoryEngine()
@@ -682,6 +1011,139 @@ class TestMemoryEngine:
                     recent_idx < old_idx
                 ), "Recent conversation should rank higher with time decay"
 
+    def test_score_semantic_matches_pairwise_cosine(self, temp_db):
+        """Test vectorized semantic scoring agrees with per-pair cosine similarity."""
+        from datetime import datetime, timezone
+
+        from core.embedding_engine import EmbeddingEngine
+
+        engine = MemoryEngine()
+        engine._embedding_engine = MagicMock()
+        query = np.array([1.0, 0.0, 0.0])
+        engine._embedding_engine.encode.return_value = query
+
+        now = datetime.now(timezone.utc).isoformat()
+        embeddings = {
+            1: np.array([1.0, 1.0, 0.0]),
+            2: np.array([-1.0, 0.0, 0.0]),  # opposite: clamped to 0
+            3: np.zeros(3),  # zero norm: scored 0
+            4: None,  # unavailable: skipped
+        }
+        candidates = [{"id": i, "timestamp": now, "prompt": "p", "response": "r"} for i in embeddings]
+
+        with patch.object(engine, "_get_or_generate_embedding", side_effect=lambda rec: embeddings[rec["id"]]):
+            scored = engine._score_semantic("query", candidates, time_decay_hours=0)
+
+        assert [rec["id"] for rec in scored] == [1, 2, 3]
+        for rec in scored:
+            expected = EmbeddingEngine.cosine_similarity(None, query, embeddings[rec["id"]])
+            assert rec["_score"] == pytest.approx(expected)
+
+    def test_semantic_context_reads_text_only_for_survivors(self, temp_db):
+        """Test semantic and hybrid retrieval score slim candidates and hydrate only the kept ones."""
+        from core.embedding_engine import EmbeddingEngine
+
+        engine = MemoryEngine()
+        engine._embedding_engine = MagicMock()
+        engine._embedding_engine.encode.return_value = np.array([1.0, 0.0])
+        match = engine.store_conversation("Match prompt", "match", "builder", "m", "p", generate_embedding=False)
+        other = engine.store_conversation("Other prompt", "other", "builder", "m", "p", generate_embedding=False)
+        engine.backend.update_embedding(match, EmbeddingEngine.serialize_embedding(np.array([1.0, 0.0])))
+        engine.backend.update_embedding(other, EmbeddingEngine.serialize_embedding(np.array([0.0, 1.0])))
+
+        slim = engine.backend.query_candidates(full=False)
+        assert all("prompt" not in rec and rec["embedding"] for rec in slim)
+
+        with patch.object(engine.backend, "hydrate", wraps=engine.backend.hydrate) as hydrate, \
+                patch.object(engine, "_estimate_tokens_batch", side_effect=lambda recs: [10] * len(recs)):
+            context = engine.get_context_for_prompt(
+                "query", strategy="semantic", min_relevance=0.5, time_decay_hours=0
+            )
+
+        assert "Match prompt" in context and "Other prompt" not in context
+        hydrated_ids = [rec["id"] for call in hydrate.call_args_list for rec in call.args[0]]
+        assert hydrated_ids == [match]
+
+        # Hybrid scores from stored embeddings and keyword sets the same way
+        with patch.object(engine.backend, "hydrate", wraps=engine.backend.hydrate) as hydrate, \
+                patch.object(engine, "_estimate_tokens_batch", side_effect=lambda recs: [10] * len(recs)):
+            context = engine.get_context_for_prompt(
+                "match", strategy="hybrid", min_relevance=0.5, time_decay_hours=0
+            )
+
+        assert "Match prompt" in context and "Other prompt" not in context
+        hydrated_ids = [rec["id"] for call in hydrate.call_args_list for rec in call.args[0]]
+        assert hydrated_ids == [match]
+
+    def test_store_conversation_persists_embedding(self, temp_db):
+        """Test the embedding generated at store time is written with the row, not re-encoded later."""
+        from core.embedding_engine import EmbeddingEngine
+
+        engine = MemoryEngine()
+        encoder = MagicMock()
+        encoder.encode.return_value = np.array([0.6, 0.8])
+        with patch.object(engine, "backend", SQLiteBackend(temp_db)), \
+                patch.object(engine, "_embedding_engine", encoder):
+            conv_id = engine.store_conversation("Stored prompt", "response", "builder", "m", "p")
+            (rec,) = engine.backend.query_candidates(full=False)
+            assert rec["id"] == conv_id
+            assert (EmbeddingEngine.deserialize_embedding(rec["embedding"]) == np.float32([0.6, 0.8])).all()
+
+            with patch.object(engine.backend, "update_embedding") as update:
+                engine._score_semantic("query", [rec], time_decay_hours=0)
+
+        assert encoder.encode.call_count == 2  # once at store, once for the query
+        update.assert_not_called()
+
+    def test_query_embedding_reused_across_writes(self, temp_db):
+        """Test a repeated prompt is embedded once even after a write invalidates the context cache."""
+        from collections import OrderedDict
+
+        engine = MemoryEngine()
+        encoder = MagicMock()
+        encoder.encode.return_value = np.array([1.0, 0.0])
+        with patch.object(engine, "backend", SQLiteBackend(temp_db)), \
+                patch.object(engine, "_embedding_engine", encoder), \
+                patch.object(engine, "_context_cache_ttl", 300.0), \
+                patch.object(engine, "_context_cache", OrderedDict()), \
+                patch.object(engine, "_query_embedding_cache", OrderedDict()), \
+                patch.object(engine, "_estimate_tokens_batch", side_effect=lambda recs: [10] * len(recs)):
+            engine.store_conversation("First prompt", "first", "builder", "m", "p")
+            engine.get_context_for_prompt("retry me", strategy="semantic", min_relevance=0.5)
+            engine.store_conversation("Second prompt", "second", "builder", "m", "p")
+            context = engine.get_context_for_prompt("retry me", strategy="semantic", min_relevance=0.5)
+
+            encoded = [call.args[0] for call in encoder.encode.call_args_list]
+            assert "First prompt" in context and "Second prompt" in context
+            assert encoded.count("retry me") == 1
+
+            # A different encoder gets its own entry
+            other = MagicMock()
+            other.encode.return_value = np.array([1.0, 0.0])
+            with patch.object(engine, "_embedding_engine", other):
+                engine._encode_query("retry me")
+            other.encode.assert_called_once_with("retry me")
+
+    def test_decay_factors_parse_each_timestamp_once(self, temp_db):
+        """Test decay is exp(-age/decay) per record and timestamps are parsed once."""
+        from datetime import datetime, timedelta, timezone
+
+        engine = MemoryEngine()
+        now = datetime.now(timezone.utc)
+        records = [
+            {"timestamp": now.isoformat()},
+            {"timestamp": (now - timedelta(hours=24)).isoformat()},
+        ]
+
+        with patch.object(engine, "_parse_timestamp", wraps=engine._parse_timestamp) as parse:
+            decay = engine._decay_factors(records, time_decay_hours=24)
+            engine._decay_factors(records, time_decay_hours=24)
+
+        assert parse.call_count == 2
+        assert decay[0] == pytest.approx(1.0, abs=1e-3)
+        assert decay[1] == pytest.approx(np.exp(-1), abs=1e-3)
+        assert list(engine._decay_factors(records, time_decay_hours=0)) == [1.0, 1.0]
+
     def test_deterministic_scoring_and_sorting(self, temp_db):
         """Test that scoring and sorting is deterministic."""
         engine = MemoryEngine()
@@ -1,8 +1,11 @@
 """Test agent runtime with mocked LLM calls."""
 
+import asyncio
 import sys
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -10,6 +13,13 @@ from core.agent_runtime import AgentRuntime, RunResult
 from core.llm_connector import LLMResponse
 
 
+def _stub_memory(runtime: AgentRuntime) -> None:
+    """Keep memory-enabled agents off the real conversations.db and embedding model."""
+    runtime._memory = MagicMock()
+    runtime._context_aggregator = MagicMock()
+    runtime._context_aggregator.get_full_context.return_value = ("", {})
+
+
 def test_router_returns_valid_agent():
     """Test that router returns builder, critic, or closer."""
     runtime = AgentRuntime()
@@ -76,6 +86,34 @@ def test_run_with_mock():
             assert result.error is None
 
 
+def test_arun_with_mock():
+    """Test arun() awaits the async connector and returns a normal RunResult."""
+    runtime = AgentRuntime()
+    _stub_memory(runtime)
+
+    mock_response = LLMResponse(
+        text="Async response",
+        model="anthropic/claude-3-5-sonnet-20241022",
+        provider="anthropic",
+        prompt_tokens=50,
+        completion_tokens=20,
+        total_tokens=70,
+        duration_ms=250.0,
+    )
+
+    with patch.object(runtime.connector, "acall", new_callable=AsyncMock, return_value=mock_response):
+        with patch("core.agent_runtime.write_json") as mock_write:
+            mock_write.return_value = Path("test.json")
+
+            result = asyncio.run(runtime.arun("critic", "Test prompt"))
+            runtime.flush_logs()
+
+            assert result.agent == "critic"
+            assert result.response == "Async response"
+            assert result.total_tokens == 70
+            assert result.log_file == mock_write.call_args.kwargs["filename"]
+
+
 def test_intelligent_truncate():
     """Test intelligent truncation fallback."""
     runtime = AgentRuntime()
@@ -623,3 +661,288 @@ def test_select_relevant_critics_min_max_constraints():
         selected = runtime._select_relevant_critics(prompt, "...")
         assert len(selected) >= min_critics
         assert len(selected) <= max_critics
+
+
+def test_select_relevant_critics_short_input_fast_path():
+    """Test that short prompts skip keyword scoring and use the default critic set."""
+    runtime = AgentRuntime()
+
+    dynamic_config = runtime.config["dynamic_selection"]
+    original_min_len = dynamic_config.get("min_text_len")
+    dynamic_config["min_text_len"] = 200
+
+    try:
+        with patch("core.agent_runtime.status_log") as mock_status_log:
+            # Contains security keywords, but is too short to be scored
+            selected = runtime._select_relevant_critics("Add JWT auth", "...")
+
+        assert selected == runtime.config["multi_critic"]["critics"]
+        assert runtime._critic_fast_path_hits == 1
+        assert not mock_status_log.method_calls  # No scoring/selection output on the fast path
+    finally:
+        if original_min_len is None:
+            dynamic_config.pop("min_text_len", None)
+        else:
+            dynamic_config["min_text_len"] = original_min_len
+
+
+def test_compress_semantic_batch_single_call():
+    """Test batch compression summarizes several outputs with one LLM call."""
+    runtime = AgentRuntime()
+
+    texts = ["Use PostgreSQL for storage. " * 100, "Add rate limiting on login. " * 100]
+    mock_response = LLMResponse(
+        text='[{"id": 0, "summary": {"key_decisions": ["PostgreSQL"]}}, '
+        '{"id": 1, "summary": {"key_decisions": ["Rate limiting"]}}]',
+        model="gemini/gemini-2.5-flash",
+        provider="google",
+        prompt_tokens=800,
+        completion_tokens=80,
+        total_tokens=880,
+        duration_ms=200.0,
+    )
+
+    with patch.object(runtime.connector, "call", return_value=mock_response) as mock_call:
+        summaries = runtime._compress_semantic_batch(texts, max_tokens=500)
+
+    assert mock_call.call_count == 1
+    assert len(summaries) == 2
+    assert "PostgreSQL" in summaries[0]
+    assert "Rate limiting" in summaries[1]
+
+
+def test_compress_semantic_batch_missing_entry_falls_back():
+    """Test batch compression truncates texts the model did not summarize."""
+    runtime = AgentRuntime()
+
+    texts = ["first output. " * 300, "second output. " * 300]
+    mock_response = LLMResponse(
+        text='[{"id": 0, "summary": "first summary"}]',
+        model="gemini/gemini-2.5-flash",
+        provider="google",
+        prompt_tokens=800,
+        completion_tokens=20,
+        total_tokens=820,
+        duration_ms=200.0,
+    )
+
+    with patch.object(runtime.connector, "call", return_value=mock_response):
+        summaries = runtime._compress_semantic_batch(texts, max_tokens=100)
+
+    assert summaries[0] == "first summary"
+    assert summaries[1].startswith("second output.")
+    assert len(summaries[1]) <= 401
+
+
+def test_extract_critical_issues_memoized():
+    """Test the same critic output is parsed once and returns the same result."""
+    from core.agent_runtime import _parse_critical_issues
+
+    runtime = AgentRuntime()
+    critique_text = "Issue 1: CRITICAL - SQL injection in login handler\nUse parameterized queries."
+
+    _parse_critical_issues.cache_clear()
+    first = runtime._extract_critical_issues(critique_text)
+    second = runtime._extract_critical_issues(critique_text)
+
+    assert first == second
+    assert "SQL injection" in first
+    assert _parse_critical_issues.cache_info().hits == 1
+
+
+def test_run_log_written_in_background():
+    """Test run() returns the log filename up front and the worker writes it."""
+    runtime = AgentRuntime()
+    _stub_memory(runtime)
+
+    mock_response = LLMResponse(
+        text="Test response",
+        model="openai/gpt-4o-mini",
+        provider="openai",
+        prompt_tokens=10,
+        completion_tokens=5,
+        total_tokens=15,
+        duration_ms=50.0,
+    )
+
+    with patch.object(runtime.connector, "call", return_value=mock_response):
+        with patch("core.agent_runtime.write_json") as mock_write:
+            result = runtime.run("critic", "Test prompt")
+            runtime.flush_logs()
+
+            assert result.log_file.endswith(".json")
+            assert "-critic-" in result.log_file
+            mock_write.assert_called_once()
+            assert mock_write.call_args.kwargs["filename"] == result.log_file
+            assert mock_write.call_args.args[0]["agent"] == "critic"
+
+
+def test_route_heuristic_skips_llm():
+    """Test an unambiguous prompt is routed locally without an LLM call."""
+    runtime = AgentRuntime()
+
+    with patch.object(runtime.connector, "call") as mock_call:
+        agent = runtime.route("Please review and audit this login handler for security issues")
+
+    assert agent == "critic"
+    mock_call.assert_not_called()
+
+
+def test_route_heuristic_ambiguous_falls_back_to_llm():
+    """Test prompts without a clear keyword winner still use the LLM router."""
+    runtime = AgentRuntime()
+    assert runtime._route_heuristic("Create a REST API") is None
+
+    mock_response = LLMResponse(
+        text="closer",
+        model="gemini/gemini-2.5-flash",
+        provider="google",
+        prompt_tokens=10,
+        completion_tokens=1,
+        total_tokens=11,
+        duration_ms=100.0,
+    )
+
+    with patch.object(runtime.connector, "call", return_value=mock_response) as mock_call:
+        agent = runtime.route("What should we do about the database?")
+
+    assert agent == "closer"
+    mock_call.assert_called_once()
+
+
+def test_check_convergence_identical_issues_stops_even_in_grace():
+    """Test a critic repeating the same issues stops refinement regardless of grace."""
+    runtime = AgentRuntime()
+    previous = "CRITICAL ISSUES REQUIRING FIXES:\n\n1. Issue 1: SQL injection\n\n2. Issue 2: Missing rate limit"
+    current = "CRITICAL ISSUES REQUIRING FIXES:\n\n1. issue 1:  SQL injection\n\n2. Issue 2: missing rate limit"
+
+    converged, reason = runtime._check_convergence(current, previous, allow_no_progress=True)
+
+    assert converged is True
+    assert "Same issues" in reason
+
+
+def test_check_convergence_grace_allows_no_progress():
+    """Test a grace iteration continues when the issue count did not drop."""
+    runtime = AgentRuntime()
+    previous = "CRITICAL: SQL injection"
+    current = "CRITICAL: Missing CSRF token"
+
+    assert runtime._check_convergence(current, previous)[0] is True
+    assert runtime._check_convergence(current, previous, allow_no_progress=True)[0] is False
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_run_multi_critic_majority_early_exit(parallel):
+    """Test remaining critics are never started once a majority agree."""
+    runtime = AgentRuntime()
+    runtime.config["dynamic_selection"]["enabled"] = False
+    runtime.config["multi_critic"]["critics"] = ["security-critic", "performance-critic", "code-quality-critic"]
+    runtime.config["multi_critic"]["parallel_execution"] = parallel
+    runtime.config["multi_critic"]["early_exit"] = True
+    called = []
+
+    def mock_run(agent, prompt, **kwargs):
+        called.append(agent)
+        return RunResult(
+            agent=agent,
+            model="test/model",
+            provider="test",
+            prompt=prompt,
+            response="Looks good, no blocking concerns.",
+            duration_ms=100.0,
+            prompt_tokens=10,
+            completion_tokens=5,
+            total_tokens=15,
+            timestamp="2024-01-01T00:00:00",
+            log_file="test.json",
+        )
+
+    with patch.object(runtime, "run", side_effect=mock_run):
+        consensus, results = runtime._run_multi_critic("Builder output", "Build a page")
+
+    assert sorted(called) == ["performance-critic", "security-critic"]
+    assert [r.agent for r in results] == ["security-critic", "performance-critic"]
+
+
+def test_critical_issue_limit_counts_completed_lines():
+    """Test the streamed-critic stop predicate only counts finished issue lines."""
+    runtime = AgentRuntime()
+    reached_limit = runtime._critical_issue_limit(2)
+
+    assert reached_limit("Issue 1: SQL injection\nDetails follow\n") is False
+    assert reached_limit("Issue 1: SQL injection\nDetails follow\nIssue 2: missing auth") is False
+    assert reached_limit("Issue 1: SQL injection\nDetails follow\nIssue 2: missing auth\n") is True
+
+
+def test_run_critic_streams_when_issue_limit_set():
+    """Test chain's critic uses run_stream with a stop predicate when configured."""
+    runtime = AgentRuntime()
+    runtime.config.setdefault("refinement", {})["critic_stop_after_issues"] = 1
+    critic_result = RunResult(
+        agent="critic", model="m", provider="p", prompt="p", response="Issue 1: bug\n",
+        duration_ms=1.0, prompt_tokens=1, completion_tokens=1, total_tokens=2,
+        timestamp="t", log_file="f",
+    )
+
+    with patch.object(runtime, "run_stream", return_value=iter([("Issue 1: bug\n", None), ("", critic_result)])) as mock_stream, \
+         patch.object(runtime, "run") as mock_run:
+        result = runtime._run_critic("review this", mock_mode=True)
+
+    assert result is critic_result
+    assert mock_stream.call_args.kwargs["stop_when"] is not None
+    mock_run.assert_not_called()
+
+
+def test_semantic_compression_input_is_head_tail_truncated():
+    """Test very long outputs are cut to head + tail before the summarizer call."""
+    runtime = AgentRuntime()
+    runtime.config["compression"]["strategy"] = "semantic"
+    runtime.config["compression"]["max_input_chars"] = 100
+    text = "H" * 500 + "M" * 500 + "T" * 500
+
+    with patch.object(runtime, "_compress_semantic_batch", return_value=["summary"]) as mock_batch:
+        runtime._compress_for_context([text], query="q")
+
+    sent = mock_batch.call_args.args[0][0]
+    assert sent.startswith("H" * 50)
+    assert sent.endswith("T" * 50)
+    assert "M" not in sent
+    assert "[truncated]" in sent
+
+
+def test_build_agent_context_reuses_compressed_output():
+    """Test the same previous output is compressed once across context builds."""
+    runtime = AgentRuntime()
+    runtime.config["compression"]["rule_based"] = False
+    long_output = "builder output line\n" * 200
+
+    with patch.object(runtime, "_compress_for_context", return_value=["summary"]) as mock_compress:
+        first = runtime._build_agent_context(
+            agent="critic", original_prompt="Build API", previous_label="builder output",
+            previous_response=long_output, threshold=800,
+        )
+        second = runtime._build_agent_context(
+            agent="critic", original_prompt="Build API", previous_label="builder output (iteration 2)",
+            previous_response=long_output, threshold=800,
+        )
+
+    assert mock_compress.call_count == 1
+    assert first.startswith("Original request: Build API\n\nYour task as critic:\n\nPrevious builder output:\nsummary")
+    assert "Previous builder output (iteration 2):\nsummary" in second
+
+
+def test_bm25_compression_fits_output_just_over_threshold():
+    """Test bm25 shrinks an output slightly over the threshold instead of returning it unchanged."""
+    runtime = AgentRuntime()
+    runtime.config["compression"]["strategy"] = "bm25"
+    runtime.config["compression"]["rule_based"] = False
+    paragraphs = [f"Paragraph {idx} about the API design and storage layer choices." for idx in range(25)]
+    builder_output = "\n\n".join(paragraphs)
+    assert 1200 < len(builder_output) < 2000
+
+    context = runtime._compress_previous_output(builder_output, threshold=1200, query="API design")
+
+    assert len(context) < len(builder_output)
+    assert len(context.split("\n\n[Note:")[0]) <= 1200
+
@@ -38,6 +38,30 @@ def test_embedding_engine_loads():
     assert engine.model_name == "paraphrase-multilingual-MiniLM-L12-v2"
 
 
+def test_model_loads_once_under_concurrent_first_use():
+    """Verify concurrent first calls share a single model load."""
+    import threading
+    import time
+    from unittest.mock import patch
+
+    engine = EmbeddingEngine()
+    loaded = object()
+
+    def slow_load():
+        time.sleep(0.05)
+        return loaded
+
+    with patch.object(engine, "_load_model", side_effect=slow_load) as load:
+        threads = [threading.Thread(target=lambda: engine.model) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert load.call_count == 1
+    assert engine.model is loaded
+
+
 def test_embedding_generation():
     """Verify embeddings can be generated for text."""
     engine = get_embedding_engine()
@@ -78,6 +102,20 @@ def test_embedding_serialization():
     assert (deserialized == original).all()
 
 
+def test_embedding_serialization_raw_and_legacy_pickle():
+    """Verify the raw float32 format round-trips and pickled blobs from older rows still load."""
+    import pickle
+
+    import numpy as np
+
+    original = np.arange(384, dtype=np.float32) / 384
+    serialized = EmbeddingEngine.serialize_embedding(original)
+
+    assert len(serialized) == 4 + 384 * 4
+    assert (EmbeddingEngine.deserialize_embedding(serialized) == original).all()
+    assert (EmbeddingEngine.deserialize_embedding(pickle.dumps(original)) == original).all()
+
+
 def test_semantic_search_basic(temp_memory):
     """
     Smoke test for semantic search integration.